@@ -16,16 +16,13 @@ async def analyze_demo_courses():
         print("🔍 АНАЛИЗ ДЕМО КУРСОВ В БАЗЕ ДАННЫХ")
         print("=" * 50)
         
-        # Получаем все курсы
-        courses = await supabase_client.get_records("courses", order_by="created_at")
-        
-        print(f"📚 Всего курсов: {len(courses)}")
-        print()
-        
         demo_patterns = ["Основы Ислама", "Очищение и молитва", "Изучение Корана"]
         demo_courses = []
+        total_courses = 0
         
-        for course in courses:
+        # Обходим курсы постранично (keyset-пагинация), не загружая таблицу целиком
+        async for course in supabase_client.iter_records("courses", order_by="created_at"):
+            total_courses += 1
             print(f"🎓 КУРС: {course['title']}")
             print(f"   🆔 ID: {course['id']}")
             print(f"   📅 Создан: {course['created_at']}")
@@ -42,6 +39,7 @@ async def analyze_demo_courses():
             print()
         
         print("=" * 50)
+        print(f"📚 Всего курсов: {total_courses}")
         print(f"🎯 НАЙДЕНО ДЕМО КУРСОВ: {len(demo_courses)}")
         
         if demo_courses:
@@ -76,10 +74,11 @@ async def analyze_demo_courses():
         print("   4. Скрипт autostart_supabase.py (файл не найден)")
         
         # Проверяем админов - возможно они создают курсы при создании
-        admins = await supabase_client.get_records("admin_users")
-        print(f"\n👨‍💼 Найдено админов: {len(admins)}")
-        for admin in admins:
+        admins_count = 0
+        async for admin in supabase_client.iter_records("admin_users"):
+            admins_count += 1
             print(f"   • {admin.get('email', 'N/A')} (создан: {admin.get('created_at', 'N/A')})")
+        print(f"\n👨‍💼 Найдено админов: {admins_count}")
         
     except Exception as e:
         print(f"❌ Ошибка: {e}")
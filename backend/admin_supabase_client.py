@@ -6,7 +6,9 @@ Provides universal table management capabilities
 import os
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from db_executor import db_executor
+from supabase_connection import get_supabase
+from query_cache import query_cache
 import json
 
 # Load environment variables
@@ -17,28 +19,26 @@ class AdminSupabaseClient:
     Admin Supabase client with service role privileges for universal table management
     """
     
-    def __init__(self):
-        self.supabase_url = os.getenv("SUPABASE_URL")
-        self.service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        
-        if not self.supabase_url or not self.service_role_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
-        
-        # Create client with service role key for admin privileges
-        self.client: Client = create_client(self.supabase_url, self.service_role_key)
-        print("✅ Admin Supabase Client initialized with service role privileges")
+    @property
+    def client(self):
+        """The process-wide Supabase client shared with SupabaseClient"""
+        return get_supabase()
+    
+    async def _execute(self, query, timeout: Optional[float] = None):
+        """Run a postgrest query on the shared DB executor instead of the event loop"""
+        return await db_executor.execute(query, timeout=timeout)
     
     async def get_all_tables(self) -> List[Dict[str, Any]]:
         """Get list of all tables in the database"""
         try:
             # Query information_schema to get table information
-            result = self.client.rpc('get_all_tables').execute()
+            result = await self._execute(self.client.rpc('get_all_tables'))
             
             if result.data:
                 return result.data
             
             # Fallback: try to get tables from pg_tables
-            result = self.client.rpc('get_tables_info').execute()
+            result = await self._execute(self.client.rpc('get_tables_info'))
             
             if result.data:
                 return result.data
@@ -83,7 +83,7 @@ class AdminSupabaseClient:
         """Get table structure (columns, types, constraints)"""
         try:
             # Try to get some sample data to infer structure
-            sample_result = self.client.table(table_name).select("*").limit(1).execute()
+            sample_result = await self._execute(self.client.table(table_name).select("*").limit(1))
             
             if sample_result.data:
                 sample_row = sample_result.data[0]
@@ -165,14 +165,14 @@ class AdminSupabaseClient:
                 query = query.ilike("*", f"%{search}%")
             
             # Count total records
-            count_result = self.client.table(table_name).select("*", count="exact").execute()
+            count_result = await self._execute(self.client.table(table_name).select("*", count="exact"))
             total_count = count_result.count if count_result.count else 0
             
             # Apply pagination
             offset = (page - 1) * limit
             query = query.range(offset, offset + limit - 1)
             
-            result = query.execute()
+            result = await self._execute(query)
             
             return {
                 "data": result.data or [],
@@ -196,7 +196,7 @@ class AdminSupabaseClient:
     async def create_record(self, table_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new record in the specified table"""
         try:
-            result = self.client.table(table_name).insert(data).execute()
+            result = await self._execute(self.client.table(table_name).insert(data))
             
             if result.data:
                 return {
@@ -218,11 +218,13 @@ class AdminSupabaseClient:
                 "error": str(e),
                 "data": None
             }
+        finally:
+            query_cache.invalidate(table_name)
     
     async def update_record(self, table_name: str, record_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a record in the specified table"""
         try:
-            result = self.client.table(table_name).update(data).eq("id", record_id).execute()
+            result = await self._execute(self.client.table(table_name).update(data).eq("id", record_id))
             
             if result.data:
                 return {
@@ -244,11 +246,13 @@ class AdminSupabaseClient:
                 "error": str(e),
                 "data": None
             }
+        finally:
+            query_cache.invalidate(table_name)
     
     async def delete_record(self, table_name: str, record_id: str) -> Dict[str, Any]:
         """Delete a record from the specified table"""
         try:
-            result = self.client.table(table_name).delete().eq("id", record_id).execute()
+            result = await self._execute(self.client.table(table_name).delete().eq("id", record_id))
             
             return {
                 "success": True,
@@ -263,11 +267,13 @@ class AdminSupabaseClient:
                 "error": str(e),
                 "deleted_id": None
             }
+        finally:
+            query_cache.invalidate(table_name)
     
     async def execute_custom_query(self, query: str) -> Dict[str, Any]:
         """Execute a custom SQL query (use with caution)"""
         try:
-            result = self.client.rpc('execute_sql', {"sql_query": query}).execute()
+            result = await self._execute(self.client.rpc('execute_sql', {"sql_query": query}))
             
             return {
                 "success": True,
@@ -282,6 +288,9 @@ class AdminSupabaseClient:
                 "error": str(e),
                 "data": None
             }
+        finally:
+            # Custom SQL may touch any table
+            query_cache.clear()
 
 # Global instance
 admin_supabase_client = AdminSupabaseClient()
\ No newline at end of file
@@ -0,0 +1,585 @@
+"""
+Direct Postgres backend for the data layer.
+
+AsyncpgClient implements the SupabaseClient interface, but instead of going
+through PostgREST over HTTP it talks to Postgres over a pooled asyncpg
+connection. The SQL generated here depends only on the shape of a call
+(table, columns, filtered fields and operators) with every value passed as a
+parameter, so asyncpg's per-connection statement cache turns hot queries into
+prepared statements that are parsed and planned once.
+
+Rows come back with the same JSON types PostgREST returns (ISO timestamp
+strings, string UUIDs, numbers, decoded json), so handlers work unchanged on
+either backend. Reads still go through the shared cache and single-flight
+layers, writes invalidate the cache, and every statement is recorded in
+``db_metrics.query_metrics``.
+
+Enable with DB_BACKEND=asyncpg. Configuration (environment variables):
+    DATABASE_URL             - postgres:// connection string (direct connection
+                               or session pooler)
+    DB_POOL_MIN_SIZE         - connections opened up front (default 2)
+    DB_POOL_MAX_SIZE         - maximum pool size (default 10)
+    DB_STATEMENT_CACHE_SIZE  - prepared statements kept per connection (default 100,
+                               use 0 behind a transaction-mode pooler like PgBouncer)
+    SUPABASE_QUERY_TIMEOUT   - per-statement timeout, shared with the PostgREST backend
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, AsyncIterator
+import asyncpg
+from dotenv import load_dotenv
+from db_executor import db_executor, QueryTimeoutError
+from db_metrics import query_metrics, payload_size
+from single_flight import SingleFlight
+from query_cache import query_cache
+from supabase_client import SupabaseClient, BulkInsertError, COUNT_MODES
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Operator names match PostgREST's so both backends report the same filter shapes
+FILTER_OPERATORS = {"$in": "in", "$gte": "gte", "$lte": "lte", "$regex": "ilike"}
+
+AGGREGATE_FUNCTIONS = {"sum", "avg", "min", "max"}
+
+# "estimated" counts switch from COUNT(*) to the planner estimate above this
+# many rows, mirroring PostgREST's default max-rows
+ESTIMATED_COUNT_THRESHOLD = int(os.environ.get("DB_ESTIMATED_COUNT_THRESHOLD", "1000"))
+
+
+def quote_ident(name: str) -> str:
+    """Quote a table or column name for use in generated SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _pg_timestamp(value: str) -> str:
+    """Postgres text timestamps ('2024-01-01 10:00:00+00') -> ISO 8601 like PostgREST"""
+    value = value.replace(" ", "T", 1)
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    return value
+
+
+def _pg_numeric(value: str) -> Any:
+    if value in ("NaN", "Infinity", "-Infinity"):
+        return float(value)
+    return int(value) if re.fullmatch(r"-?\d+", value) else float(value)
+
+
+async def _init_connection(connection: asyncpg.Connection) -> None:
+    """Type codecs that accept and return the JSON values the rest of the app uses"""
+    for type_name in ("json", "jsonb"):
+        await connection.set_type_codec(
+            type_name, encoder=lambda value: json.dumps(value, default=str),
+            decoder=json.loads, schema="pg_catalog"
+        )
+    # Text format lets ISO strings and str UUIDs be passed as parameters directly
+    text_codecs = {
+        "uuid": str,
+        "timestamptz": _pg_timestamp,
+        "timestamp": _pg_timestamp,
+        "date": str,
+        "numeric": _pg_numeric,
+    }
+    for type_name, decoder in text_codecs.items():
+        await connection.set_type_codec(
+            type_name, encoder=str, decoder=decoder, schema="pg_catalog", format="text"
+        )
+
+
+def build_where(filters: Optional[Dict[str, Any]], args: List[Any]) -> str:
+    """WHERE clause for MongoDB-style filters; values are appended to ``args`` as parameters"""
+    conditions = []
+    for field, value in (filters or {}).items():
+        column = quote_ident(field)
+        if isinstance(value, dict):
+            for operator, op_value in value.items():
+                if operator == "$in":
+                    args.append(list(op_value))
+                    conditions.append(f"{column} = any(${len(args)})")
+                elif operator == "$gte":
+                    args.append(op_value)
+                    conditions.append(f"{column} >= ${len(args)}")
+                elif operator == "$lte":
+                    args.append(op_value)
+                    conditions.append(f"{column} <= ${len(args)}")
+                elif operator == "$regex":
+                    args.append(f"%{op_value}%")
+                    conditions.append(f"{column} ilike ${len(args)}")
+                else:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+        elif value is None:
+            conditions.append(f"{column} is null")
+        else:
+            args.append(value)
+            conditions.append(f"{column} = ${len(args)}")
+    return " where " + " and ".join(conditions) if conditions else ""
+
+
+def filter_shape(filters: Optional[Dict[str, Any]]) -> str:
+    """Metric label for a filter dict, in the same form db_metrics uses for PostgREST queries"""
+    shape = []
+    for field, value in (filters or {}).items():
+        if isinstance(value, dict):
+            shape.extend(f"{field}={FILTER_OPERATORS.get(operator, operator)}" for operator in value)
+        else:
+            shape.append(f"{field}={'is' if value is None else 'eq'}")
+    return ",".join(sorted(shape))
+
+
+class AsyncpgClient(SupabaseClient):
+    def __init__(self, dsn: Optional[str] = None):
+        self.dsn = dsn or os.environ.get("DATABASE_URL")
+        if not self.dsn:
+            raise ValueError("DATABASE_URL must be set in environment variables to use the asyncpg backend")
+
+        self.min_size = int(os.environ.get("DB_POOL_MIN_SIZE", "2"))
+        self.max_size = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+        self.statement_cache_size = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "100"))
+        self.timeout = db_executor.timeout
+        self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+        # Identical concurrent reads share one query
+        self.read_flights = SingleFlight()
+        # Optional per-table read-through cache, invalidated by writes below
+        self.cache = query_cache
+        logger.info("asyncpg client initialized")
+
+    async def connect(self) -> asyncpg.Pool:
+        """Open the connection pool (called on startup; also happens lazily on first query)"""
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        statement_cache_size=self.statement_cache_size,
+                        init=_init_connection,
+                        server_settings={"TimeZone": "UTC"}
+                    )
+                    logger.info(f"asyncpg pool opened ({self.min_size}-{self.max_size} connections)")
+        return self._pool
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+            logger.info("asyncpg pool closed")
+
+    async def _run(self, method: str, sql: str, args: List[Any], table: str, operation: str,
+                   filters: Optional[Dict[str, Any]] = None) -> Any:
+        """Run one statement on the pool (``fetch``/``fetchrow``/``fetchval``/``execute``) and record its metrics"""
+        pool = await self.connect()
+        started = time.perf_counter()
+        shape = filter_shape(filters)
+        try:
+            result = await getattr(pool, method)(sql, *args, timeout=self.timeout or None)
+        except asyncio.TimeoutError:
+            query_metrics.record(table, operation, shape, time.perf_counter() - started, error=True)
+            raise QueryTimeoutError(f"Database call timed out after {self.timeout}s")
+        except Exception:
+            query_metrics.record(table, operation, shape, time.perf_counter() - started, error=True)
+            raise
+
+        if method == "fetch":
+            rows = len(result)
+        elif method == "execute":
+            rows = self._status_count(result)
+        else:
+            rows = int(result is not None)
+        # Sized like the PostgREST path: the JSON the rows would encode to (a command tag has none)
+        payload_bytes = 0 if method == "execute" else payload_size(result)
+        query_metrics.record(table, operation, shape, time.perf_counter() - started, rows=rows,
+                             payload_bytes=payload_bytes)
+        return result
+
+    async def _fetch_rows(self, sql: str, args: List[Any], table: str, operation: str,
+                          filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return [dict(record) for record in await self._run("fetch", sql, args, table, operation, filters)]
+
+    @staticmethod
+    def _status_count(status: str) -> int:
+        """Row count from a command tag such as 'UPDATE 3' or 'INSERT 0 5'"""
+        try:
+            return int(status.rsplit(" ", 1)[-1])
+        except (AttributeError, ValueError):
+            return 0
+
+    @staticmethod
+    def _select_list(columns: Optional[List[str]]) -> str:
+        return ", ".join(quote_ident(column) for column in columns) if columns else "*"
+
+    @staticmethod
+    def _order_clause(order_by: Optional[str]) -> str:
+        if not order_by:
+            return ""
+        if order_by.startswith("-"):
+            return f" order by {quote_ident(order_by[1:])} desc"
+        return f" order by {quote_ident(order_by)}"
+
+    def _insert_sql(self, table: str, rows: List[Dict[str, Any]], args: List[Any]) -> str:
+        """Multi-row INSERT; columns missing from a row fall back to their DEFAULT"""
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        values = []
+        for row in rows:
+            placeholders = []
+            for column in columns:
+                if column in row:
+                    args.append(row[column])
+                    placeholders.append(f"${len(args)}")
+                else:
+                    placeholders.append("default")
+            values.append(f"({', '.join(placeholders)})")
+        column_list = ", ".join(quote_ident(column) for column in columns)
+        return f"insert into {quote_ident(table)} ({column_list}) values {', '.join(values)} returning *"
+
+    async def create_record(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new record in the specified table"""
+        try:
+            args: List[Any] = []
+            sql = self._insert_sql(table, [self._process_data_for_insert(data)], args)
+            rows = await self._fetch_rows(sql, args, table, "insert")
+            if rows:
+                return rows[0]
+            else:
+                raise Exception(f"Failed to create record in {table}")
+        except Exception as e:
+            logger.error(f"Error creating record in {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def create_records(self, table: str, rows: List[Dict[str, Any]],
+                             chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """Bulk insert records, one multi-row INSERT per chunk of ``chunk_size`` rows"""
+        if not rows:
+            return []
+
+        processed_rows = [self._process_data_for_insert(row) for row in rows]
+        inserted: List[Dict[str, Any]] = []
+        failed_chunks: List[Dict[str, Any]] = []
+        try:
+            for index, start in enumerate(range(0, len(processed_rows), chunk_size)):
+                chunk = processed_rows[start:start + chunk_size]
+                try:
+                    args: List[Any] = []
+                    sql = self._insert_sql(table, chunk, args)
+                    inserted.extend(await self._fetch_rows(sql, args, table, "insert"))
+                except Exception as e:
+                    logger.error(f"Error inserting chunk {index} ({len(chunk)} rows) into {table}: {str(e)}")
+                    failed_chunks.append({"chunk": index, "rows": chunk, "error": str(e)})
+        finally:
+            self.cache.invalidate(table)
+
+        if failed_chunks:
+            raise BulkInsertError(table, inserted, failed_chunks)
+        return inserted
+
+    async def _fetch_record(self, table: str, id_field: str, id_value: str,
+                            columns: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        return await self._fetch_one(table, {id_field: id_value}, columns)
+
+    async def _fetch_records(self, table: str, filters: Optional[Dict[str, Any]],
+                             order_by: Optional[str], limit: Optional[int],
+                             columns: Optional[List[str]]) -> List[Dict[str, Any]]:
+        try:
+            args: List[Any] = []
+            sql = f"select {self._select_list(columns)} from {quote_ident(table)}"
+            sql += build_where(filters, args) + self._order_clause(order_by)
+            if limit:
+                args.append(limit)
+                sql += f" limit ${len(args)}"
+            return await self._fetch_rows(sql, args, table, "select", filters)
+        except Exception as e:
+            logger.error(f"Error getting records from {table}: {str(e)}")
+            raise
+
+    async def _fetch_one(self, table: str, filters: Dict[str, Any],
+                         columns: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        try:
+            args: List[Any] = []
+            sql = f"select {self._select_list(columns)} from {quote_ident(table)}{build_where(filters, args)} limit 1"
+            record = await self._run("fetchrow", sql, args, table, "select", filters)
+            return dict(record) if record is not None else None
+        except Exception as e:
+            logger.error(f"Error finding record in {table}: {str(e)}")
+            raise
+
+    async def iter_records(self, table: str, filters: Optional[Dict[str, Any]] = None,
+                           order_by: Optional[str] = None, page_size: int = 1000,
+                           columns: Optional[List[str]] = None,
+                           key_field: str = "id") -> AsyncIterator[Dict[str, Any]]:
+        """Stream every matching record using keyset pagination on (order_by, key_field)"""
+        order_field = (order_by or key_field).lstrip("-")
+        descending = bool(order_by and order_by.startswith("-"))
+        if columns:
+            columns = list(dict.fromkeys([*columns, order_field, key_field]))
+
+        # NULLs rank above every value, as in the PostgREST backend
+        direction = " desc nulls first" if descending else " asc nulls last"
+        sort_columns = list(dict.fromkeys([order_field, key_field]))
+        order_clause = " order by " + ", ".join(f"{quote_ident(column)}{direction}" for column in sort_columns)
+
+        cursor: Optional[Dict[str, Any]] = None
+        while True:
+            try:
+                args: List[Any] = []
+                where = build_where(filters, args)
+                if cursor is not None:
+                    keyset = self._after_cursor_sql(cursor, order_field, key_field, descending, args)
+                    where += (" and " if where else " where ") + keyset
+                args.append(page_size)
+                sql = (
+                    f"select {self._select_list(columns)} from {quote_ident(table)}"
+                    f"{where}{order_clause} limit ${len(args)}"
+                )
+                rows = await self._fetch_rows(sql, args, table, "select", filters)
+            except Exception as e:
+                logger.error(f"Error iterating records from {table}: {str(e)}")
+                raise
+
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            cursor = rows[-1]
+
+    @staticmethod
+    def _after_cursor_sql(cursor: Dict[str, Any], order_field: str, key_field: str,
+                          descending: bool, args: List[Any]) -> str:
+        """Condition for rows strictly after ``cursor``; NULL ordering values rank above every value"""
+        op = "<" if descending else ">"
+        key = quote_ident(key_field)
+        args.append(cursor[key_field])
+        key_param = f"${len(args)}"
+        if order_field == key_field:
+            return f"{key} {op} {key_param}"
+
+        column = quote_ident(order_field)
+        if cursor[order_field] is None:
+            if descending:
+                # NULLs came first: finish the NULL group, then every non-NULL row
+                return f"(({column} is null and {key} < {key_param}) or {column} is not null)"
+            # NULLs come last: only the rest of the NULL group is left
+            return f"({column} is null and {key} > {key_param})"
+
+        args.append(cursor[order_field])
+        # A row comparison against a NULL column is NULL, so the NULL group needs its own branch
+        condition = f"({column}, {key}) {op} (${len(args)}, {key_param})"
+        return condition if descending else f"({condition} or {column} is null)"
+
+    async def update_record(self, table: str, id_field: str, id_value: str,
+                          data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a record by ID"""
+        try:
+            processed_data = self._process_data_for_update(data)
+            if not processed_data:
+                return await self._fetch_record(table, id_field, id_value, None)
+            args = list(processed_data.values())
+            assignments = ", ".join(
+                f"{quote_ident(column)} = ${position}"
+                for position, column in enumerate(processed_data, start=1)
+            )
+            args.append(id_value)
+            sql = (
+                f"update {quote_ident(table)} set {assignments} "
+                f"where {quote_ident(id_field)} = ${len(args)} returning *"
+            )
+            rows = await self._fetch_rows(sql, args, table, "update", {id_field: id_value})
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error updating record in {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def delete_record(self, table: str, id_field: str, id_value: str) -> bool:
+        """Delete a record by ID"""
+        try:
+            sql = f"delete from {quote_ident(table)} where {quote_ident(id_field)} = $1"
+            await self._run("execute", sql, [id_value], table, "delete", {id_field: id_value})
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting record from {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def increment(self, table: str, id_value: Any, field: str, delta: int = 1,
+                        id_field: str = "id", invalidate: bool = True,
+                        touch: Optional[str] = None) -> Optional[int]:
+        """Atomically add ``delta`` to a numeric column (setting ``touch`` to now()); returns the new value or None"""
+        try:
+            column = quote_ident(field)
+            touched = f", {quote_ident(touch)} = now()" if touch else ""
+            sql = (
+                f"update {quote_ident(table)} set {column} = coalesce({column}, 0) + $1{touched} "
+                f"where {quote_ident(id_field)} = $2 returning {column}"
+            )
+            return await self._run("fetchval", sql, [delta, id_value], table, "increment", {id_field: id_value})
+        except Exception as e:
+            logger.error(f"Error incrementing {field} in {table}: {str(e)}")
+            raise
+        finally:
+            if invalidate:
+                self.cache.invalidate(table)
+
+    async def increment_many(self, table: str, field: str, deltas: Dict[Any, int],
+                             id_field: str = "id", invalidate: bool = True) -> int:
+        """Apply many counter increments ({id: delta}) in one statement via increment_counters"""
+        if not deltas:
+            return 0
+        try:
+            payload = {str(id_value): delta for id_value, delta in deltas.items()}
+            return await self._run(
+                "fetchval", "select public.increment_counters($1, $2, $3, $4)",
+                [table, id_field, field, payload], table, "increment"
+            )
+        except Exception as e:
+            logger.error(f"Error incrementing {field} for {len(deltas)} rows in {table}: {str(e)}")
+            raise
+        finally:
+            if invalidate:
+                self.cache.invalidate(table)
+
+    async def upsert(self, table: str, row: Dict[str, Any], on_conflict: str,
+                     additive: Optional[List[str]] = None,
+                     insert_only: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """INSERT ... ON CONFLICT with the same additive/insert_only semantics as upsert_record"""
+        insert_only = ["id", "created_at"] if insert_only is None else insert_only
+        conflict_columns = [column.strip() for column in on_conflict.split(",")]
+        try:
+            processed_data = self._process_data_for_insert(row)
+            args: List[Any] = []
+            sql = self._insert_sql(table, [processed_data], args)
+            sql = sql[:-len(" returning *")]
+
+            assignments = []
+            for column in processed_data:
+                if column in conflict_columns or column in insert_only:
+                    continue
+                target = quote_ident(column)
+                if column in (additive or []):
+                    assignments.append(f"{target} = coalesce({quote_ident(table)}.{target}, 0) + excluded.{target}")
+                else:
+                    assignments.append(f"{target} = excluded.{target}")
+
+            conflict_target = ", ".join(quote_ident(column) for column in conflict_columns)
+            if assignments:
+                sql += f" on conflict ({conflict_target}) do update set {', '.join(assignments)} returning *"
+                rows = await self._fetch_rows(sql, args, table, "upsert")
+                return rows[0] if rows else None
+
+            # Nothing to update: keep the stored row and return it
+            sql += f" on conflict ({conflict_target}) do nothing returning *"
+            rows = await self._fetch_rows(sql, args, table, "upsert")
+            if rows:
+                return rows[0]
+            return await self._fetch_one(
+                table, {column: processed_data.get(column) for column in conflict_columns}, None
+            )
+        except Exception as e:
+            logger.error(f"Error upserting record in {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def update_where(self, table: str, filters: Dict[str, Any], data: Dict[str, Any]) -> int:
+        """Update every record matching ``filters`` in one statement; returns the number of rows updated"""
+        if not filters:
+            raise ValueError("update_where requires at least one filter")
+        try:
+            processed_data = self._process_data_for_update(data)
+            args = list(processed_data.values())
+            assignments = ", ".join(
+                f"{quote_ident(column)} = ${position}"
+                for position, column in enumerate(processed_data, start=1)
+            )
+            sql = f"update {quote_ident(table)} set {assignments}{build_where(filters, args)}"
+            return self._status_count(await self._run("execute", sql, args, table, "update", filters))
+        except Exception as e:
+            logger.error(f"Error updating records in {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def delete_where(self, table: str, filters: Dict[str, Any]) -> int:
+        """Delete every record matching ``filters`` in one statement; returns the number of rows deleted"""
+        if not filters:
+            raise ValueError("delete_where requires at least one filter")
+        try:
+            args: List[Any] = []
+            sql = f"delete from {quote_ident(table)}{build_where(filters, args)}"
+            return self._status_count(await self._run("execute", sql, args, table, "delete", filters))
+        except Exception as e:
+            logger.error(f"Error deleting records from {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def count_records(self, table: str, filters: Optional[Dict[str, Any]] = None,
+                            count: str = "exact") -> int:
+        """Count records with the same modes as SupabaseClient.count_records"""
+        if count not in COUNT_MODES:
+            raise ValueError(f"Unsupported count mode {count!r}, expected one of {COUNT_MODES}")
+        try:
+            args: List[Any] = []
+            where = build_where(filters, args)
+            if count != "exact":
+                plan = await self._run(
+                    "fetchval", f"explain (format json) select 1 from {quote_ident(table)}{where}",
+                    args, table, "count", filters
+                )
+                planned = int(plan[0]["Plan"]["Plan Rows"])
+                if count == "planned" or planned > ESTIMATED_COUNT_THRESHOLD:
+                    return planned
+            sql = f"select count(*) from {quote_ident(table)}{where}"
+            return await self._run("fetchval", sql, args, table, "count", filters)
+        except Exception as e:
+            logger.error(f"Error counting records in {table}: {str(e)}")
+            raise
+
+    async def aggregate(self, table: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run a MongoDB-style aggregation as a single GROUP BY (see SupabaseClient.aggregate)"""
+        try:
+            filters, group_id, group_fields, metrics = self._compile_pipeline(pipeline)
+            group_by = list(dict.fromkeys(group_fields.values()))
+            select_items = [quote_ident(column) for column in group_by]
+            for metric in metrics:
+                if metric["op"] == "count":
+                    select_items.append(f"count(*) as {quote_ident(metric['name'])}")
+                elif metric["op"] in AGGREGATE_FUNCTIONS:
+                    select_items.append(
+                        f"{metric['op']}({quote_ident(metric['field'])}) as {quote_ident(metric['name'])}"
+                    )
+            if not select_items:
+                raise ValueError("Aggregation needs at least one group column or metric")
+
+            args: List[Any] = []
+            sql = f"select {', '.join(select_items)} from {quote_ident(table)}{build_where(filters, args)}"
+            if group_by:
+                sql += " group by " + ", ".join(quote_ident(column) for column in group_by)
+            rows = await self._fetch_rows(sql, args, table, "aggregate", filters)
+            return self._group_rows(rows, group_id, group_fields, metrics)
+        except Exception as e:
+            logger.error(f"Error in aggregation for {table}: {str(e)}")
+            raise
+
+    async def execute_raw_sql(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Execute raw SQL; ``params`` maps $1, $2, ... in order of the dict"""
+        try:
+            return await self._fetch_rows(query, list((params or {}).values()), "", "sql")
+        except Exception as e:
+            logger.error(f"Error executing raw SQL: {str(e)}")
+            raise
+        finally:
+            # Raw SQL may touch any table
+            self.cache.clear()
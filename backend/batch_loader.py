@@ -0,0 +1,116 @@
+"""
+Request-scoped batching on top of the data client.
+
+A RecordLoader collects every ``load(key)`` made during the same event-loop
+tick and resolves them with a single ``{key_field: {"$in": keys}}`` query,
+turning N+1 lookup loops into one query. Loaders also memoize keys, so they
+are meant to live for a single request:
+
+    loader = db_client.loader("promocodes")
+    promocodes = await loader.load_many([usage["promocode_id"] for usage in usages])
+
+A ReadBatch takes unrelated reads (different tables, counts, lists) and runs
+them concurrently in one await.
+"""
+
+import asyncio
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class RecordLoader:
+    def __init__(self, client: Any, table: str, key_field: str = "id",
+                 columns: Optional[List[str]] = None, max_batch_size: int = 200):
+        self.client = client
+        self.table = table
+        self.key_field = key_field
+        self.columns = list(dict.fromkeys([*columns, key_field])) if columns else None
+        # Keeps the generated ``in.(...)`` filter well under URL length limits
+        self.max_batch_size = max_batch_size
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+
+    def load(self, key: Hashable) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """Return a future for the record with ``key`` (None if it does not exist)"""
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            # First key of this tick: dispatch once the current callbacks have queued theirs
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: List[Hashable]) -> List[Optional[Dict[str, Any]]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        for start in range(0, len(keys), self.max_batch_size):
+            asyncio.ensure_future(self._fetch(keys[start:start + self.max_batch_size]))
+
+    async def _fetch(self, keys: List[Hashable]) -> None:
+        try:
+            rows = await self.client.get_records(
+                self.table,
+                filters={self.key_field: {"$in": keys}},
+                columns=self.columns
+            )
+        except Exception as e:
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        rows_by_key = {row.get(self.key_field): row for row in rows}
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(rows_by_key.get(key))
+
+
+class ReadBatch:
+    """Independent reads submitted together and run concurrently.
+
+    Each ``add`` queues one read-method call on the client; ``run`` executes
+    them all at once over the client's connection pool and returns the results
+    in the order they were added, so the batch costs the slowest query rather
+    than the sum of all of them:
+
+        batch = db_client.batch()
+        batch.add("count_records", "courses")
+        batch.add("get_records", "test_results", filters={"user_id": user_id}, limit=20)
+        course_count, results = await batch.run()
+    """
+
+    READ_METHODS = {"get_record", "get_records", "find_one", "count_records", "aggregate"}
+
+    def __init__(self, client: Any):
+        self.client = client
+        self._calls: List[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = []
+
+    def add(self, method: str, *args: Any, **kwargs: Any) -> int:
+        """Queue ``client.<method>(*args, **kwargs)``; returns its position in the results"""
+        if method not in self.READ_METHODS:
+            raise ValueError(f"Only read methods can be batched, got {method!r}")
+        self._calls.append((method, args, kwargs))
+        return len(self._calls) - 1
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def run(self, return_exceptions: bool = False) -> List[Any]:
+        """Run every queued read concurrently.
+
+        With ``return_exceptions=True`` a failing read yields its exception in
+        place of a result instead of failing the whole batch.
+        """
+        calls, self._calls = self._calls, []
+        return list(await asyncio.gather(
+            *(getattr(self.client, method)(*args, **kwargs) for method, args, kwargs in calls),
+            return_exceptions=return_exceptions
+        ))
@@ -0,0 +1,172 @@
+"""
+Response serialization benchmark: FastAPI's default path vs the orjson fast path.
+
+For each large list endpoint this measures CPU time per request spent turning
+handler output into response bytes:
+
+    before   response_model validation + jsonable_encoder + stdlib json (JSONResponse)
+    orjson   fast_json([Model(**row) ...]) (per-row validation, orjson, no re-validation)
+    batched  fast_json(encode_rows(Model, rows)) (one TypeAdapter validation + dump_json)
+
+No database is needed; rows are generated to look like the real tables.
+
+    python backend/benchmarks/bench_responses.py [--rows 1000,5000,10000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models import Course, Lesson, QAQuestion
+from responses import encode_rows, fast_json
+
+
+def lesson_rows(count: int) -> List[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "course_id": str(uuid.uuid4()),
+            "title": f"Урок {i}",
+            "slug": f"urok-{i}",
+            "description": "Описание урока " * 5,
+            "content": "Текст урока. " * 150,
+            "lesson_type": "text",
+            "video_url": None,
+            "order": i,
+            "is_published": True,
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+            "updated_at": now.isoformat()
+        }
+        for i in range(count)
+    ]
+
+
+def course_rows(count: int) -> List[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Курс {i}",
+            "slug": None,  # computed by the model
+            "description": "Описание курса " * 10,
+            "level": "level_1",
+            "teacher_id": str(uuid.uuid4()),
+            "teacher_name": "Имам",
+            "status": "published",
+            "difficulty": "beginner",
+            "estimated_duration_hours": 10,
+            "order": i,
+            "created_at": (now - timedelta(days=i)).isoformat(),
+            "updated_at": now.isoformat()
+        }
+        for i in range(count)
+    ]
+
+
+def qa_rows(count: int) -> List[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Вопрос номер {i}",
+            "question_text": "Текст вопроса " * 20,
+            "answer_text": "Ответ имама " * 80,
+            "category": "ibadah",
+            "tags": ["намаз", "пост"],
+            "slug": f"vopros-{i}",
+            "is_featured": i % 10 == 0,
+            "views_count": i * 3,
+            "likes_count": i,
+            "imam_name": "Имам",
+            "related_questions": [],
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+            "updated_at": now.isoformat()
+        }
+        for i in range(count)
+    ]
+
+
+def table_data(count: int) -> Dict[str, Any]:
+    rows = qa_rows(count)
+    return {
+        "success": True,
+        "table_data": {"data": rows, "total": count, "page": 1, "limit": count},
+        "message": "Table data retrieved successfully"
+    }
+
+
+def default_path(response_type: Any) -> Callable[[Any], bytes]:
+    """What FastAPI does with a handler's return value when it is not a Response"""
+    field = create_response_field(name="response", type_=response_type, mode="serialization") if response_type else None
+    loop = asyncio.new_event_loop()
+
+    def render(content: Any) -> bytes:
+        if field is None:
+            encoded = jsonable_encoder(content)
+        else:
+            encoded = loop.run_until_complete(serialize_response(field=field, response_content=content))
+        return JSONResponse(encoded).body
+    return render
+
+
+def cpu_per_call(func: Callable[[], Any], repeat: int) -> float:
+    func()  # warm up
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="1000,5000,10000", help="comma separated row counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for count in (int(rows) for rows in args.rows.split(",")):
+        courses = course_rows(count)
+        lessons = lesson_rows(count)
+        questions = qa_rows(count)
+        table = table_data(count)
+
+        cases = [
+            ("/api/admin/courses", Course, courses),
+            ("/api/admin/lessons", Lesson, lessons),
+            ("/api/admin/qa/questions", QAQuestion, questions),
+            ("/api/admin/tables/{table}/data", None, table),
+        ]
+
+        print(f"\n{count} rows, {args.repeat} requests per case, CPU ms per request")
+        print(f"{'endpoint':34} {'before':>10} {'orjson':>10} {'batched':>10} {'speedup':>8} {'bytes':>10}")
+        for endpoint, model, rows in cases:
+            if model is None:
+                render = default_path(None)
+                before = cpu_per_call(lambda: render(rows), args.repeat)
+                after = cpu_per_call(lambda: fast_json(rows).body, args.repeat)
+                size = len(fast_json(rows).body)
+                print(f"{endpoint:34} {before * 1000:10.2f} {after * 1000:10.2f} {'-':>10} "
+                      f"{before / after:7.1f}x {size:10d}")
+                continue
+            render = default_path(List[model])
+            before = cpu_per_call(lambda: render([model(**row) for row in rows]), args.repeat)
+            per_row = cpu_per_call(lambda: fast_json([model(**row) for row in rows]).body, args.repeat)
+            batched = cpu_per_call(lambda: fast_json(encode_rows(model, rows)).body, args.repeat)
+            size = len(fast_json(encode_rows(model, rows)).body)
+            print(f"{endpoint:34} {before * 1000:10.2f} {per_row * 1000:10.2f} {batched * 1000:10.2f} "
+                  f"{before / batched:7.1f}x {size:10d}")
+
+
+if __name__ == "__main__":
+    main()
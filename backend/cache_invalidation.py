@@ -0,0 +1,241 @@
+"""
+Cross-worker cache invalidation from Postgres change events.
+
+Writes made through the data layer only invalidate the cache of the worker
+that made them. To keep every worker (and writes from the Supabase dashboard
+or SQL editor) coherent, each worker subscribes to a change feed for the
+catalog tables and evicts that table's cached reads on every INSERT, UPDATE
+or DELETE.
+
+Feeds:
+    RealtimeChangeFeed  Supabase Realtime ``postgres_changes`` over a websocket
+                        (tables must be in the supabase_realtime publication,
+                        see sql/004_realtime_catalog_tables.sql)
+    LocalChangeFeed     in-process stand-in; ``publish()`` delivers the same
+                        payload shape, for tests and local development
+
+Events missed while the websocket is down cannot be replayed, so every
+(re)subscription clears the watched tables once; the cache TTL bounds
+staleness in between.
+
+UPDATEs that only move a counter (``COUNTER_COLUMNS``: the buffered view
+counts, promocode activations) are ignored, so those writes keep their cached
+reads the way ``invalidate=False`` does in the writing worker. Telling them
+apart needs the old row, which Realtime only sends for tables with
+``REPLICA IDENTITY FULL`` (set by sql/004); an event without it invalidates.
+
+Configuration (environment variables):
+    SUPABASE_CACHE_INVALIDATION  - ``realtime`` (default), ``local`` or ``off``
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set
+from dotenv import load_dotenv
+from query_cache import QueryCache, query_cache
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Tables whose reads are cached and which are edited outside the API too
+CATALOG_TABLES = ("courses", "lessons", "tests", "qa_questions", "team_members", "promocodes")
+
+# Columns written by high-frequency counter updates, per table
+COUNTER_COLUMNS: Dict[str, Sequence[str]] = {
+    "qa_questions": ("views_count",),
+    "promocodes": ("used_count",),
+}
+# Timestamps a counter write may set alongside the counter (increment(touch=...))
+TOUCH_COLUMNS = ("updated_at",)
+
+ChangeCallback = Callable[[Dict[str, Any]], None]
+SubscribedCallback = Callable[[], None]
+
+
+def changed_columns(data: Dict[str, Any]) -> Optional[Set[str]]:
+    """Columns an UPDATE event changed, or None when it doesn't carry the full old row"""
+    record = data.get("record") or {}
+    old_record = data.get("old_record") or {}
+    if not record or not set(record) <= set(old_record):
+        return None
+    return {column for column, value in record.items() if old_record[column] != value}
+
+
+class LocalChangeFeed:
+    """In-process change feed with the Realtime payload shape"""
+
+    def __init__(self):
+        self._subscriptions: List[tuple] = []
+
+    async def subscribe(self, tables: Sequence[str], on_change: ChangeCallback,
+                        on_subscribed: Optional[SubscribedCallback] = None) -> None:
+        self._subscriptions.append((set(tables), on_change))
+        if on_subscribed:
+            on_subscribed()
+
+    def publish(self, table: str, event: str = "UPDATE", record: Optional[Dict[str, Any]] = None,
+                old_record: Optional[Dict[str, Any]] = None, schema: str = "public") -> int:
+        """Deliver a change to every subscriber watching ``table``; returns how many received it"""
+        payload = {
+            "data": {
+                "schema": schema,
+                "table": table,
+                "commit_timestamp": datetime.now(timezone.utc).isoformat(),
+                "type": event,
+                "errors": None,
+                "columns": [],
+                "record": record or {},
+                "old_record": old_record or {}
+            },
+            "ids": []
+        }
+        delivered = 0
+        for tables, on_change in list(self._subscriptions):
+            if table in tables:
+                on_change(payload)
+                delivered += 1
+        return delivered
+
+    async def close(self) -> None:
+        self._subscriptions.clear()
+
+
+class RealtimeChangeFeed:
+    """Supabase Realtime postgres_changes subscription for a set of tables"""
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None):
+        self.url = url or os.environ.get("SUPABASE_URL")
+        self.key = key or os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+        self._client = None
+
+    async def subscribe(self, tables: Sequence[str], on_change: ChangeCallback,
+                        on_subscribed: Optional[SubscribedCallback] = None) -> None:
+        if not self.url or not self.key:
+            raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set for realtime invalidation")
+        from realtime import AsyncRealtimeClient, RealtimeSubscribeStates
+
+        realtime_url = self.url.rstrip("/").replace("http", "ws", 1) + "/realtime/v1"
+        self._client = AsyncRealtimeClient(realtime_url, token=self.key, auto_reconnect=True)
+        await self._client.connect()
+
+        def on_status(state, error):
+            if state == RealtimeSubscribeStates.SUBSCRIBED:
+                logger.info(f"Realtime cache invalidation subscribed to {', '.join(tables)}")
+                if on_subscribed:
+                    on_subscribed()
+            elif error is not None:
+                logger.warning(f"Realtime cache invalidation channel {state}: {error}")
+
+        channel = self._client.channel("cache-invalidation")
+        for table in tables:
+            channel.on_postgres_changes("*", callback=on_change, table=table, schema="public")
+        await channel.subscribe(on_status)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class CacheInvalidator:
+    """Evicts cached reads for a table whenever the change feed reports a write to it"""
+
+    def __init__(self, feed: Any, tables: Sequence[str] = CATALOG_TABLES,
+                 cache: QueryCache = query_cache,
+                 counter_columns: Mapping[str, Sequence[str]] = COUNTER_COLUMNS):
+        self.feed = feed
+        self.tables = tuple(tables)
+        self.cache = cache
+        self.counter_columns = {
+            table: set(columns) | set(TOUCH_COLUMNS) for table, columns in counter_columns.items()
+        }
+        self.events = 0
+        self.counter_updates = 0  # counter-only UPDATEs that were ignored
+        self.resyncs = 0
+        self.last_event_at: Optional[str] = None
+        # Extra per-change hooks (e.g. snapshots derived from these tables)
+        self._listeners: List[ChangeCallback] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: ChangeCallback) -> None:
+        self._listeners.append(listener)
+
+    def is_counter_update(self, table: str, data: Dict[str, Any]) -> bool:
+        """True for an UPDATE that changed nothing but counter (and touch) columns"""
+        counters = self.counter_columns.get(table)
+        if not counters or data.get("type") != "UPDATE":
+            return False
+        changed = changed_columns(data)
+        return changed is not None and not changed - counters
+
+    def handle_change(self, payload: Dict[str, Any]) -> None:
+        data = payload.get("data") or {}
+        table = data.get("table")
+        if table not in self.tables:
+            return
+        self.events += 1
+        self.last_event_at = data.get("commit_timestamp")
+        if self.is_counter_update(table, data):
+            self.counter_updates += 1
+            return
+        self.cache.invalidate(table)
+        for listener in self._listeners:
+            try:
+                listener(payload)
+            except Exception as e:
+                logger.error(f"Error in change listener for {table}: {str(e)}")
+
+    def resync(self) -> None:
+        """Drop everything cached for the watched tables (after (re)subscribing)"""
+        self.resyncs += 1
+        for table in self.tables:
+            self.cache.invalidate(table)
+
+    async def _subscribe(self) -> None:
+        try:
+            await self.feed.subscribe(self.tables, self.handle_change, self.resync)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cache invalidation feed unavailable, relying on TTLs: {str(e)}")
+
+    def start(self) -> None:
+        """Subscribe in the background so an unreachable feed never delays startup"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._subscribe())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.feed.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "feed": type(self.feed).__name__,
+            "tables": list(self.tables),
+            "events": self.events,
+            "counter_updates": self.counter_updates,
+            "resyncs": self.resyncs,
+            "last_event_at": self.last_event_at
+        }
+
+
+def invalidator_from_env() -> Optional[CacheInvalidator]:
+    """Build the invalidator selected by SUPABASE_CACHE_INVALIDATION (None when off)"""
+    mode = os.environ.get("SUPABASE_CACHE_INVALIDATION", "realtime").lower()
+    if mode == "off":
+        return None
+    if mode == "local":
+        return CacheInvalidator(LocalChangeFeed())
+    if mode == "realtime":
+        return CacheInvalidator(RealtimeChangeFeed())
+    raise ValueError(f"Unknown SUPABASE_CACHE_INVALIDATION mode: {mode}")
@@ -0,0 +1,324 @@
+"""
+In-process snapshot of the course -> lesson -> test catalog.
+
+The public site reads the same small tree on almost every page and it only
+changes when an admin edits it. ``CatalogStore`` loads the three tables once,
+indexes them into an immutable ``CatalogSnapshot`` and serves the public
+catalog reads from it without touching the database. A rebuild constructs a
+complete new snapshot and then swaps the reference, so a request always sees
+one consistent version of the tree, never a half-built one.
+
+Rebuilds are triggered by admin writes in this worker (awaited, so the admin
+reads their own change), by change events from other workers or the
+dashboard (via ``CacheInvalidator.add_listener``), and by a timer as a safety
+net for missed events. Requests made while several rebuilds are requested
+collapse into one extra rebuild. A failed rebuild keeps the previous snapshot
+live; ``refresh()`` raises ``CatalogRefreshError`` so the writer knows its
+change isn't visible yet. Until the first build succeeds, or when the
+snapshot is disabled, every read falls through to the database.
+
+Rows inside a snapshot are shared between requests and must not be mutated.
+
+Configuration (environment variables):
+    CATALOG_SNAPSHOT                   - ``on`` (default) or ``off``
+    CATALOG_SNAPSHOT_REFRESH_INTERVAL  - seconds between safety-net rebuilds (default 300)
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from models import create_slug
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SNAPSHOT_TABLES = ("courses", "lessons", "tests")
+
+Row = Dict[str, Any]
+
+
+def _by_order(row: Row) -> Tuple[bool, Any]:
+    # Matches ORDER BY "order" (NULLs last)
+    order = row.get("order")
+    return (order is None, order if order is not None else 0)
+
+
+def _course_slug(course: Row) -> str:
+    # Same slug the Course model reports when the column is empty
+    return course.get("slug") or create_slug(course.get("title") or "")
+
+
+class CatalogRefreshError(Exception):
+    """Raised by refresh() when the rebuild that would include the caller's write failed"""
+
+
+class CatalogSnapshot:
+    """One immutable, fully indexed version of the catalog"""
+
+    __slots__ = ("courses", "published_courses", "courses_by_slug", "lessons",
+                 "published_lessons_by_course", "tests_by_lesson", "built_at", "build_seconds")
+
+    def __init__(self, courses: List[Row], lessons: List[Row], tests: List[Row],
+                 build_seconds: float = 0.0):
+        self.courses: Mapping[str, Row] = MappingProxyType({course["id"]: course for course in courses})
+        self.published_courses: Tuple[Row, ...] = tuple(sorted(
+            (course for course in courses if course.get("status") == "published"), key=_by_order
+        ))
+        # Reversed so the first course in display order wins a slug clash, like the frontend's find()
+        self.courses_by_slug: Mapping[str, Row] = MappingProxyType({
+            _course_slug(course): course for course in reversed(self.published_courses)
+        })
+        self.lessons: Mapping[str, Row] = MappingProxyType({lesson["id"]: lesson for lesson in lessons})
+
+        lessons_by_course: Dict[str, List[Row]] = {}
+        for lesson in lessons:
+            if lesson.get("is_published"):
+                lessons_by_course.setdefault(lesson.get("course_id"), []).append(lesson)
+        self.published_lessons_by_course: Mapping[str, Tuple[Row, ...]] = MappingProxyType({
+            course_id: tuple(sorted(rows, key=_by_order)) for course_id, rows in lessons_by_course.items()
+        })
+
+        tests_by_lesson: Dict[str, List[Row]] = {}
+        for test in tests:
+            tests_by_lesson.setdefault(test.get("lesson_id"), []).append(test)
+        self.tests_by_lesson: Mapping[str, Tuple[Row, ...]] = MappingProxyType({
+            lesson_id: tuple(rows) for lesson_id, rows in tests_by_lesson.items()
+        })
+
+        self.build_seconds = build_seconds
+        # Set last: once present the snapshot is sealed
+        self.built_at = time.time()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if hasattr(self, "built_at"):
+            raise AttributeError("CatalogSnapshot is immutable")
+        object.__setattr__(self, name, value)
+
+
+class CatalogStore:
+    """Serves catalog reads from the current snapshot, falling back to the database"""
+
+    def __init__(self, client: Any, refresh_interval: Optional[float] = None,
+                 enabled: Optional[bool] = None):
+        self.client = client
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(
+            os.environ.get("CATALOG_SNAPSHOT_REFRESH_INTERVAL", "300")
+        )
+        self.enabled = enabled if enabled is not None else (
+            os.environ.get("CATALOG_SNAPSHOT", "on").lower() != "off"
+        )
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._dirty = False
+        # Refresh requests made so far, and how many of them the live snapshot includes
+        self._requested = 0
+        self._built = 0
+        self._last_error: Optional[Exception] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._timer_task: Optional[asyncio.Task] = None
+        self.builds = 0
+        self.errors = 0
+        self.fallback_reads = 0  # reads served by the database (no snapshot)
+        # Called with the table names after every swap (caches derived from the snapshot)
+        self._listeners: List[Callable[[Sequence[str]], Any]] = []
+
+    def add_listener(self, listener: Callable[[Sequence[str]], Any]) -> None:
+        self._listeners.append(listener)
+
+    @property
+    def current(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    async def _load(self, table: str) -> List[Row]:
+        # iter_records bypasses the query cache, so a rebuild never sees reads older than its TTL
+        return [row async for row in self.client.iter_records(table)]
+
+    async def rebuild(self) -> CatalogSnapshot:
+        """Load the catalog tables and swap in a new snapshot"""
+        started = time.perf_counter()
+        courses, lessons, tests = await asyncio.gather(
+            *(self._load(table) for table in CATALOG_SNAPSHOT_TABLES)
+        )
+        snapshot = CatalogSnapshot(courses, lessons, tests, build_seconds=time.perf_counter() - started)
+        self._snapshot = snapshot
+        self.builds += 1
+        for listener in self._listeners:
+            try:
+                listener(CATALOG_SNAPSHOT_TABLES)
+            except Exception as e:
+                logger.error(f"Error in catalog snapshot listener: {str(e)}")
+        logger.info(
+            f"Catalog snapshot rebuilt: {len(courses)} courses, {len(lessons)} lessons, "
+            f"{len(tests)} tests in {snapshot.build_seconds * 1000:.1f} ms"
+        )
+        return snapshot
+
+    async def _drain(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            covers = self._requested
+            try:
+                await self.rebuild()
+            except Exception as e:
+                self.errors += 1
+                self._last_error = e
+                logger.error(f"Error rebuilding catalog snapshot, keeping the previous one: {str(e)}")
+            else:
+                self._built = covers
+
+    def request_refresh(self) -> Optional[asyncio.Task]:
+        """Schedule a rebuild; requests made while one is running share a single follow-up"""
+        if not self.enabled:
+            return None
+        self._requested += 1
+        self._dirty = True
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._drain())
+        return self._refresh_task
+
+    async def refresh(self, *tables: str) -> None:
+        """Rebuild and wait until a snapshot that includes every prior write is live.
+
+        ``tables`` names what the caller wrote; writes to tables outside the
+        snapshot don't rebuild it. Raises CatalogRefreshError when the rebuild
+        fails (the previous snapshot stays live and a later rebuild catches up).
+        """
+        if tables and not set(tables) & set(CATALOG_SNAPSHOT_TABLES):
+            return
+        task = self.request_refresh()
+        if task is None:
+            return
+        requested = self._requested
+        # A cancelled request must not cancel the rebuild other requests wait on
+        await asyncio.shield(task)
+        if self._built < requested:
+            raise CatalogRefreshError(
+                f"Catalog snapshot rebuild failed: {str(self._last_error)}"
+            ) from self._last_error
+
+    def handle_change(self, payload: Dict[str, Any]) -> None:
+        """CacheInvalidator listener: rebuild when another worker writes to the catalog"""
+        table = (payload.get("data") or {}).get("table")
+        if table in CATALOG_SNAPSHOT_TABLES:
+            self.request_refresh()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except CatalogRefreshError:
+                pass  # logged by _drain, the next tick retries
+
+    async def start(self) -> None:
+        """Build the first snapshot and start the refresh timer"""
+        if not self.enabled:
+            return
+        try:
+            await self.refresh()
+        except CatalogRefreshError:
+            pass  # reads fall back to the database until a rebuild succeeds
+        if self._timer_task is None and self.refresh_interval > 0:
+            self._timer_task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._timer_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._timer_task = None
+        self._refresh_task = None
+
+    # Catalog reads
+
+    async def published_courses(self) -> List[Row]:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return list(snapshot.published_courses)
+        self.fallback_reads += 1
+        return await self.client.get_records("courses", filters={"status": "published"}, order_by="order")
+
+    async def course(self, course_id: str) -> Optional[Row]:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot.courses.get(course_id)
+        self.fallback_reads += 1
+        return await self.client.get_record("courses", "id", course_id)
+
+    async def course_by_ref(self, ref: str) -> Optional[Row]:
+        """A course by id, or a published course by slug (the public URLs use slugs)"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot.courses.get(ref) or snapshot.courses_by_slug.get(ref)
+        course = await self.course(ref)
+        if course:
+            return course
+        for course in await self.published_courses():
+            if _course_slug(course) == ref:
+                return course
+        return None
+
+    async def course_lessons(self, course_id: str) -> List[Row]:
+        """Published lessons of a course in display order"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return list(snapshot.published_lessons_by_course.get(course_id, ()))
+        self.fallback_reads += 1
+        return await self.client.get_records(
+            "lessons", filters={"course_id": course_id, "is_published": True}, order_by="order"
+        )
+
+    async def lesson(self, lesson_id: str) -> Optional[Row]:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot.lessons.get(lesson_id)
+        self.fallback_reads += 1
+        return await self.client.get_record("lessons", "id", lesson_id)
+
+    async def lesson_tests(self, lesson_id: str) -> List[Row]:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return list(snapshot.tests_by_lesson.get(lesson_id, ()))
+        self.fallback_reads += 1
+        return await self.client.get_records("tests", filters={"lesson_id": lesson_id})
+
+    async def tests_for_lessons(self, lesson_ids: List[str]) -> List[Row]:
+        """Tests of several lessons, grouped in ``lesson_ids`` order"""
+        if not lesson_ids:
+            return []
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return [test for lesson_id in lesson_ids for test in snapshot.tests_by_lesson.get(lesson_id, ())]
+        self.fallback_reads += 1
+        tests = await self.client.get_records("tests", filters={"lesson_id": {"$in": lesson_ids}})
+        position = {lesson_id: i for i, lesson_id in enumerate(lesson_ids)}
+        return sorted(tests, key=lambda test: position.get(test.get("lesson_id"), len(position)))
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "builds": self.builds,
+            "errors": self.errors,
+            "last_error": str(self._last_error) if self._last_error else None,
+            "up_to_date": self._built >= self._requested,
+            "fallback_reads": self.fallback_reads,
+            "refresh_interval": self.refresh_interval,
+            "built_at": (
+                datetime.fromtimestamp(snapshot.built_at, timezone.utc).isoformat() if snapshot else None
+            ),
+            "age_seconds": round(time.time() - snapshot.built_at, 3) if snapshot else None,
+            "build_seconds": round(snapshot.build_seconds, 6) if snapshot else None,
+            "courses": len(snapshot.courses) if snapshot else 0,
+            "lessons": len(snapshot.lessons) if snapshot else 0,
+            "tests": sum(len(rows) for rows in snapshot.tests_by_lesson.values()) if snapshot else 0
+        }
@@ -0,0 +1,128 @@
+"""
+Write-behind buffer for high-frequency counters (view counts).
+
+Instead of one UPDATE per view, ``add()`` accumulates deltas in memory per
+(table, field, row) and a background task flushes them periodically with one
+``increment_many`` call per counter column. A list page of 20 questions
+therefore costs a single read; the views are written a few seconds later
+together with everyone else's.
+
+Counts still pending when the process stops are flushed on shutdown. If a
+flush fails the deltas are merged back and retried on the next flush, so a
+database hiccup delays view counts rather than losing them (a crash loses at
+most one interval).
+
+Configuration (environment variables):
+    VIEW_COUNTER_FLUSH_INTERVAL  - seconds between flushes (default 5)
+    VIEW_COUNTER_MAX_PENDING     - pending rows that trigger an early flush (default 1000)
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CounterKey = Tuple[str, str, str]  # (table, field, id_field)
+
+
+class CounterBuffer:
+    def __init__(self, client: Any, flush_interval: Optional[float] = None,
+                 max_pending: Optional[int] = None):
+        self.client = client
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.environ.get("VIEW_COUNTER_FLUSH_INTERVAL", "5")
+        )
+        self.max_pending = max_pending or int(os.environ.get("VIEW_COUNTER_MAX_PENDING", "1000"))
+        self._pending: Dict[CounterKey, Dict[Hashable, int]] = {}
+        self._pending_rows = 0
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # Early flush scheduled by add(); at most one is pending or running at a time
+        self._early_flush: Optional[asyncio.Task] = None
+        # Set when the last flush failed: retries wait for the timer instead of every add()
+        self._backing_off = False
+        self.increments = 0  # add() calls
+        self.flushes = 0     # increment_many calls made
+        self.rows_flushed = 0
+        self.errors = 0
+
+    def add(self, table: str, id_value: Hashable, field: str, delta: int = 1,
+            id_field: str = "id") -> None:
+        """Record ``delta`` for a row's counter; written on the next flush"""
+        counters = self._pending.setdefault((table, field, id_field), {})
+        if id_value not in counters:
+            self._pending_rows += 1
+        counters[id_value] = counters.get(id_value, 0) + delta
+        self.increments += 1
+        if self._pending_rows >= self.max_pending and not self._backing_off and not self._flush_lock.locked():
+            if self._early_flush is None or self._early_flush.done():
+                self._early_flush = asyncio.ensure_future(self.flush())
+
+    def _merge_back(self, key: CounterKey, deltas: Dict[Hashable, int]) -> None:
+        counters = self._pending.setdefault(key, {})
+        for id_value, delta in deltas.items():
+            if id_value not in counters:
+                self._pending_rows += 1
+            counters[id_value] = counters.get(id_value, 0) + delta
+
+    async def flush(self) -> int:
+        """Write every pending delta; returns the number of rows written"""
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            self._pending_rows = 0
+            self._backing_off = False
+            written = 0
+            for key, deltas in pending.items():
+                table, field, id_field = key
+                try:
+                    # Views don't need to evict cached reads
+                    await self.client.increment_many(table, field, deltas, id_field=id_field, invalidate=False)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error flushing {len(deltas)} {table}.{field} counters: {str(e)}")
+                    self._merge_back(key, deltas)
+                    self._backing_off = True
+                    continue
+                self.flushes += 1
+                written += len(deltas)
+            self.rows_flushed += written
+            return written
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error in counter flush loop: {str(e)}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_rows": self._pending_rows,
+            "increments": self.increments,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "errors": self.errors,
+            "flush_interval": self.flush_interval
+        }
@@ -0,0 +1,86 @@
+"""
+Bounded executor for blocking Supabase/PostgREST calls.
+
+supabase-py's ``Client`` is synchronous: calling ``.execute()`` inside an
+``async def`` blocks the event loop for the whole HTTP round-trip. Both data
+access wrappers hand their queries to ``db_executor`` instead, which runs them
+on a dedicated, size-limited thread pool and enforces a per-call timeout.
+Every executed query is also recorded in ``db_metrics.query_metrics``.
+
+Configuration (environment variables):
+    SUPABASE_POOL_SIZE      - number of worker threads / concurrent queries (default 16)
+    SUPABASE_QUERY_TIMEOUT  - default per-call timeout in seconds, 0 disables (default 15)
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, Tuple
+from dotenv import load_dotenv
+from db_metrics import query_metrics, payload_size
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a database call does not finish within its timeout"""
+
+
+def _execute_and_measure(query: Any) -> Tuple[Any, int]:
+    """Runs on a worker thread, so even the sampled payload estimate stays off the event loop"""
+    result = query.execute()
+    return result, payload_size(getattr(result, "data", None))
+
+
+class DBExecutor:
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_workers = max_workers or int(os.environ.get("SUPABASE_POOL_SIZE", "16"))
+        self.timeout = timeout if timeout is not None else float(os.environ.get("SUPABASE_QUERY_TIMEOUT", "15"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="supabase-db"
+            )
+            logger.info(f"DB executor started with {self.max_workers} workers, timeout {self.timeout}s")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """Run a blocking callable on the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), partial(func, *args))
+        call_timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(future, timeout=call_timeout or None)
+        except asyncio.TimeoutError:
+            raise QueryTimeoutError(f"Database call timed out after {call_timeout}s")
+
+    async def execute(self, query: Any, timeout: Optional[float] = None) -> Any:
+        """Execute a postgrest query builder (anything with ``.execute()``) and record its metrics"""
+        started = time.perf_counter()
+        try:
+            result, size = await self.run(_execute_and_measure, query, timeout=timeout)
+        except Exception as e:
+            query_metrics.observe_query(query, time.perf_counter() - started, error=e)
+            raise
+        query_metrics.observe_query(query, time.perf_counter() - started, result, payload_bytes=size)
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads; a later call to ``run`` starts a fresh pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+            logger.info("DB executor stopped")
+
+
+# Global instance shared by SupabaseClient and AdminSupabaseClient
+db_executor = DBExecutor()
@@ -0,0 +1,215 @@
+"""
+Per-query instrumentation for the data layer.
+
+Every query run through ``db_executor`` is recorded here, labelled by table,
+operation and filter shape (filtered columns and operators, never values).
+Latency, rows returned and payload bytes go into in-process histograms that
+``render_prometheus`` exposes in the Prometheus text format.
+"""
+
+import threading
+import orjson
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+BYTES_BUCKETS = (1024, 10240, 102400, 1048576, 10485760)
+
+# Rows encoded to estimate the payload of a list result
+PAYLOAD_SAMPLE_ROWS = 3
+
+# Query-string keys that shape the response rather than filter rows
+NON_FILTER_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+HTTP_OPERATIONS = {"GET": "select", "HEAD": "count", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class QuerySeries:
+    """All measurements for one (table, operation, filter shape) combination"""
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.rows = Histogram(ROWS_BUCKETS)
+        self.payload_bytes = Histogram(BYTES_BUCKETS)
+        self.errors = 0
+
+
+def describe_query(query: Any) -> Tuple[str, str, str]:
+    """Return (table, operation, filter_shape) for a postgrest query builder"""
+    request = getattr(query, "request", query)
+    path = urlparse(str(getattr(request, "path", ""))).path.rstrip("/")
+    method = str(getattr(request, "http_method", "")).upper()
+    segments = path.split("/")
+
+    if len(segments) >= 2 and segments[-2] == "rpc":
+        operation = f"rpc:{segments[-1]}"
+        body = getattr(request, "json", None) or {}
+        table = body.get("table_name", "") if isinstance(body, dict) else ""
+    else:
+        operation = HTTP_OPERATIONS.get(method, method.lower())
+        table = segments[-1] if segments else ""
+
+    shape = []
+    params = getattr(request, "params", None)
+    if params is not None:
+        items = params.multi_items() if hasattr(params, "multi_items") else params.items()
+        for key, value in items:
+            if key in NON_FILTER_PARAMS:
+                continue
+            operator = str(value).split(".", 1)[0] if key not in ("or", "and") else "tree"
+            shape.append(f"{key}={operator}")
+    return table, operation, ",".join(sorted(shape))
+
+
+def _json_default(value: Any) -> Any:
+    # asyncpg Records are mappings; anything else (Decimal, ...) is sized as its string
+    if hasattr(value, "items"):
+        return dict(value.items())
+    return str(value)
+
+
+def _encoded_size(value: Any) -> int:
+    return len(orjson.dumps(value, default=_json_default))
+
+
+def payload_size(data: Any) -> int:
+    """Estimated response size in bytes (the JSON the API returned).
+
+    Lists are sized from a few rows spread across the result times the row
+    count, so metrics never re-encode a whole result on the query path.
+    """
+    if data is None:
+        return 0
+    if not isinstance(data, list):
+        return _encoded_size(data)
+    if not data:
+        return 2
+    step = max(1, len(data) // PAYLOAD_SAMPLE_ROWS)
+    sample = data[::step][:PAYLOAD_SAMPLE_ROWS]
+    sampled = sum(_encoded_size(row) for row in sample)
+    # Brackets and separating commas on top of the rows themselves
+    return sampled * len(data) // len(sample) + len(data) + 1
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def format_metrics(name: str, metric_type: str, help_text: str,
+                   samples: List[Tuple[Dict[str, Any], float]]) -> List[str]:
+    """Prometheus text lines for a counter/gauge family"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+class QueryMetrics:
+    def __init__(self):
+        self._series: Dict[Tuple[str, str, str], QuerySeries] = {}
+        # Queries are recorded from the event loop, rendering may happen anywhere
+        self._lock = threading.Lock()
+
+    def record(self, table: str, operation: str, filter_shape: str, latency: float,
+               rows: int = 0, payload_bytes: int = 0, error: bool = False) -> None:
+        key = (table, operation, filter_shape)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = QuerySeries()
+            series.latency.observe(latency)
+            if error:
+                series.errors += 1
+            else:
+                series.rows.observe(rows)
+                series.payload_bytes.observe(payload_bytes)
+
+    def observe_query(self, query: Any, latency: float, result: Any = None,
+                      payload_bytes: int = 0, error: Optional[BaseException] = None) -> None:
+        """Record one executed postgrest query and its APIResponse"""
+        table, operation, filter_shape = describe_query(query)
+        data = getattr(result, "data", None)
+        rows = len(data) if isinstance(data, list) else int(data is not None)
+        self.record(
+            table, operation, filter_shape, latency,
+            rows=rows, payload_bytes=payload_bytes, error=error is not None
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def top_queries(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Query shapes ordered by total time spent, for quick inspection"""
+        with self._lock:
+            items = list(self._series.items())
+        items.sort(key=lambda item: item[1].latency.total, reverse=True)
+        return [
+            {
+                "table": table,
+                "operation": operation,
+                "filters": filter_shape,
+                "count": series.latency.count,
+                "errors": series.errors,
+                "total_seconds": round(series.latency.total, 6),
+                "avg_ms": round(series.latency.total / series.latency.count * 1000, 3) if series.latency.count else 0,
+                "avg_rows": round(series.rows.total / series.rows.count, 1) if series.rows.count else 0,
+                "total_bytes": int(series.payload_bytes.total)
+            }
+            for (table, operation, filter_shape), series in items[:limit]
+        ]
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            items = sorted(self._series.items())
+
+        lines: List[str] = []
+        histograms = (
+            ("db_query_duration_seconds", "Data layer query latency in seconds", "latency"),
+            ("db_query_rows", "Rows returned per data layer query", "rows"),
+            ("db_query_payload_bytes", "Approximate response payload per data layer query", "payload_bytes"),
+        )
+        for name, help_text, attribute in histograms:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (table, operation, filter_shape), series in items:
+                histogram: Histogram = getattr(series, attribute)
+                labels = {"table": table, "operation": operation, "filters": filter_shape}
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.total}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+        lines.extend(format_metrics(
+            "db_query_errors_total", "counter", "Data layer queries that raised",
+            [
+                ({"table": table, "operation": operation, "filters": filter_shape}, series.errors)
+                for (table, operation, filter_shape), series in items
+            ]
+        ))
+        return "\n".join(lines) + "\n"
+
+
+# Global instance fed by db_executor
+query_metrics = QueryMetrics()
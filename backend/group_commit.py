@@ -0,0 +1,151 @@
+"""
+Group commit for hot insert paths.
+
+Concurrent ``insert(row)`` calls are collected for a few milliseconds (or
+until ``max_rows`` are waiting) and written with one multi-row INSERT. Every
+caller awaits its own row: ``insert`` returns only after the statement that
+contains it has committed, and raises if that row could not be written, so
+durability is the same as a direct ``create_record``. If the batch fails as a
+whole, its rows are retried one by one so a single bad row only fails its
+own caller.
+
+A failed batch may still have committed (a timeout after the server finished
+the INSERT), so retries must not write a row twice. Every row carries its
+``key_field`` (rows without one get a uuid4 on ``insert``); after a failure
+the rows that are already stored are looked up by key and returned as they
+are, and only the rest are retried. A retry that conflicts on its own key is
+resolved the same way.
+
+Configuration (environment variables):
+    GROUP_COMMIT_DELAY_MS  - how long the first row waits for company (default 5)
+    GROUP_COMMIT_MAX_ROWS  - rows that trigger an immediate write (default 100)
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitWriter:
+    def __init__(self, client: Any, table: str, delay: Optional[float] = None,
+                 max_rows: Optional[int] = None, key_field: str = "id"):
+        self.client = client
+        self.table = table
+        self.delay = delay if delay is not None else float(os.environ.get("GROUP_COMMIT_DELAY_MS", "5")) / 1000
+        self.max_rows = max_rows or int(os.environ.get("GROUP_COMMIT_MAX_ROWS", "100"))
+        self.key_field = key_field
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set = set()
+        self.rows = 0
+        self.batches = 0
+        self.fallbacks = 0  # batches retried row by row
+        self.recovered_rows = 0  # rows of a failed batch found already stored
+        self.failed_rows = 0
+
+    async def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert ``row`` as part of the next group commit and return the stored record"""
+        if self.key_field not in row:
+            # A known key lets a failed batch be checked for rows that did commit
+            row = {**row, self.key_field: str(uuid.uuid4())}
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_rows:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        rows = [row for row, _ in batch]
+        self.batches += 1
+        self.rows += len(rows)
+        try:
+            inserted = await self.client.create_records(self.table, rows, chunk_size=len(rows))
+        except Exception as e:
+            logger.warning(f"Group commit of {len(rows)} rows into {self.table} failed, retrying individually: {str(e)}")
+            self.fallbacks += 1
+            await self._write_individually(batch)
+            return
+
+        by_key = {record.get(self.key_field): record for record in inserted}
+        results = [by_key.get(row[self.key_field]) for row in rows]
+        for (row, future), record in zip(batch, results):
+            if future.done():
+                continue
+            if record is None:
+                self.failed_rows += 1
+                future.set_exception(Exception(f"Row was not returned by the insert into {self.table}"))
+            else:
+                future.set_result(record)
+
+    async def _stored(self, keys: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Rows with these keys that are already in the table (empty if the lookup fails)"""
+        try:
+            records = await self.client.get_records(self.table, {self.key_field: {"$in": keys}})
+        except Exception as e:
+            logger.warning(f"Could not check {len(keys)} {self.table} rows after a failed group commit: {str(e)}")
+            return {}
+        return {record.get(self.key_field): record for record in records}
+
+    async def _write_individually(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        stored = await self._stored([row[self.key_field] for row, _ in batch])
+
+        async def write_one(row: Dict[str, Any], future: asyncio.Future) -> None:
+            record = stored.get(row[self.key_field])
+            if record is not None:
+                # The failed batch committed this row after all
+                self.recovered_rows += 1
+            else:
+                try:
+                    record = await self.client.create_record(self.table, row)
+                except Exception as e:
+                    # A conflict on the row's own key means an earlier attempt stored it
+                    record = (await self._stored([row[self.key_field]])).get(row[self.key_field])
+                    if record is None:
+                        self.failed_rows += 1
+                        if not future.done():
+                            future.set_exception(e)
+                        return
+                    self.recovered_rows += 1
+            if not future.done():
+                future.set_result(record)
+
+        await asyncio.gather(*(write_one(row, future) for row, future in batch))
+
+    async def flush(self) -> None:
+        """Write whatever is waiting now and wait for every in-flight batch"""
+        self._dispatch()
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "rows": self.rows,
+            "batches": self.batches,
+            "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0,
+            "fallbacks": self.fallbacks,
+            "recovered_rows": self.recovered_rows,
+            "failed_rows": self.failed_rows,
+            "pending": len(self._pending)
+        }
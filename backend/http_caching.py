@@ -0,0 +1,125 @@
+"""
+HTTP validators (ETag / Last-Modified) and 304 handling for public reads.
+
+``conditional_json`` derives the validators from the rows behind a response:
+the ETag hashes every row's id and ``updated_at`` and Last-Modified is the
+newest ``updated_at``. Both are computed before anything is serialized, so a
+request whose ``If-None-Match`` (or ``If-Modified-Since``) still matches gets
+a bodyless 304 and the response models are never built. Responses that are
+not backed by rows with ``updated_at`` (aggregates, stats) are hashed from
+their serialized body instead, which still saves the transfer.
+
+sql/006_touch_updated_at.sql keeps ``updated_at`` current on every UPDATE to
+the cached tables, including writes that don't set it (the admin table
+editor, counter increments, dashboard edits), so any change to a row changes
+the validators.
+
+Cache-Control is set per route group; each default can be overridden with
+``CACHE_CONTROL_<GROUP>``, e.g. ``CACHE_CONTROL_COURSES="public, max-age=300"``.
+"""
+
+import os
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+from fastapi import Request, Response
+from responses import dumps, fast_json
+
+
+def cache_control(group: str, default: str) -> str:
+    """Cache-Control value for a route group, overridable per environment"""
+    return os.environ.get(f"CACHE_CONTROL_{group.upper()}", default)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is None:
+        # Timestamps are written as naive UTC (datetime.utcnow())
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def row_validators(rows: Iterable[Dict[str, Any]]) -> Tuple[str, Optional[datetime]]:
+    """(ETag, Last-Modified) for a list of rows, from their ids and updated_at"""
+    digest = hashlib.blake2b(digest_size=16)
+    last_modified: Optional[datetime] = None
+    count = 0
+    for row in rows:
+        count += 1
+        updated_at = row.get("updated_at") or row.get("created_at")
+        digest.update(f"{row.get('id')}\x1f{updated_at}\x1e".encode())
+        parsed = _parse_timestamp(updated_at)
+        if parsed is not None and (last_modified is None or parsed > last_modified):
+            last_modified = parsed
+    digest.update(str(count).encode())
+    return f'W/"{digest.hexdigest()}"', last_modified
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have second precision
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_json(request: Request, content: Union[Any, Callable[[], Any]],
+                     rows: Optional[Iterable[Dict[str, Any]]] = None,
+                     cache_control: str = "no-cache") -> Response:
+    """JSON response with validators; 304 when the client's copy is current.
+
+    ``content`` may be a callable so the response models are only built when
+    a body is actually sent. Pass the source ``rows`` to derive validators from
+    ``updated_at``; without them the serialized body is hashed.
+    """
+    headers = {"Cache-Control": cache_control}
+    if rows is not None:
+        etag, last_modified = row_validators(rows)
+        headers["ETag"] = etag
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+        if is_not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+        return fast_json(content() if callable(content) else content, headers=headers)
+
+    body = dumps(content() if callable(content) else content)
+    etag = body_etag(body)
+    headers["ETag"] = etag
+    if is_not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
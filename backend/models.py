@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -78,10 +78,12 @@ class Course(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
-    def __init__(self, **data):
-        super().__init__(**data)
+    # A validator rather than __init__, so list validation stays a single batched call
+    @model_validator(mode="after")
+    def _default_slug(self):
         if not self.slug:
             self.slug = create_slug(self.title)
+        return self
 
 class CourseCreate(BaseModel):
     title: str
@@ -125,6 +127,20 @@ class Lesson(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class LessonSummary(BaseModel):
+    """List-view projection of Lesson without the content body"""
+    id: str
+    course_id: str
+    title: str
+    slug: Optional[str] = None
+    description: Optional[str] = ""
+    lesson_type: LessonType = LessonType.TEXT
+    video_url: Optional[str] = None
+    order: int = 1
+    is_published: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
 class LessonCreate(BaseModel):
     course_id: str
     title: str
@@ -169,6 +185,21 @@ class SimpleTestUpdate(BaseModel):
     time_limit_minutes: Optional[int] = None
     is_published: Optional[bool] = None
 
+class TestSummary(BaseModel):
+    """List-view projection of SimpleTest without the questions"""
+    id: str
+    lesson_id: str
+    title: str
+    description: Optional[str] = ""
+    time_limit_minutes: int = 10
+    is_published: bool = True
+
+class CourseBundle(BaseModel):
+    """Everything a course page renders, in one response"""
+    course: Course
+    lessons: List[LessonSummary] = []
+    tests: List[TestSummary] = []
+
 class TestResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str  # ID пользователя (может быть email или другой идентификатор)
@@ -398,10 +429,12 @@ class QAQuestion(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
-    def __init__(self, **data):
-        super().__init__(**data)
+    # A validator rather than __init__, so list validation stays a single batched call
+    @model_validator(mode="after")
+    def _default_slug(self):
         if not self.slug:
             self.slug = create_slug(self.title)
+        return self
 
 class QAQuestionCreate(BaseModel):
     title: str
@@ -446,6 +479,15 @@ class TeamMember(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class TeamMemberSummary(BaseModel):
+    """List-view projection of TeamMember without image_base64 and bio"""
+    id: str
+    name: str
+    subject: str
+    image_url: Optional[str] = None
+    order: int = 1
+    is_active: bool = True
+
 class TeamMemberCreate(BaseModel):
     name: str
     subject: str
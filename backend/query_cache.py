@@ -0,0 +1,154 @@
+"""
+Read-through LRU + TTL cache for the data-access layer.
+
+Caching is opt-in per table. Each cached table has its own TTL and all tables
+share one bounded LRU, so memory stays capped no matter how many distinct
+queries are issued. Any write made through the data layer invalidates every
+cached entry for that table.
+
+Configuration (environment variables):
+    SUPABASE_CACHE_TABLES       - comma separated ``table:ttl_seconds`` pairs,
+                                  e.g. ``courses:60,lessons:60,team_members:300``
+                                  (empty disables caching)
+    SUPABASE_CACHE_MAX_ENTRIES  - maximum number of cached queries (default 1000)
+"""
+
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def parse_table_ttls(spec: str) -> Dict[str, float]:
+    """Parse ``table:ttl,table:ttl`` into a dict"""
+    ttls = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        table, _, ttl = item.partition(":")
+        try:
+            ttls[table.strip()] = float(ttl) if ttl else 60.0
+        except ValueError:
+            logger.warning(f"Ignoring invalid cache TTL for {table}: {ttl}")
+    return ttls
+
+
+class QueryCache:
+    def __init__(self, table_ttls: Optional[Dict[str, float]] = None, max_entries: int = 1000):
+        self.table_ttls: Dict[str, float] = dict(table_ttls or {})
+        self.max_entries = max_entries
+        # key -> (table, expires_at, value), ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[str, float, Any]]" = OrderedDict()
+        self._keys_by_table: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation so reads started before a write don't repopulate stale data
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # Called with the table name on every invalidation (derived caches follow this one)
+        self._listeners: List[Callable[[str], Any]] = []
+
+    @classmethod
+    def from_env(cls) -> "QueryCache":
+        return cls(
+            table_ttls=parse_table_ttls(os.environ.get("SUPABASE_CACHE_TABLES", "")),
+            max_entries=int(os.environ.get("SUPABASE_CACHE_MAX_ENTRIES", "1000"))
+        )
+
+    def is_cached(self, table: str) -> bool:
+        return table in self.table_ttls
+
+    def generation(self, table: str) -> int:
+        return self._generations.get(table, 0)
+
+    def get(self, table: str, key: str) -> Tuple[bool, Any]:
+        """Return ``(hit, value)`` for a cached query"""
+        if not self.is_cached(table):
+            return False, None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        _, expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def set(self, table: str, key: str, value: Any, generation: Optional[int] = None) -> None:
+        """Store a query result unless the table was written to since ``generation``"""
+        if not self.is_cached(table):
+            return
+        if generation is not None and generation != self.generation(table):
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (table, time.monotonic() + self.table_ttls[table], value)
+        self._keys_by_table.setdefault(table, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def add_listener(self, listener: Callable[[str], Any]) -> None:
+        self._listeners.append(listener)
+
+    def invalidate(self, table: str) -> int:
+        """Drop every cached query for ``table``; returns the number of entries removed"""
+        self._generations[table] = self.generation(table) + 1
+        keys = self._keys_by_table.pop(table, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        if keys:
+            self.invalidations += 1
+        for listener in self._listeners:
+            listener(table)
+        return len(keys)
+
+    def clear(self) -> None:
+        for table in set(self.table_ttls) | set(self._keys_by_table):
+            self.invalidate(table)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            table_keys = self._keys_by_table.get(entry[0])
+            if table_keys is not None:
+                table_keys.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "tables": self.table_ttls,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+
+# Global instance shared by SupabaseClient and AdminSupabaseClient
+query_cache = QueryCache.from_env()
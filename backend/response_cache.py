@@ -0,0 +1,255 @@
+"""
+Server-side cache of finished responses for the hottest public endpoints.
+
+Even when the rows come from the query cache or the catalog snapshot, every
+request still validates them through the response models and encodes JSON.
+``ResponseCache.serve`` keeps the final bytes instead, together with gzip and
+brotli variants and the ETag / Last-Modified validators, keyed by path and
+query string. A fresh hit is a dict lookup: pick the variant the client
+accepts (or answer 304) and write it.
+
+Entries are fresh for ``ttl`` seconds and then served stale for up to
+``stale_ttl`` more while a single background task rebuilds them, so no request
+waits on a rebuild unless the entry is missing or too old. Concurrent misses
+for the same key share one build. Writes drop the affected entries outright
+(``invalidate(table)``): after an edit the next request rebuilds rather than
+seeing stale data. A build that overlaps an invalidation is returned to its
+callers but not stored.
+
+Configuration (environment variables):
+    RESPONSE_CACHE                   - ``on`` (default) or ``off``
+    RESPONSE_CACHE_TTL               - seconds an entry is fresh (default 30)
+    RESPONSE_CACHE_STALE_TTL         - extra seconds it may be served stale (default 300)
+    RESPONSE_CACHE_MAX_ENTRIES       - LRU bound (default 256)
+    RESPONSE_CACHE_MIN_COMPRESS_SIZE - smallest body worth compressing in bytes (default 1024)
+"""
+
+import os
+import gzip
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import format_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence, Set, Tuple
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from responses import dumps
+from http_caching import body_etag, is_not_modified, row_validators
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# build() returns the response content and, optionally, the rows to derive validators from
+Builder = Callable[[], Awaitable[Tuple[Any, Optional[Iterable[Dict[str, Any]]]]]]
+
+
+class CachedResponse:
+    __slots__ = ("variants", "headers", "etag", "last_modified", "tables", "fresh_until", "stale_until")
+
+    def __init__(self, variants: Dict[str, bytes], headers: Dict[str, str], etag: str,
+                 last_modified: Optional[datetime], tables: Sequence[str],
+                 fresh_until: float, stale_until: float):
+        self.variants = variants  # content-coding ("identity", "gzip", "br") -> body
+        self.headers = headers
+        self.etag = etag
+        self.last_modified = last_modified
+        self.tables = tuple(tables)
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+def _accepted_encodings(header: Optional[str]) -> Set[str]:
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if coding and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+class ResponseCache:
+    def __init__(self, ttl: Optional[float] = None, stale_ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, min_compress_size: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get("RESPONSE_CACHE_TTL", "30"))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(
+            os.environ.get("RESPONSE_CACHE_STALE_TTL", "300")
+        )
+        self.max_entries = max_entries or int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+        self.min_compress_size = min_compress_size if min_compress_size is not None else int(
+            os.environ.get("RESPONSE_CACHE_MIN_COMPRESS_SIZE", "1024")
+        )
+        self.enabled = enabled if enabled is not None else (
+            os.environ.get("RESPONSE_CACHE", "on").lower() != "off"
+        )
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._keys_by_table: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation so builds started before a write aren't stored
+        self._generations: Dict[str, int] = {}
+        # key -> build in progress (a miss or a stale refresh), shared by everyone waiting on it
+        self._builds: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.builds = 0
+        self.build_errors = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        params = sorted(request.query_params.multi_items())
+        return request.url.path + ("?" + "&".join(f"{k}={v}" for k, v in params) if params else "")
+
+    def _compress(self, body: bytes) -> Dict[str, bytes]:
+        variants = {"identity": body}
+        if len(body) >= self.min_compress_size:
+            variants["gzip"] = gzip.compress(body, compresslevel=6)
+            if BROTLI_AVAILABLE:
+                variants["br"] = brotli.compress(body, quality=5)
+        return variants
+
+    async def _build(self, key: str, build: Builder, tables: Sequence[str],
+                     cache_control: str) -> CachedResponse:
+        generations = [self._generations.get(table, 0) for table in tables]
+        content, rows = await build()
+        body = dumps(content)
+        if rows is not None:
+            etag, last_modified = row_validators(rows)
+        else:
+            # Weak: the same validator is sent for every content-coding of the body
+            etag, last_modified = "W/" + body_etag(body), None
+        # Compression runs once per build, keep it off the event loop
+        variants = await asyncio.to_thread(self._compress, body)
+
+        headers = {"Cache-Control": cache_control, "ETag": etag, "Vary": "Accept-Encoding"}
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+        now = time.monotonic()
+        entry = CachedResponse(variants, headers, etag, last_modified, tables,
+                               now + self.ttl, now + self.ttl + self.stale_ttl)
+        self.builds += 1
+        if self.enabled and generations == [self._generations.get(table, 0) for table in tables]:
+            self._store(key, entry)
+        return entry
+
+    def _start_build(self, key: str, build: Builder, tables: Sequence[str],
+                     cache_control: str) -> asyncio.Task:
+        task = self._builds.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._build(key, build, tables, cache_control))
+            self._builds[key] = task
+            task.add_done_callback(lambda done: self._build_done(key, done))
+        return task
+
+    def _build_done(self, key: str, task: asyncio.Task) -> None:
+        if self._builds.get(key) is task:
+            del self._builds[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.build_errors += 1
+            logger.error(f"Error building cached response for {key}: {str(task.exception())}")
+
+    def _store(self, key: str, entry: CachedResponse) -> None:
+        self._remove(key)
+        self._entries[key] = entry
+        for table in entry.tables:
+            self._keys_by_table.setdefault(table, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for table in entry.tables:
+                table_keys = self._keys_by_table.get(table)
+                if table_keys is not None:
+                    table_keys.discard(key)
+
+    def invalidate(self, table: str) -> int:
+        """Drop every cached response built from ``table``; returns how many were removed"""
+        self._generations[table] = self._generations.get(table, 0) + 1
+        keys = self._keys_by_table.pop(table, set())
+        for key in keys:
+            self._remove(key)
+        if keys:
+            self.invalidations += 1
+        return len(keys)
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        return sum(self.invalidate(table) for table in tables)
+
+    def clear(self) -> None:
+        self.invalidate_tables(list(self._keys_by_table))
+
+    def _respond(self, request: Request, entry: CachedResponse) -> Response:
+        if is_not_modified(request, entry.etag, entry.last_modified):
+            self.not_modified += 1
+            return Response(status_code=304, headers=entry.headers)
+        accepted = _accepted_encodings(request.headers.get("accept-encoding"))
+        for coding in ("br", "gzip"):
+            if coding in accepted and coding in entry.variants:
+                return Response(
+                    entry.variants[coding], media_type="application/json",
+                    headers={**entry.headers, "Content-Encoding": coding}
+                )
+        return Response(entry.variants["identity"], media_type="application/json", headers=entry.headers)
+
+    async def serve(self, request: Request, build: Builder, tables: Sequence[str],
+                    cache_control: str = "no-cache") -> Response:
+        """Answer from the cached bytes, building them (once) when missing or expired"""
+        key = self.key_for(request)
+        if not self.enabled:
+            return self._respond(request, await self._build(key, build, tables, cache_control))
+
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now < entry.stale_until:
+            self._entries.move_to_end(key)
+            if now < entry.fresh_until:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._start_build(key, build, tables, cache_control)
+            return self._respond(request, entry)
+
+        self.misses += 1
+        # Shielded: one cancelled request must not cancel a build others are waiting on
+        entry = await asyncio.shield(self._start_build(key, build, tables, cache_control))
+        return self._respond(request, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "brotli": BROTLI_AVAILABLE,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "builds": self.builds,
+            "build_errors": self.build_errors,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "bytes": sum(len(body) for entry in self._entries.values() for body in entry.variants.values())
+        }
+
+
+response_cache = ResponseCache()
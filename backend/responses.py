@@ -0,0 +1,97 @@
+"""
+orjson-based JSON responses.
+
+``FastJSONResponse`` is the app's default response class. orjson serializes
+datetimes, UUIDs, enums and dataclasses natively and several times faster
+than the stdlib encoder.
+
+Handlers that return a ``response_model`` still go through FastAPI's
+validation and ``jsonable_encoder`` before the response class is involved.
+For large lists of rows that are already validated (or come straight from the
+database) ``fast_json`` skips both and serializes the content in one pass:
+
+    return fast_json([Lesson(**lesson) for lesson in lessons])
+
+Keep ``response_model`` on such routes for the OpenAPI schema; returning a
+Response instance bypasses it at runtime.
+
+Building ``[Lesson(**lesson) for lesson in lessons]`` still validates row by
+row in Python. For trusted database rows ``encode_rows`` validates the whole
+list in one ``TypeAdapter`` call and encodes it straight to JSON bytes with
+pydantic's serializer, so each row is validated exactly once:
+
+    return fast_json(encode_rows(Lesson, lessons))
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Type
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _orjson_default(value: Any) -> Any:
+    """Types orjson does not handle itself"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class RawJSON:
+    """JSON that is already encoded; dumps() and FastJSONResponse pass it through as is"""
+    __slots__ = ("body",)
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+
+def dumps(content: Any) -> bytes:
+    if isinstance(content, RawJSON):
+        return content.body
+    return orjson.dumps(content, default=_orjson_default, option=ORJSON_OPTIONS)
+
+
+# One adapter per model; building them is expensive, using them is not
+_list_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+
+
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    adapter = _list_adapters.get(model)
+    if adapter is None:
+        adapter = _list_adapters[model] = TypeAdapter(List[model])
+    return adapter
+
+
+def validate_rows(model: Type[BaseModel], rows: Iterable[Dict[str, Any]]) -> List[BaseModel]:
+    """Validate rows into ``model`` instances in one batched call"""
+    return list_adapter(model).validate_python(rows if isinstance(rows, list) else list(rows))
+
+
+def encode_rows(model: Type[BaseModel], rows: Iterable[Dict[str, Any]]) -> RawJSON:
+    """Validate trusted rows once and encode them as a JSON array of ``model``"""
+    adapter = list_adapter(model)
+    return RawJSON(adapter.dump_json(validate_rows(model, rows)))
+
+
+def encode_model(model: Type[BaseModel], data: Dict[str, Any]) -> RawJSON:
+    """Validate one (possibly nested) object once and encode it"""
+    return RawJSON(model.model_validate(data).model_dump_json().encode())
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json(content: Any, status_code: int = 200,
+              headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """Serialize validated models / plain rows directly, without jsonable_encoder"""
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
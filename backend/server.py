@@ -1,8 +1,9 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 from starlette.middleware.cors import CORSMiddleware
 import os
 import logging
@@ -26,13 +27,24 @@ from models import *
 
 # Import Supabase client
 try:
-    from supabase_client import supabase_client
+    from supabase_client import supabase_client, BulkInsertError
     SUPABASE_AVAILABLE = True
     print("✅ Supabase client доступен")
 except ImportError:
     SUPABASE_AVAILABLE = False
     print("❌ Supabase client недоступен")
 
+from db_executor import db_executor
+from supabase_connection import get_supabase, close_supabase
+from cache_invalidation import invalidator_from_env
+from counter_buffer import CounterBuffer
+from group_commit import GroupCommitWriter
+from catalog_snapshot import CATALOG_SNAPSHOT_TABLES, CatalogStore, CatalogRefreshError
+from db_metrics import query_metrics, format_metrics
+from responses import FastJSONResponse, fast_json, encode_rows, encode_model
+from http_caching import conditional_json, cache_control
+from response_cache import response_cache
+
 import shutil
 import aiofiles
 import json
@@ -58,8 +70,38 @@ load_dotenv(ROOT_DIR / '.env')
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared database connections once per worker and close them on shutdown"""
+    if DB_BACKEND == "asyncpg":
+        await db_client.connect()
+    else:
+        # Creating the Supabase client is blocking (imports and HTTP setup), keep it off the loop
+        await db_executor.run(get_supabase)
+    await startup_event()
+    await catalog.start()
+    if cache_invalidator:
+        cache_invalidator.add_listener(catalog.handle_change)
+        cache_invalidator.start()
+    view_counter.start()
+    try:
+        yield
+    finally:
+        if cache_invalidator:
+            await cache_invalidator.stop()
+        await catalog.stop()
+        # Flush pending writes while the database connections are still open
+        await test_results_writer.flush()
+        await view_counter.stop()
+        await shutdown_event()
+
 # Create the main app
-app = FastAPI(title="Уроки Ислама API", version="2.0.0")
+app = FastAPI(
+    title="Уроки Ислама API",
+    version="2.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
+)
 
 # Mount static files
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
@@ -74,13 +116,63 @@ SECRET_KEY = os.getenv("SECRET_KEY", "uroki-islama-secret-key-2024")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Database client selection
-if SUPABASE_AVAILABLE:
+# Column projections for list views: only what the UI renders, never lesson
+# content or team image blobs
+LESSON_SUMMARY_COLUMNS = list(LessonSummary.model_fields)
+TEAM_MEMBER_SUMMARY_COLUMNS = list(TeamMemberSummary.model_fields)
+
+# Cache-Control for public reads (override with CACHE_CONTROL_<GROUP>); clients
+# revalidate with ETag / If-Modified-Since after max-age and mostly get 304s
+COURSES_CACHE_CONTROL = cache_control("courses", "public, max-age=60")
+LESSONS_CACHE_CONTROL = cache_control("lessons", "public, max-age=300")
+TEAM_CACHE_CONTROL = cache_control("team", "public, max-age=300")
+QA_CACHE_CONTROL = cache_control("qa", "public, max-age=30")
+
+# Database client selection (DB_BACKEND=asyncpg talks to Postgres directly via DATABASE_URL)
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+if DB_BACKEND == "asyncpg":
+    from asyncpg_client import AsyncpgClient
+    db_client = AsyncpgClient()
+    print("🔗 Используется прямое подключение к Postgres (asyncpg)")
+elif SUPABASE_AVAILABLE:
     db_client = supabase_client
     print("🔗 Используется Supabase API")
 else:
     raise Exception("Supabase клиент не доступен!")
 
+# Public course/lesson/test reads are served from an in-memory snapshot
+catalog = CatalogStore(db_client)
+
+# Set on admin write responses whose change is saved but not yet in the public catalog
+CATALOG_STALE_HEADER = "X-Catalog-Stale"
+
+async def refresh_catalog(table: str, response: Response) -> None:
+    """Wait until an admin write to ``table`` is visible in the public catalog.
+
+    The write has already been committed, so a failed rebuild must not turn
+    into an error status (a client retrying a POST would create a duplicate):
+    the saved result is returned with ``X-Catalog-Stale`` set instead, and the
+    periodic rebuild catches up.
+    """
+    try:
+        await catalog.refresh(table)
+    except CatalogRefreshError as e:
+        logger.error(f"Write to {table} saved but the catalog snapshot is stale: {str(e)}")
+        response.headers[CATALOG_STALE_HEADER] = table
+
+# Cached response bytes are dropped whenever their tables are written or the snapshot is swapped
+db_client.cache.add_listener(response_cache.invalidate)
+catalog.add_listener(response_cache.invalidate_tables)
+
+# Evict cached catalog reads (and rebuild the snapshot) when any worker or the dashboard writes to them
+cache_invalidator = invalidator_from_env() if db_client.cache.table_ttls or catalog.enabled else None
+
+# Q&A view counts are buffered and written in batches
+view_counter = CounterBuffer(db_client)
+
+# Concurrent test submissions share multi-row inserts
+test_results_writer = GroupCommitWriter(db_client, "test_results")
+
 # Utility functions
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -286,18 +378,25 @@ async def get_current_admin_info(current_admin: dict = Depends(get_current_admin
 
 @api_router.get("/admin/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(current_admin: dict = Depends(get_current_admin)):
-    total_students = await db_client.count_records("students")
-    total_courses = await db_client.count_records("courses")
-    total_lessons = await db_client.count_records("lessons")
-    total_tests = await db_client.count_records("tests")
-    total_teachers = await db_client.count_records("teachers")
-    active_students = await db_client.count_records("students", {"is_active": True})
-    pending_applications = await db_client.count_records("applications", {"status": "pending"})
-    
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    completed_tests_today = await db_client.count_records("test_attempts", {
+    
+    # The counts are independent, so they run concurrently
+    batch = db_client.batch()
+    # students grows without bound; an estimate is enough for the dashboard
+    batch.add("count_records", "students", count="estimated")
+    batch.add("count_records", "courses")
+    batch.add("count_records", "lessons")
+    batch.add("count_records", "tests")
+    batch.add("count_records", "teachers")
+    batch.add("count_records", "students", {"is_active": True}, count="estimated")
+    batch.add("count_records", "applications", {"status": "pending"})
+    batch.add("count_records", "test_attempts", {
         "completed_at": {"$gte": today.isoformat()}
     })
+    (
+        total_students, total_courses, total_lessons, total_tests, total_teachers,
+        active_students, pending_applications, completed_tests_today
+    ) = await batch.run()
     
     return DashboardStats(
         total_students=total_students,
@@ -310,41 +409,104 @@ async def get_dashboard_stats(current_admin: dict = Depends(get_current_admin)):
         completed_tests_today=completed_tests_today
     )
 
+@api_router.get("/admin/cache/stats")
+async def get_cache_stats(current_admin: dict = Depends(get_current_admin)):
+    """Read cache and request coalescing counters for tuning"""
+    return {
+        "cache": db_client.cache.stats(),
+        "coalescing": db_client.read_flights.stats(),
+        "invalidation": cache_invalidator.stats() if cache_invalidator else None,
+        "view_counter": view_counter.stats(),
+        "test_results_writer": test_results_writer.stats(),
+        "catalog": catalog.stats(),
+        "responses": response_cache.stats()
+    }
+
+@api_router.get("/admin/metrics", response_class=PlainTextResponse)
+async def get_data_layer_metrics(current_admin: dict = Depends(get_current_admin)):
+    """Data layer query histograms and cache counters in Prometheus text format"""
+    cache_stats = db_client.cache.stats()
+    coalescing_stats = db_client.read_flights.stats()
+    lines = [query_metrics.render_prometheus().rstrip("\n")]
+    for name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        lines.extend(format_metrics(
+            f"db_cache_{name}_total", "counter", f"Query cache {name}", [({}, cache_stats[name])]
+        ))
+    lines.extend(format_metrics("db_cache_entries", "gauge", "Cached queries", [({}, cache_stats["entries"])]))
+    lines.extend(format_metrics(
+        "db_coalesced_reads_total", "counter", "Reads served by an identical in-flight query",
+        [({}, coalescing_stats["shared"])]
+    ))
+    response_stats = response_cache.stats()
+    for name in ("hits", "stale_hits", "misses", "not_modified", "builds", "build_errors"):
+        lines.extend(format_metrics(
+            f"response_cache_{name}_total", "counter", f"Response cache {name.replace('_', ' ')}",
+            [({}, response_stats[name])]
+        ))
+    lines.extend(format_metrics("response_cache_bytes", "gauge", "Cached response bytes", [({}, response_stats["bytes"])]))
+    catalog_stats = catalog.stats()
+    lines.extend(format_metrics(
+        "catalog_snapshot_builds_total", "counter", "Catalog snapshot rebuilds", [({}, catalog_stats["builds"])]
+    ))
+    lines.extend(format_metrics(
+        "catalog_snapshot_errors_total", "counter", "Failed catalog snapshot rebuilds", [({}, catalog_stats["errors"])]
+    ))
+    if catalog_stats["build_seconds"] is not None:
+        lines.extend(format_metrics(
+            "catalog_snapshot_build_seconds", "gauge", "Time taken to build the current catalog snapshot",
+            [({}, catalog_stats["build_seconds"])]
+        ))
+        lines.extend(format_metrics(
+            "catalog_snapshot_age_seconds", "gauge", "Age of the current catalog snapshot",
+            [({}, catalog_stats["age_seconds"])]
+        ))
+    return PlainTextResponse(
+        "\n".join(lines) + "\n",
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@api_router.get("/admin/metrics/top-queries")
+async def get_top_queries(limit: int = 20, current_admin: dict = Depends(get_current_admin)):
+    """Query shapes ordered by total time spent"""
+    return query_metrics.top_queries(limit)
+
 # ====================================================================
 # COURSE MANAGEMENT ENDPOINTS
 # ====================================================================
 
 @api_router.get("/courses", response_model=List[Course])
-async def get_public_courses():
+async def get_public_courses(request: Request):
     """Public endpoint for published courses"""
-    courses = await db_client.get_records(
-        "courses", 
-        filters={"status": "published"},
-        order_by="order"
-    )
-    return [Course(**course) for course in courses]
+    async def build():
+        courses = await catalog.published_courses()
+        return encode_rows(Course, courses), courses
+
+    return await response_cache.serve(request, build, ("courses",), cache_control=COURSES_CACHE_CONTROL)
 
 @api_router.get("/admin/courses", response_model=List[Course])
 async def get_admin_courses(current_admin: dict = Depends(get_current_admin)):
     courses = await db_client.get_records("courses", order_by="order")
-    return [Course(**course) for course in courses]
+    return fast_json(encode_rows(Course, courses))
 
 @api_router.get("/courses/{course_id}", response_model=Course)
-async def get_course(course_id: str):
-    course = await db_client.get_record("courses", "id", course_id)
+async def get_course(course_id: str, request: Request):
+    course = await catalog.course(course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
-    return Course(**course)
+    return conditional_json(
+        request, lambda: Course(**course), rows=[course], cache_control=COURSES_CACHE_CONTROL
+    )
 
 @api_router.post("/admin/courses", response_model=Course)
-async def create_course(course_data: CourseCreate, current_admin: dict = Depends(get_current_admin)):
+async def create_course(course_data: CourseCreate, response: Response, current_admin: dict = Depends(get_current_admin)):
     course_dict = course_data.dict()
     course_obj = Course(**course_dict)
     created_course = await db_client.create_record("courses", course_obj.dict())
+    await refresh_catalog("courses", response)
     return Course(**created_course)
 
 @api_router.put("/admin/courses/{course_id}", response_model=Course)
-async def update_course(course_id: str, course_data: CourseUpdate, current_admin: dict = Depends(get_current_admin)):
+async def update_course(course_id: str, course_data: CourseUpdate, response: Response, current_admin: dict = Depends(get_current_admin)):
     course = await db_client.get_record("courses", "id", course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
@@ -353,10 +515,11 @@ async def update_course(course_id: str, course_data: CourseUpdate, current_admin
     update_data["updated_at"] = datetime.utcnow().isoformat()
     
     updated_course = await db_client.update_record("courses", "id", course_id, update_data)
+    await refresh_catalog("courses", response)
     return Course(**updated_course)
 
 @api_router.delete("/admin/courses/{course_id}")
-async def delete_course(course_id: str, current_admin: dict = Depends(require_admin_role)):
+async def delete_course(course_id: str, response: Response, current_admin: dict = Depends(require_admin_role)):
     course = await db_client.get_record("courses", "id", course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
@@ -364,6 +527,7 @@ async def delete_course(course_id: str, current_admin: dict = Depends(require_ad
     success = await db_client.delete_record("courses", "id", course_id)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to delete course")
+    await refresh_catalog("courses", response)
     return {"message": "Course deleted successfully"}
 
 # ====================================================================
@@ -372,29 +536,86 @@ async def delete_course(course_id: str, current_admin: dict = Depends(require_ad
 # ====================================================================
 
 @api_router.get("/courses/{course_id}/lessons", response_model=List[Lesson])
-async def get_course_lessons(course_id: str):
+async def get_course_lessons(course_id: str, request: Request):
     """Get all published lessons for a course"""
+    lessons = await catalog.course_lessons(course_id)
+    return conditional_json(
+        request, lambda: encode_rows(Lesson, lessons),
+        rows=lessons, cache_control=LESSONS_CACHE_CONTROL
+    )
+
+@api_router.get("/courses/{course_id}/lessons/summary", response_model=List[LessonSummary])
+async def get_course_lessons_summary(course_id: str, request: Request):
+    """Get published lessons for a course without their content (list view)"""
     lessons = await db_client.get_records(
-        "lessons", 
+        "lessons",
         filters={"course_id": course_id, "is_published": True},
-        order_by="order"
+        order_by="order",
+        columns=LESSON_SUMMARY_COLUMNS
+    )
+    return conditional_json(
+        request, lambda: encode_rows(LessonSummary, lessons),
+        rows=lessons, cache_control=LESSONS_CACHE_CONTROL
     )
-    return [Lesson(**lesson) for lesson in lessons]
 
 @api_router.get("/lessons/{lesson_id}", response_model=Lesson)
-async def get_lesson(lesson_id: str):
+async def get_lesson(lesson_id: str, request: Request):
     """Get a specific lesson by ID"""
-    lesson = await db_client.get_record("lessons", "id", lesson_id)
+    lesson = await catalog.lesson(lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    return Lesson(**lesson)
+    return conditional_json(
+        request, lambda: Lesson(**lesson), rows=[lesson], cache_control=LESSONS_CACHE_CONTROL
+    )
+
+@api_router.get("/courses/{course_id}/bundle", response_model=CourseBundle)
+async def get_course_bundle(course_id: str, request: Request):
+    """Course, published lesson summaries and their tests in one response (course page).
+
+    ``course_id`` may also be the course slug used in the public URLs.
+    """
+    course = await catalog.course_by_ref(course_id)
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    # Keyed by the resolved id: the public URLs address courses by slug
+    lessons = await catalog.course_lessons(course["id"])
+    tests = await catalog.tests_for_lessons([lesson["id"] for lesson in lessons])
+
+    def build():
+        return encode_model(CourseBundle, {
+            "course": course,
+            "lessons": lessons,
+            "tests": [
+                {
+                    "id": test["id"],
+                    "lesson_id": test.get("lesson_id") or "",
+                    "title": test.get("title") or "",
+                    "description": test.get("description") or "",
+                    "time_limit_minutes": test.get("time_limit_minutes") or 10,
+                    "is_published": test.get("is_published", True)
+                }
+                for test in tests
+            ]
+        })
+
+    return conditional_json(
+        request, build, rows=[course, *lessons, *tests], cache_control=COURSES_CACHE_CONTROL
+    )
 
 # ADMIN ENDPOINTS
 @api_router.get("/admin/lessons", response_model=List[Lesson])
 async def get_all_lessons_admin(current_admin: dict = Depends(get_current_admin)):
     """Get all lessons for admin panel"""
     lessons = await db_client.get_records("lessons", order_by="-created_at")
-    return [Lesson(**lesson) for lesson in lessons]
+    return fast_json(encode_rows(Lesson, lessons))
+
+@api_router.get("/admin/lessons/summary", response_model=List[LessonSummary])
+async def get_all_lessons_summary_admin(current_admin: dict = Depends(get_current_admin)):
+    """Get all lessons without their content for admin lists and selectors"""
+    lessons = await db_client.get_records(
+        "lessons", order_by="-created_at", columns=LESSON_SUMMARY_COLUMNS
+    )
+    return fast_json(encode_rows(LessonSummary, lessons))
 
 @api_router.get("/admin/courses/{course_id}/lessons", response_model=List[Lesson])
 async def get_admin_course_lessons(course_id: str, current_admin: dict = Depends(get_current_admin)):
@@ -404,10 +625,10 @@ async def get_admin_course_lessons(course_id: str, current_admin: dict = Depends
         filters={"course_id": course_id},
         order_by="order"
     )
-    return [Lesson(**lesson) for lesson in lessons]
+    return fast_json(encode_rows(Lesson, lessons))
 
 @api_router.post("/admin/lessons", response_model=Lesson)
-async def create_lesson_admin(lesson_data: LessonCreate, current_admin: dict = Depends(get_current_admin)):
+async def create_lesson_admin(lesson_data: LessonCreate, response: Response, current_admin: dict = Depends(get_current_admin)):
     """Create a new lesson"""
     try:
         # Validate course exists
@@ -430,14 +651,17 @@ async def create_lesson_admin(lesson_data: LessonCreate, current_admin: dict = D
             lesson_dict["video_url"] = convert_to_embed_url(lesson_dict["video_url"])
         
         created_lesson = await db_client.create_record("lessons", lesson_dict)
+        await refresh_catalog("lessons", response)
         return Lesson(**created_lesson)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating lesson: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create lesson: {str(e)}")
 
 @api_router.put("/admin/lessons/{lesson_id}", response_model=Lesson)
-async def update_lesson_admin(lesson_id: str, lesson_data: LessonUpdate, current_admin: dict = Depends(get_current_admin)):
+async def update_lesson_admin(lesson_id: str, lesson_data: LessonUpdate, response: Response, current_admin: dict = Depends(get_current_admin)):
     """Update an existing lesson"""
     try:
         # Check lesson exists
@@ -456,22 +680,26 @@ async def update_lesson_admin(lesson_id: str, lesson_data: LessonUpdate, current
                 update_data["video_url"] = convert_to_embed_url(update_data["video_url"])
             
             updated_lesson = await db_client.update_record("lessons", "id", lesson_id, update_data)
+            await refresh_catalog("lessons", response)
             return Lesson(**updated_lesson)
         
         return Lesson(**lesson)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating lesson: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to update lesson: {str(e)}")
 
 @api_router.delete("/admin/lessons/{lesson_id}")
-async def delete_lesson_admin(lesson_id: str, current_admin: dict = Depends(get_current_admin)):
+async def delete_lesson_admin(lesson_id: str, response: Response, current_admin: dict = Depends(get_current_admin)):
     """Delete a lesson"""
     lesson = await db_client.get_record("lessons", "id", lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     
     await db_client.delete_record("lessons", "id", lesson_id)
+    await refresh_catalog("lessons", response)
     return {"message": "Lesson deleted successfully"}
 
 # ====================================================================
@@ -479,20 +707,38 @@ async def delete_lesson_admin(lesson_id: str, current_admin: dict = Depends(get_
 # ====================================================================
 
 @api_router.get("/team", response_model=List[TeamMember])
-async def get_team_members():
+async def get_team_members(request: Request):
     """Get all active team members for public page"""
+    async def build():
+        members = await db_client.get_records(
+            "team_members", 
+            filters={"is_active": True},
+            order_by="order"
+        )
+        return encode_rows(TeamMember, members), members
+
+    return await response_cache.serve(request, build, ("team_members",), cache_control=TEAM_CACHE_CONTROL)
+
+@api_router.get("/team/summary", response_model=List[TeamMemberSummary])
+async def get_team_members_summary(request: Request):
+    """Get active team members without image blobs (list view)"""
     members = await db_client.get_records(
-        "team_members", 
+        "team_members",
         filters={"is_active": True},
-        order_by="order"
+        order_by="order",
+        columns=TEAM_MEMBER_SUMMARY_COLUMNS
+    )
+    # The summary has no updated_at column, so hash the (small) body
+    return conditional_json(
+        request, lambda: encode_rows(TeamMemberSummary, members),
+        cache_control=TEAM_CACHE_CONTROL
     )
-    return [TeamMember(**member) for member in members]
 
 @api_router.get("/admin/team", response_model=List[TeamMember])
 async def get_admin_team_members(current_admin: dict = Depends(get_current_admin)):
     """Get all team members for admin"""
     members = await db_client.get_records("team_members", order_by="order")
-    return [TeamMember(**member) for member in members]
+    return fast_json(encode_rows(TeamMember, members))
 
 @api_router.post("/admin/team", response_model=TeamMember)
 async def create_team_member(member_data: TeamMemberCreate, current_admin: dict = Depends(get_current_admin)):
@@ -535,7 +781,7 @@ async def delete_team_member(member_id: str, current_admin: dict = Depends(requi
 async def get_admin_teachers(current_admin: dict = Depends(get_current_admin)):
     """Get all teachers for admin"""
     teachers = await db_client.get_records("teachers", order_by="name")
-    return [Teacher(**teacher) for teacher in teachers]
+    return fast_json(encode_rows(Teacher, teachers))
 
 @api_router.post("/admin/teachers", response_model=Teacher)
 async def create_teacher(teacher_data: TeacherCreate, current_admin: dict = Depends(get_current_admin)):
@@ -598,10 +844,10 @@ async def get_admin_tests(current_admin: dict = Depends(get_current_admin)):
                 "created_at": test.get("created_at"),
                 "updated_at": test.get("updated_at")
             }
-            converted_tests.append(SimpleTest(**converted_test))
+            converted_tests.append(converted_test)
         
         logger.info(f"Returning {len(converted_tests)} converted tests")
-        return converted_tests
+        return fast_json(encode_rows(SimpleTest, converted_tests))
         
     except Exception as e:
         logger.error(f"Error getting tests: {str(e)}")
@@ -614,7 +860,7 @@ async def get_lesson_test(lesson_id: str):
     """Get test for a specific lesson"""
     try:
         # Use the old tests table since that's what exists
-        tests = await db_client.get_records("tests", filters={"lesson_id": lesson_id})
+        tests = await catalog.lesson_tests(lesson_id)
         if tests:
             test = tests[0]
             converted_test = {
@@ -639,7 +885,7 @@ async def get_lesson_tests(lesson_id: str):
     """Get all tests for a specific lesson (returns list for compatibility)"""
     try:
         # Use the old tests table since that's what exists
-        tests = await db_client.get_records("tests", filters={"lesson_id": lesson_id})
+        tests = await catalog.lesson_tests(lesson_id)
         converted_tests = []
         
         for test in tests:
@@ -654,9 +900,9 @@ async def get_lesson_tests(lesson_id: str):
                 "created_at": test.get("created_at"),
                 "updated_at": test.get("updated_at")
             }
-            converted_tests.append(SimpleTest(**converted_test))
+            converted_tests.append(converted_test)
         
-        return converted_tests
+        return fast_json(encode_rows(SimpleTest, converted_tests))
         
     except Exception as e:
         logger.error(f"Error getting tests for lesson {lesson_id}: {str(e)}")
@@ -742,7 +988,7 @@ async def get_test_details(test_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to get test: {str(e)}")
 
 @api_router.post("/admin/tests", response_model=SimpleTest)
-async def create_test_admin(test_data: SimpleTestCreate, current_admin: dict = Depends(get_current_admin)):
+async def create_test_admin(test_data: SimpleTestCreate, response: Response, current_admin: dict = Depends(get_current_admin)):
     """Create new test for a lesson"""
     try:
         logger.info(f"Creating test with data: {test_data}")
@@ -783,46 +1029,54 @@ async def create_test_admin(test_data: SimpleTestCreate, current_admin: dict = D
         created_test = await db_client.create_record("tests", old_format_data)
         logger.info(f"Created test: {created_test}")
         
-        # Store questions in the new simple_test_questions table
+        # Store questions in the new simple_test_questions table (bulk insert)
         questions = test_dict.get("questions", [])
         if questions:
             logger.info(f"Will store {len(questions)} questions in simple_test_questions table")
+            question_records = []
             for i, question_data in enumerate(questions):
-                try:
-                    # New simplified structure
-                    question_record = {
+                options = question_data.get("options", [])
+                # New simplified structure
+                question_records.append({
+                    "id": str(uuid.uuid4()),
+                    "test_id": test_dict["id"],
+                    "question_text": question_data.get("question", ""),
+                    "option_a": options[0] if len(options) > 0 else "",
+                    "option_b": options[1] if len(options) > 1 else "",
+                    "option_c": options[2] if len(options) > 2 else "",
+                    "option_d": options[3] if len(options) > 3 else "",
+                    "correct_option": question_data.get("correct", 0),
+                    "order": i + 1
+                })
+            
+            failed_indexes = []
+            try:
+                await db_client.create_records("simple_test_questions", question_records)
+                logger.info(f"Created {len(question_records)} questions in simple_test_questions")
+            except BulkInsertError as e:
+                logger.warning(f"Could not create questions in simple_test_questions: {e}")
+                failed_indexes = [row["order"] - 1 for chunk in e.failed_chunks for row in chunk["rows"]]
+            
+            if failed_indexes:
+                # Fallback to old questions table with JSON storage
+                fallback_records = [
+                    {
                         "id": str(uuid.uuid4()),
                         "test_id": test_dict["id"],
-                        "question_text": question_data.get("question", ""),
-                        "option_a": question_data.get("options", ["", "", "", ""])[0] if len(question_data.get("options", [])) > 0 else "",
-                        "option_b": question_data.get("options", ["", "", "", ""])[1] if len(question_data.get("options", [])) > 1 else "",
-                        "option_c": question_data.get("options", ["", "", "", ""])[2] if len(question_data.get("options", [])) > 2 else "",
-                        "option_d": question_data.get("options", ["", "", "", ""])[3] if len(question_data.get("options", [])) > 3 else "",
-                        "correct_option": question_data.get("correct", 0),
+                        "text": questions[i].get("question", ""),
+                        "question_type": "single_choice",
+                        "correct_answer": str(questions[i].get("correct", 0)),
+                        "explanation": f"OPTIONS_JSON:{json.dumps(questions[i].get('options', []))}",  # Store options in explanation field as JSON
+                        "points": 1,
                         "order": i + 1
                     }
-                    await db_client.create_record("simple_test_questions", question_record)
-                    logger.info(f"Created question {i+1} in simple_test_questions")
-                except Exception as e:
-                    logger.warning(f"Could not create question in simple_test_questions: {e}")
-                    # Fallback to old questions table
-                    # Fallback to old questions table with JSON storage
-                    try:
-                        question_record = {
-                            "id": str(uuid.uuid4()),
-                            "test_id": test_dict["id"],
-                            "text": question_data.get("question", ""),
-                            "question_type": "single_choice",
-                            "correct_answer": str(question_data.get("correct", 0)),
-                            "explanation": f"OPTIONS_JSON:{json.dumps(question_data.get('options', []))}",  # Store options in explanation field as JSON
-                            "points": 1,
-                            "order": i + 1
-                        }
-                        await db_client.create_record("questions", question_record)
-                        logger.info(f"Created question {i+1} in fallback questions table with options in JSON")
-                    except Exception as e2:
-                        logger.error(f"Could not create question in any table: {e2}")
-                        break
+                    for i in failed_indexes
+                ]
+                try:
+                    await db_client.create_records("questions", fallback_records)
+                    logger.info(f"Created {len(fallback_records)} questions in fallback questions table with options in JSON")
+                except BulkInsertError as e2:
+                    logger.error(f"Could not create questions in any table: {e2}")
         
         # Return in SimpleTest format
         result = SimpleTest(**{
@@ -838,8 +1092,12 @@ async def create_test_admin(test_data: SimpleTestCreate, current_admin: dict = D
         })
         
         logger.info(f"Returning result: {result}")
+        # After the questions are stored: a stale snapshot must not cut the create short
+        await refresh_catalog("tests", response)
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating test: {str(e)}")
         import traceback
@@ -1000,7 +1258,7 @@ async def submit_test(
                 "completed_at": datetime.utcnow().isoformat()
             }
             
-            await db_client.create_record("test_results", result_data)
+            await test_results_writer.insert(result_data)
         except Exception as e:
             logger.warning(f"Could not save test result: {e}")
         
@@ -1038,38 +1296,25 @@ async def submit_test(
 async def update_user_score(user_id: str, user_name: str, points_earned: int):
     """Update user's total score"""
     try:
-        # Try to get existing user score (fallback if table doesn't exist)
-        existing_scores = []
-        try:
-            existing_scores = await db_client.get_records("user_scores", filters={"user_id": user_id})
-        except Exception as e:
-            logger.info(f"user_scores table not available, will try to create record: {e}")
-        
-        if existing_scores:
-            # Update existing score
-            user_score = existing_scores[0]
-            update_data = {
-                "total_points": user_score["total_points"] + points_earned,
-                "tests_completed": user_score["tests_completed"] + 1,
-                "last_test_date": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            await db_client.update_record("user_scores", "id", user_score["id"], update_data)
-            logger.info(f"Updated score for user {user_name}: +{points_earned} points")
-        else:
-            # Create new user score
-            score_data = {
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "user_name": user_name,
-                "total_points": points_earned,
-                "tests_completed": 1,
-                "last_test_date": datetime.utcnow().isoformat(),
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            await db_client.create_record("user_scores", score_data)
-            logger.info(f"Created new score record for user {user_name}: {points_earned} points")
+        # One idempotent upsert: creates the score row on the first test, otherwise
+        # adds the points and the completed test to the existing totals atomically
+        now = datetime.utcnow().isoformat()
+        score_data = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "user_name": user_name,
+            "total_points": points_earned,
+            "tests_completed": 1,
+            "last_test_date": now,
+            "created_at": now,
+            "updated_at": now
+        }
+        await db_client.upsert(
+            "user_scores", score_data,
+            on_conflict="user_id",
+            additive=["total_points", "tests_completed"]
+        )
+        logger.info(f"Updated score for user {user_name}: +{points_earned} points")
             
     except Exception as e:
         logger.error(f"Error updating user score: {str(e)}")
@@ -1122,50 +1367,50 @@ async def get_user_profile(user_id: str = None, user_email: str = None):
         if not user_id and not user_email:
             raise HTTPException(status_code=400, detail="user_id or user_email is required")
         
+        user_identifier = user_id or user_email
+        
+        # Calculate user rank from leaderboard
+        async def find_rank():
+            i = 0
+            async for leader in db_client.iter_records(
+                "user_scores", order_by="-total_points", columns=["user_id"]
+            ):
+                i += 1
+                if leader.get("user_id") == user_identifier:
+                    return i
+            return None
+        
+        # Score, test history and rank are independent: fetch them concurrently
+        batch = db_client.batch()
+        batch.add("get_records", "user_scores", filters={"user_id": user_identifier})
+        batch.add("get_records", "test_results", 
+            filters={"user_id": user_identifier}, 
+            order_by="-completed_at", 
+            limit=20
+        )
+        (user_scores, test_results), rank = await asyncio.gather(
+            batch.run(return_exceptions=True),
+            find_rank(),
+            return_exceptions=True
+        )
+        
         # Get user score data
         user_score = None
-        try:
-            if user_id:
-                user_scores = await db_client.get_records("user_scores", filters={"user_id": user_id})
-            else:
-                user_scores = await db_client.get_records("user_scores", filters={"user_id": user_email})
-            
-            if user_scores:
-                user_score = user_scores[0]
-        except Exception as e:
-            logger.info(f"user_scores table not available: {e}")
+        if isinstance(user_scores, Exception):
+            logger.info(f"user_scores table not available: {user_scores}")
+        elif user_scores:
+            user_score = user_scores[0]
         
         # Get test results history
         test_history = []
-        try:
-            if user_id:
-                test_results = await db_client.get_records("test_results", 
-                    filters={"user_id": user_id}, 
-                    order_by="-completed_at", 
-                    limit=20
-                )
-            else:
-                test_results = await db_client.get_records("test_results", 
-                    filters={"user_id": user_email}, 
-                    order_by="-completed_at", 
-                    limit=20
-                )
-            
+        if isinstance(test_results, Exception):
+            logger.info(f"test_results table not available: {test_results}")
+        else:
             test_history = test_results
-        except Exception as e:
-            logger.info(f"test_results table not available: {e}")
         
-        # Calculate user rank from leaderboard
-        rank = None
-        try:
-            leaderboard_data = await db_client.get_records("user_scores", order_by="-total_points")
-            user_identifier = user_id or user_email
-            for i, leader in enumerate(leaderboard_data, 1):
-                if leader.get("user_id") == user_identifier:
-                    rank = i
-                    break
-        except Exception as e:
-            logger.info(f"Could not calculate rank: {e}")
+        if isinstance(rank, Exception):
+            logger.info(f"Could not calculate rank: {rank}")
+            rank = None
         
         # Build profile response
         profile = {
@@ -1241,6 +1486,7 @@ async def upload_enhanced_file(
 
 @api_router.get("/qa/questions", response_model=List[QAQuestion])
 async def get_qa_questions(
+    request: Request,
     limit: int = 20,
     category: Optional[str] = None,
     search: Optional[str] = None
@@ -1259,86 +1505,80 @@ async def get_qa_questions(
         limit=limit
     )
     
-    # Increment view counts
+    # Increment view counts (written in the background by view_counter)
     for question in questions:
-        try:
-            await db_client.update_record(
-                "qa_questions", "id", question["id"],
-                {"views_count": question.get("views_count", 0) + 1}
-            )
-        except:
-            pass  # Don't fail if view count update fails
+        view_counter.add("qa_questions", question["id"], "views_count")
     
-    return [QAQuestion(**question) for question in questions]
+    return conditional_json(
+        request, lambda: encode_rows(QAQuestion, questions),
+        rows=questions, cache_control=QA_CACHE_CONTROL
+    )
 
 @api_router.get("/qa/questions/{question_id}", response_model=QAQuestion)
-async def get_qa_question(question_id: str):
+async def get_qa_question(question_id: str, request: Request):
     """Get single Q&A question by ID"""
     question = await db_client.get_record("qa_questions", "id", question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
     # Increment view count
-    try:
-        await db_client.update_record(
-            "qa_questions", "id", question_id,
-            {"views_count": question.get("views_count", 0) + 1}
-        )
-    except:
-        pass
+    view_counter.add("qa_questions", question_id, "views_count")
     
-    return QAQuestion(**question)
+    return conditional_json(
+        request, lambda: QAQuestion(**question), rows=[question], cache_control=QA_CACHE_CONTROL
+    )
 
 @api_router.get("/qa/questions/slug/{slug}", response_model=QAQuestion)
-async def get_qa_question_by_slug(slug: str):
+async def get_qa_question_by_slug(slug: str, request: Request):
     """Get Q&A question by slug"""
     question = await db_client.find_one("qa_questions", {"slug": slug})
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
     # Increment view count
-    try:
-        await db_client.update_record(
-            "qa_questions", "id", question["id"],
-            {"views_count": question.get("views_count", 0) + 1}
-        )
-    except:
-        pass
+    view_counter.add("qa_questions", question["id"], "views_count")
     
-    return QAQuestion(**question)
+    return conditional_json(
+        request, lambda: QAQuestion(**question), rows=[question], cache_control=QA_CACHE_CONTROL
+    )
 
 @api_router.get("/qa/categories")
-async def get_qa_categories():
+async def get_qa_categories(request: Request):
     """Get list of Q&A categories"""
     try:
-        # Get categories with question counts
-        questions = await db_client.get_records("qa_questions")
+        # Count questions per category with one GROUP BY in Postgres
+        rows = await db_client.aggregate("qa_questions", [
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+        ])
         categories = {}
         
-        for question in questions:
-            category = question.get("category", "general")
+        for row in rows:
+            category = row["_id"] or "general"
             if category not in categories:
                 categories[category] = {"name": category, "count": 0}
-            categories[category]["count"] += 1
+            categories[category]["count"] += row["count"]
         
-        return list(categories.values())
+        return conditional_json(request, list(categories.values()), cache_control=QA_CACHE_CONTROL)
     except Exception as e:
         logger.error(f"Error fetching Q&A categories: {e}")
         return []
 
 @api_router.get("/qa/featured", response_model=List[QAQuestion])
-async def get_featured_qa_questions(limit: int = 5):
+async def get_featured_qa_questions(request: Request, limit: int = 5):
     """Get featured Q&A questions"""
-    questions = await db_client.get_records(
-        "qa_questions",
-        filters={"is_featured": True},
-        order_by="-created_at",
-        limit=limit
-    )
-    return [QAQuestion(**question) for question in questions]
+    async def build():
+        questions = await db_client.get_records(
+            "qa_questions",
+            filters={"is_featured": True},
+            order_by="-created_at",
+            limit=limit
+        )
+        return encode_rows(QAQuestion, questions), questions
+
+    return await response_cache.serve(request, build, ("qa_questions",), cache_control=QA_CACHE_CONTROL)
 
 @api_router.get("/qa/popular", response_model=List[QAQuestion])
-async def get_popular_qa_questions(limit: int = 10):
+async def get_popular_qa_questions(request: Request, limit: int = 10):
     """Get most popular Q&A questions"""
     questions = await db_client.get_records(
         "qa_questions",
@@ -1346,10 +1586,13 @@ async def get_popular_qa_questions(limit: int = 10):
         order_by="-views_count",
         limit=limit
     )
-    return [QAQuestion(**question) for question in questions]
+    return conditional_json(
+        request, lambda: encode_rows(QAQuestion, questions),
+        rows=questions, cache_control=QA_CACHE_CONTROL
+    )
 
 @api_router.get("/qa/recent", response_model=List[QAQuestion])
-async def get_recent_qa_questions(limit: int = 10):
+async def get_recent_qa_questions(request: Request, limit: int = 10):
     """Get most recent Q&A questions"""
     questions = await db_client.get_records(
         "qa_questions",
@@ -1357,34 +1600,44 @@ async def get_recent_qa_questions(limit: int = 10):
         order_by="-created_at",
         limit=limit
     )
-    return [QAQuestion(**question) for question in questions]
+    return conditional_json(
+        request, lambda: encode_rows(QAQuestion, questions),
+        rows=questions, cache_control=QA_CACHE_CONTROL
+    )
 
 @api_router.get("/qa/stats", response_model=QAStats)
-async def get_qa_stats():
+async def get_qa_stats(request: Request):
     """Get Q&A statistics"""
     try:
-        total_questions = await db_client.count_records("qa_questions")
-        featured_count = await db_client.count_records("qa_questions", {"is_featured": True})
-        
-        # Get questions by category
-        questions = await db_client.get_records("qa_questions")
+        # Featured count and questions/views by category (one GROUP BY) run concurrently
+        batch = db_client.batch()
+        batch.add("count_records", "qa_questions", {"is_featured": True})
+        batch.add("aggregate", "qa_questions", [
+            {"$group": {
+                "_id": "$category",
+                "count": {"$sum": 1},
+                "views": {"$sum": "$views_count"}
+            }}
+        ])
+        featured_count, rows = await batch.run()
         questions_by_category = {}
+        total_questions = 0
         total_views = 0
         
-        for question in questions:
-            category = question.get("category", "general")
-            if category not in questions_by_category:
-                questions_by_category[category] = 0
-            questions_by_category[category] += 1
-            total_views += question.get("views_count", 0)
+        for row in rows:
+            category = row["_id"] or "general"
+            questions_by_category[category] = questions_by_category.get(category, 0) + row["count"]
+            total_questions += row["count"]
+            total_views += row["views"] or 0
         
-        return QAStats(
+        return conditional_json(request, QAStats(
             total_questions=total_questions,
             questions_by_category=questions_by_category,
             featured_count=featured_count,
             total_views=total_views,
-            most_viewed_questions=[]
-        )
+            most_viewed_questions=[],
+            recent_questions=[]
+        ), cache_control=QA_CACHE_CONTROL)
     except Exception as e:
         logger.error(f"Error fetching Q&A stats: {e}")
         return QAStats(
@@ -1392,7 +1645,8 @@ async def get_qa_stats():
             questions_by_category={},
             featured_count=0,
             total_views=0,
-            most_viewed_questions=[]
+            most_viewed_questions=[],
+            recent_questions=[]
         )
 
 # ====================================================================
@@ -1403,7 +1657,7 @@ async def get_qa_stats():
 async def get_admin_qa_questions(current_admin: dict = Depends(get_current_admin)):
     """Get all Q&A questions for admin"""
     questions = await db_client.get_records("qa_questions", order_by="-created_at")
-    return [QAQuestion(**question) for question in questions]
+    return fast_json(encode_rows(QAQuestion, questions))
 
 @api_router.post("/admin/qa/questions", response_model=QAQuestion)
 async def create_qa_question(question_data: QAQuestionCreate, current_admin: dict = Depends(get_current_admin)):
@@ -1503,11 +1757,11 @@ async def get_table_data(
             limit=limit,
             search=search
         )
-        return {
+        return fast_json({
             "success": True,
             "table_data": data,
             "message": "Table data retrieved successfully"
-        }
+        })
     except Exception as e:
         logger.error(f"Error getting table data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1516,6 +1770,7 @@ async def get_table_data(
 async def create_table_record(
     table_name: str,
     record_data: Dict[str, Any],
+    response: Response,
     current_admin: dict = Depends(get_current_admin)
 ):
     """Create a new record in the specified table"""
@@ -1526,6 +1781,8 @@ async def create_table_record(
         result = await admin_supabase_client.create_record(table_name, record_data)
         
         if result["success"]:
+            if table_name in CATALOG_SNAPSHOT_TABLES:
+                await refresh_catalog(table_name, response)
             return {
                 "success": True,
                 "record": result["data"],
@@ -1543,6 +1800,7 @@ async def update_table_record(
     table_name: str,
     record_id: str,
     record_data: Dict[str, Any],
+    response: Response,
     current_admin: dict = Depends(get_current_admin)
 ):
     """Update a record in the specified table"""
@@ -1553,6 +1811,8 @@ async def update_table_record(
         result = await admin_supabase_client.update_record(table_name, record_id, record_data)
         
         if result["success"]:
+            if table_name in CATALOG_SNAPSHOT_TABLES:
+                await refresh_catalog(table_name, response)
             return {
                 "success": True,
                 "record": result["data"],
@@ -1569,6 +1829,7 @@ async def update_table_record(
 async def delete_table_record(
     table_name: str,
     record_id: str,
+    response: Response,
     current_admin: dict = Depends(get_current_admin)
 ):
     """Delete a record from the specified table"""
@@ -1579,6 +1840,8 @@ async def delete_table_record(
         result = await admin_supabase_client.delete_record(table_name, record_id)
         
         if result["success"]:
+            if table_name in CATALOG_SNAPSHOT_TABLES:
+                await refresh_catalog(table_name, response)
             return {
                 "success": True,
                 "message": result["message"]
@@ -1684,24 +1947,23 @@ async def activate_promocode(validation: PromocodeValidation):
         
         await db_client.create_record("promocode_usage", usage_data)
         
-        # Обновить счетчик использований промокода
-        new_used_count = promocode.get("used_count", 0) + 1
-        await db_client.update_record("promocodes", "id", promocode["id"], {
-            "used_count": new_used_count,
-            "updated_at": datetime.utcnow().isoformat()
-        })
+        # Обновить счетчик использований промокода (атомарно, без чтения-изменения-записи)
+        await db_client.increment("promocodes", promocode["id"], "used_count", touch="updated_at")
         
-        # Создать записи доступа к курсам если нужно
+        # Создать записи доступа к курсам если нужно (одним запросом)
         if promocode.get("course_ids"):
-            for course_id in promocode["course_ids"]:
-                access_data = {
+            granted_at = datetime.utcnow().isoformat()
+            access_rows = [
+                {
                     "student_email": validation.student_email,
                     "course_id": course_id,
                     "promocode_id": promocode["id"],
-                    "granted_at": datetime.utcnow().isoformat(),
+                    "granted_at": granted_at,
                     "is_active": True
                 }
-                await db_client.create_record("user_course_access", access_data)
+                for course_id in promocode["course_ids"]
+            ]
+            await db_client.create_records("user_course_access", access_rows)
         
         return {
             "success": True,
@@ -1728,14 +1990,19 @@ async def check_user_access(request: Dict[str, str]):
             raise HTTPException(status_code=400, detail="Email пользователя обязателен")
         
         # Проверить активированные промокоды пользователя
-        usages = await db_client.get_records("promocode_usage", {"student_email": student_email})
+        usages = await db_client.get_records(
+            "promocode_usage", {"student_email": student_email}, columns=["promocode_id"]
+        )
+        
+        # Получить информацию о всех промокодах одним запросом
+        promocodes = await db_client.loader("promocodes").load_many(
+            [usage["promocode_id"] for usage in usages]
+        )
         
         access_granted = False
         access_details = []
         
-        for usage in usages:
-            # Получить информацию о промокоде
-            promocode = await db_client.get_record("promocodes", "id", usage["promocode_id"])
+        for promocode in promocodes:
             if promocode and promocode.get("is_active", True):
                 if promocode["promocode_type"] == "all_courses":
                     access_granted = True
@@ -1845,6 +2112,7 @@ app.add_middleware(
     ],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CATALOG_STALE_HEADER],
 )
 
 # Configure logging
@@ -1854,22 +2122,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
 async def startup_event():
     """Initialize default data and ensure quality content"""
     logger.info("Starting application with Supabase integration...")
     
     # Check if admins exist
     try:
-        admin_count = await db_client.count_records("admin_users")
-        logger.info(f"Found {admin_count} admin users in database")
-        
+        batch = db_client.batch()
+        batch.add("count_records", "admin_users")
         # Check existing team members
-        team_count = await db_client.count_records("team_members")
-        logger.info(f"Found {team_count} team members in database")
-        
+        batch.add("count_records", "team_members")
         # Check courses
-        course_count = await db_client.count_records("courses", {"status": "published"})
+        batch.add("count_records", "courses", {"status": "published"})
+        admin_count, team_count, course_count = await batch.run()
+        logger.info(f"Found {admin_count} admin users in database")
+        logger.info(f"Found {team_count} team members in database")
         logger.info(f"Found {course_count} published courses in database")
         
         # NOTE: autostart_supabase.py отключен - демо курсы не создаются
@@ -1895,6 +2162,9 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Error during startup: {e}")
 
-@app.on_event("shutdown")
 async def shutdown_event():
+    if DB_BACKEND == "asyncpg":
+        await db_client.close()
+    db_executor.shutdown(wait=False)
+    close_supabase()
     logger.info("Application shutdown")
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Single-flight request coalescing.
+
+When many coroutines ask for the same thing at the same time, only the first
+one (the leader) performs the call; everyone else awaits the leader's result.
+Nothing is cached: once the call finishes the key is forgotten and the next
+request goes upstream again, so coalescing never serves stale data.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0   # upstream calls actually made
+        self.shared = 0  # requests served by someone else's in-flight call
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``func`` once per ``key`` at a time and fan the result out to all waiters"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            # The call runs as its own task so that a cancelled leader does not
+            # cancel the work other waiters depend on
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._inflight)
+        }
@@ -0,0 +1,99 @@
+-- Server-side GROUP BY aggregation used by SupabaseClient.aggregate()
+--
+-- Apply in the Supabase SQL editor (or psql) before deploying the backend.
+--
+-- Arguments:
+--   table_name  table in the public schema
+--   group_by    columns to group by (empty array = one row for the whole table)
+--   metrics     [{"name": "count", "op": "count"},
+--                {"name": "total_views", "op": "sum", "field": "views_count"}]
+--               op is one of count, sum, avg, min, max
+--   filters     {"column": value} equality, null -> IS NULL, or
+--               {"column": {"$in": [...], "$gte": x, "$lte": y}}
+--
+-- Returns one jsonb object per group with the group columns and metric names as keys.
+-- All identifiers are quoted with format('%I') and values with format('%L').
+
+create or replace function public.aggregate_records(
+    table_name text,
+    group_by text[] default '{}',
+    metrics jsonb default '[{"name": "count", "op": "count"}]',
+    filters jsonb default '{}'
+)
+returns setof jsonb
+language plpgsql
+stable
+security definer
+set search_path = public
+as $$
+declare
+    select_items text[] := '{}';
+    conditions text[] := '{}';
+    group_column text;
+    metric jsonb;
+    metric_op text;
+    filter_key text;
+    filter_value jsonb;
+    filter_op text;
+    op_value jsonb;
+    sql text;
+begin
+    foreach group_column in array coalesce(group_by, '{}') loop
+        select_items := select_items || format('%I', group_column);
+    end loop;
+
+    for metric in select * from jsonb_array_elements(coalesce(metrics, '[]')) loop
+        metric_op := lower(metric->>'op');
+        if metric_op = 'count' then
+            select_items := select_items || format('count(*) as %I', metric->>'name');
+        elsif metric_op in ('sum', 'avg', 'min', 'max') then
+            select_items := select_items || format('%s(%I) as %I', metric_op, metric->>'field', metric->>'name');
+        else
+            raise exception 'Unsupported aggregate operation: %', metric_op;
+        end if;
+    end loop;
+
+    if array_length(select_items, 1) is null then
+        raise exception 'aggregate_records needs at least one group column or metric';
+    end if;
+
+    for filter_key, filter_value in select * from jsonb_each(coalesce(filters, '{}')) loop
+        if jsonb_typeof(filter_value) = 'object' then
+            for filter_op, op_value in select * from jsonb_each(filter_value) loop
+                if filter_op = '$in' then
+                    conditions := conditions || format(
+                        '%I = any(%L)', filter_key,
+                        array(select jsonb_array_elements_text(op_value))
+                    );
+                elsif filter_op = '$gte' then
+                    conditions := conditions || format('%I >= %L', filter_key, op_value #>> '{}');
+                elsif filter_op = '$lte' then
+                    conditions := conditions || format('%I <= %L', filter_key, op_value #>> '{}');
+                else
+                    raise exception 'Unsupported filter operator: %', filter_op;
+                end if;
+            end loop;
+        elsif jsonb_typeof(filter_value) = 'null' then
+            conditions := conditions || format('%I is null', filter_key);
+        else
+            conditions := conditions || format('%I = %L', filter_key, filter_value #>> '{}');
+        end if;
+    end loop;
+
+    sql := format('select %s from public.%I', array_to_string(select_items, ', '), table_name);
+    if array_length(conditions, 1) is not null then
+        sql := sql || ' where ' || array_to_string(conditions, ' and ');
+    end if;
+    if array_length(group_by, 1) is not null then
+        sql := sql || ' group by ' || (
+            select string_agg(format('%I', g), ', ') from unnest(group_by) as g
+        );
+    end if;
+
+    return query execute format('select to_jsonb(t) from (%s) t', sql);
+end;
+$$;
+
+-- Only the backend (service role) may call it
+revoke all on function public.aggregate_records(text, text[], jsonb, jsonb) from public, anon, authenticated;
+grant execute on function public.aggregate_records(text, text[], jsonb, jsonb) to service_role;
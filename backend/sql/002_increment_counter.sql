@@ -0,0 +1,43 @@
+-- Atomic counter increment used by SupabaseClient.increment()
+--
+-- Adds delta to a numeric column in a single UPDATE, so concurrent increments
+-- never lose updates. When touch_field is given, that timestamp column is set
+-- to now() in the same statement (e.g. updated_at for admin-visible counters).
+-- Returns the new value, or NULL if no row matched.
+
+-- The signature gained touch_field; drop the old one so PostgREST has a single candidate
+drop function if exists public.increment_counter(text, text, text, text, bigint);
+
+create or replace function public.increment_counter(
+    table_name text,
+    id_field text,
+    id_value text,
+    field_name text,
+    delta bigint default 1,
+    touch_field text default null
+)
+returns bigint
+language plpgsql
+volatile
+security definer
+set search_path = public
+as $$
+declare
+    new_value bigint;
+begin
+    -- %L leaves the id as an untyped literal, so it is coerced to the id column's type
+    -- (uuid, text, ...) and the primary key index is still used
+    execute format(
+        'update public.%I set %I = coalesce(%I, 0) + $1%s where %I = %L returning %I',
+        table_name, field_name, field_name,
+        case when touch_field is null then '' else format(', %I = now()', touch_field) end,
+        id_field, id_value, field_name
+    )
+    into new_value
+    using delta;
+    return new_value;
+end;
+$$;
+
+revoke all on function public.increment_counter(text, text, text, text, bigint, text) from public, anon, authenticated;
+grant execute on function public.increment_counter(text, text, text, text, bigint, text) to service_role;
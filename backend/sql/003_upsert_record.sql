@@ -0,0 +1,90 @@
+-- Native upsert with additive merge, used by SupabaseClient.upsert()
+--
+-- Inserts row_data, or on conflict with conflict_columns updates the existing row:
+--   * columns in additive_columns become existing + new (counters, scores)
+--   * other columns in update_columns are replaced
+--   * columns not listed in update_columns (id, created_at, ...) keep their value
+-- Columns absent from row_data are left to their defaults on insert.
+-- Returns the resulting row as jsonb.
+
+create or replace function public.upsert_record(
+    table_name text,
+    row_data jsonb,
+    conflict_columns text[],
+    update_columns text[],
+    additive_columns text[] default '{}'
+)
+returns jsonb
+language plpgsql
+volatile
+security definer
+set search_path = public
+as $$
+declare
+    insert_columns text;
+    conflict_target text;
+    set_list text;
+    result jsonb;
+begin
+    select string_agg(format('%I', key), ', ') into insert_columns
+    from jsonb_object_keys(row_data) as key;
+
+    select string_agg(format('%I', col), ', ') into conflict_target
+    from unnest(conflict_columns) as col;
+
+    select string_agg(
+        case when col = any(coalesce(additive_columns, '{}'))
+            then format('%I = coalesce(t.%I, 0) + excluded.%I', col, col, col)
+            else format('%I = excluded.%I', col, col)
+        end, ', ') into set_list
+    from unnest(update_columns) as col;
+
+    execute format(
+        'insert into public.%I as t (%s) select %s from jsonb_populate_record(null::public.%I, $1) '
+        'on conflict (%s) do %s returning to_jsonb(t)',
+        table_name, insert_columns, insert_columns, table_name, conflict_target,
+        case when set_list is null then 'nothing' else 'update set ' || set_list end
+    )
+    into result
+    using row_data;
+    return result;
+end;
+$$;
+
+revoke all on function public.upsert_record(text, jsonb, text[], text[], text[]) from public, anon, authenticated;
+grant execute on function public.upsert_record(text, jsonb, text[], text[], text[]) to service_role;
+
+-- update_user_score upserts on user_id, which needs a unique constraint.
+-- Rows duplicated by the old read-then-write path are merged into the oldest one
+-- (earliest created_at) first. Skipped on databases without a user_scores table.
+do $$
+begin
+    if to_regclass('public.user_scores') is not null and not exists (
+        select 1 from pg_constraint where conname = 'user_scores_user_id_key'
+    ) then
+        create temporary table user_scores_merge on commit drop as
+        select user_id,
+               (array_agg(ctid order by created_at nulls last, ctid))[1] as keep_ctid,
+               sum(total_points) as total_points,
+               sum(tests_completed) as tests_completed,
+               max(last_test_date) as last_test_date
+        from public.user_scores
+        group by user_id
+        having count(*) > 1;
+
+        delete from public.user_scores s
+        using user_scores_merge d
+        where s.user_id = d.user_id and s.ctid <> d.keep_ctid;
+
+        update public.user_scores s
+        set total_points = d.total_points,
+            tests_completed = d.tests_completed,
+            last_test_date = d.last_test_date
+        from user_scores_merge d
+        where s.ctid = d.keep_ctid;
+
+        alter table public.user_scores
+            add constraint user_scores_user_id_key unique (user_id);
+    end if;
+end;
+$$;
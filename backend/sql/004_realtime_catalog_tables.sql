@@ -0,0 +1,41 @@
+-- Publish changes to the catalog tables over Supabase Realtime
+--
+-- cache_invalidation.RealtimeChangeFeed subscribes to postgres_changes for
+-- these tables so every backend worker can evict its cached reads when a row
+-- changes. Realtime only sees tables that are in the supabase_realtime
+-- publication. Apply once in the Supabase SQL editor (or psql); re-running is safe.
+--
+-- Tables with counter columns (cache_invalidation.COUNTER_COLUMNS) also get
+-- REPLICA IDENTITY FULL, so their UPDATE events carry the old row and
+-- counter-only updates (view count flushes, promocode activations) can be
+-- told apart from content edits and ignored.
+
+do $$
+declare
+    catalog_table text;
+begin
+    if not exists (select 1 from pg_publication where pubname = 'supabase_realtime') then
+        create publication supabase_realtime;
+    end if;
+
+    foreach catalog_table in array array[
+        'courses', 'lessons', 'tests', 'qa_questions', 'team_members', 'promocodes'
+    ] loop
+        if to_regclass(format('public.%I', catalog_table)) is not null
+           and not exists (
+               select 1 from pg_publication_tables
+               where pubname = 'supabase_realtime'
+                 and schemaname = 'public'
+                 and tablename = catalog_table
+           ) then
+            execute format('alter publication supabase_realtime add table public.%I', catalog_table);
+        end if;
+    end loop;
+
+    foreach catalog_table in array array['qa_questions', 'promocodes'] loop
+        if to_regclass(format('public.%I', catalog_table)) is not null then
+            execute format('alter table public.%I replica identity full', catalog_table);
+        end if;
+    end loop;
+end;
+$$;
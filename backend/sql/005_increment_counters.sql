@@ -0,0 +1,50 @@
+-- Batched counter increments used by SupabaseClient.increment_many()
+--
+-- Applies many deltas to one numeric column in a single UPDATE ... FROM:
+--   deltas = {"<id>": 3, "<other id>": 1}
+-- Every row is incremented atomically (concurrent increments never lose
+-- updates). Returns the number of rows updated.
+
+create or replace function public.increment_counters(
+    table_name text,
+    id_field text,
+    field_name text,
+    deltas jsonb
+)
+returns integer
+language plpgsql
+volatile
+security definer
+set search_path = public
+as $$
+declare
+    id_type text;
+    updated integer;
+begin
+    -- Cast the ids to the id column's own type so its index is used
+    select format_type(a.atttypid, a.atttypmod)
+    into id_type
+    from pg_attribute a
+    where a.attrelid = format('public.%I', table_name)::regclass
+      and a.attname = id_field
+      and a.attnum > 0
+      and not a.attisdropped;
+
+    if id_type is null then
+        raise exception 'Column %.% does not exist', table_name, id_field;
+    end if;
+
+    execute format(
+        'update public.%I t set %I = coalesce(t.%I, 0) + d.delta '
+        'from (select key::%s as id, sum(value::bigint) as delta from jsonb_each_text($1) group by 1) d '
+        'where t.%I = d.id',
+        table_name, field_name, field_name, id_type, id_field
+    )
+    using deltas;
+    get diagnostics updated = row_count;
+    return updated;
+end;
+$$;
+
+revoke all on function public.increment_counters(text, text, text, jsonb) from public, anon, authenticated;
+grant execute on function public.increment_counters(text, text, text, jsonb) to service_role;
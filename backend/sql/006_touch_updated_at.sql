@@ -0,0 +1,43 @@
+-- Keep updated_at current on every UPDATE to the tables behind cached reads
+--
+-- http_caching derives ETag / Last-Modified from each row's id and updated_at,
+-- so a write that changes a row without bumping updated_at (the admin table
+-- editor, counter increments, edits in the Supabase dashboard) would keep
+-- answering 304 for a changed body. This BEFORE UPDATE trigger sets
+-- updated_at = now() whenever the row changes and the statement didn't set
+-- updated_at itself. Apply once in the Supabase SQL editor (or psql);
+-- re-running is safe.
+
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new is distinct from old and new.updated_at is not distinct from old.updated_at then
+        new.updated_at := now();
+    end if;
+    return new;
+end;
+$$;
+
+do $$
+declare
+    cached_table text;
+begin
+    foreach cached_table in array array[
+        'courses', 'lessons', 'tests', 'simple_tests', 'qa_questions', 'team_members', 'promocodes'
+    ] loop
+        if exists (
+            select 1 from information_schema.columns
+            where table_schema = 'public' and table_name = cached_table and column_name = 'updated_at'
+        ) then
+            execute format('drop trigger if exists touch_updated_at on public.%I', cached_table);
+            execute format(
+                'create trigger touch_updated_at before update on public.%I '
+                'for each row execute function public.touch_updated_at()',
+                cached_table
+            );
+        end if;
+    end loop;
+end;
+$$;
@@ -1,33 +1,120 @@
-import os
-from supabase import create_client, Client
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 import logging
 from datetime import datetime
-import uuid
+import json
 from dotenv import load_dotenv
+from db_executor import db_executor
+from supabase_connection import get_supabase
+from single_flight import SingleFlight
+from query_cache import query_cache
+from batch_loader import RecordLoader, ReadBatch
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# PostgREST count strategies accepted by count_records
+COUNT_MODES = ("exact", "planned", "estimated")
+
+class BulkInsertError(Exception):
+    """Raised by create_records when one or more chunks could not be inserted"""
+    def __init__(self, table: str, inserted: List[Dict[str, Any]], failed_chunks: List[Dict[str, Any]]):
+        self.table = table
+        self.inserted = inserted  # rows from the chunks that succeeded
+        self.failed_chunks = failed_chunks  # [{"chunk": index, "rows": [...], "error": "..."}]
+        super().__init__(f"{len(failed_chunks)} chunk(s) failed to insert into {table}")
+
 class SupabaseClient:
     def __init__(self):
-        url = os.environ.get('SUPABASE_URL')
-        key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-        
-        if not url or not key:
-            raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment variables")
-        
-        self.client: Client = create_client(url, key)
-        logger.info("Supabase client initialized")
+        # Identical concurrent reads share one upstream call
+        self.read_flights = SingleFlight()
+        # Optional per-table read-through cache, invalidated by writes below
+        self.cache = query_cache
+
+    @property
+    def client(self):
+        """The process-wide Supabase client, created on first use"""
+        return get_supabase()
+
+    async def _execute(self, query, timeout: Optional[float] = None):
+        """Run a postgrest query on the shared DB executor instead of the event loop"""
+        return await db_executor.execute(query, timeout=timeout)
+
+    @staticmethod
+    def _read_key(operation: str, table: str, *args: Any) -> str:
+        """Build a stable key for a read from its table and query parameters"""
+        return json.dumps([operation, table, *args], sort_keys=True, default=str)
+
+    async def _read(self, table: str, key: str, fetch) -> Any:
+        """Serve a read from the cache, or fetch it once for all concurrent callers"""
+        hit, value = self.cache.get(table, key)
+        if hit:
+            return value
+        generation = self.cache.generation(table)
+        value = await self.read_flights.do(key, fetch)
+        self.cache.set(table, key, value, generation)
+        return value
+
+    @staticmethod
+    def _apply_filters(query, filters: Optional[Dict[str, Any]]):
+        """Apply MongoDB-style filters to a postgrest query.
+
+        Plain values are equality checks; dict values support
+        ``$in``, ``$gte``, ``$lte`` and ``$regex`` (case-insensitive contains).
+        """
+        if not filters:
+            return query
+        for field, value in filters.items():
+            if isinstance(value, dict):
+                # Handle complex filters like {"$in": [1, 2, 3]}
+                for operator, op_value in value.items():
+                    if operator == "$in":
+                        query = query.in_(field, op_value)
+                    elif operator == "$gte":
+                        query = query.gte(field, op_value)
+                    elif operator == "$lte":
+                        query = query.lte(field, op_value)
+                    elif operator == "$regex":
+                        query = query.ilike(field, f"%{op_value}%")
+            elif value is None:
+                query = query.is_(field, "null")
+            else:
+                query = query.eq(field, value)
+        return query
+
+    @staticmethod
+    def _select_columns(columns: Optional[List[str]]) -> str:
+        """PostgREST select list for a column projection (all columns by default)"""
+        return ",".join(columns) if columns else "*"
+
+    @classmethod
+    def _copy_rows(cls, rows: Any) -> Any:
+        """Give each caller its own copy of the rows, nested json/array values included,
+        so coalesced and cached results can't be mutated across requests"""
+        # Rows are decoded JSON: only dicts and lists are mutable, so this is a
+        # cheaper deepcopy (no memo, no type dispatch for the scalar leaves)
+        if isinstance(rows, dict):
+            return {key: cls._copy_rows(value) for key, value in rows.items()}
+        if isinstance(rows, list):
+            return [cls._copy_rows(value) for value in rows]
+        return rows
+
+    def loader(self, table: str, key_field: str = "id",
+               columns: Optional[List[str]] = None) -> RecordLoader:
+        """Create a per-request loader that batches get_record-style lookups into one query"""
+        return RecordLoader(self, table, key_field=key_field, columns=columns)
+
+    def batch(self) -> ReadBatch:
+        """Collect independent reads and run them concurrently with one await"""
+        return ReadBatch(self)
 
     async def create_record(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new record in the specified table"""
         try:
             # Convert datetime objects to ISO string format
             processed_data = self._process_data_for_insert(data)
-            result = self.client.table(table).insert(processed_data).execute()
+            result = await self._execute(self.client.table(table).insert(processed_data))
             if result.data:
                 return result.data[0]
             else:
@@ -35,11 +122,50 @@ class SupabaseClient:
         except Exception as e:
             logger.error(f"Error creating record in {table}: {str(e)}")
             raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def create_records(self, table: str, rows: List[Dict[str, Any]],
+                             chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """Bulk insert records, one round-trip per chunk of ``chunk_size`` rows.
+
+        Every chunk is attempted; if any fail, BulkInsertError reports the
+        inserted rows and each failed chunk with its error.
+        """
+        if not rows:
+            return []
+
+        processed_rows = [self._process_data_for_insert(row) for row in rows]
+        inserted: List[Dict[str, Any]] = []
+        failed_chunks: List[Dict[str, Any]] = []
+        try:
+            for index, start in enumerate(range(0, len(processed_rows), chunk_size)):
+                chunk = processed_rows[start:start + chunk_size]
+                try:
+                    result = await self._execute(self.client.table(table).insert(chunk))
+                    inserted.extend(result.data or [])
+                except Exception as e:
+                    logger.error(f"Error inserting chunk {index} ({len(chunk)} rows) into {table}: {str(e)}")
+                    failed_chunks.append({"chunk": index, "rows": chunk, "error": str(e)})
+        finally:
+            self.cache.invalidate(table)
+
+        if failed_chunks:
+            raise BulkInsertError(table, inserted, failed_chunks)
+        return inserted
 
-    async def get_record(self, table: str, id_field: str, id_value: str) -> Optional[Dict[str, Any]]:
-        """Get a single record by ID"""
+    async def get_record(self, table: str, id_field: str, id_value: str,
+                         columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Get a single record by ID, optionally only the given columns"""
+        key = self._read_key("get_record", table, id_field, id_value, columns)
+        record = await self._read(table, key, lambda: self._fetch_record(table, id_field, id_value, columns))
+        return self._copy_rows(record)
+
+    async def _fetch_record(self, table: str, id_field: str, id_value: str,
+                            columns: Optional[List[str]]) -> Optional[Dict[str, Any]]:
         try:
-            result = self.client.table(table).select("*").eq(id_field, id_value).execute()
+            query = self.client.table(table).select(self._select_columns(columns))
+            result = await self._execute(query.eq(id_field, id_value))
             if result.data:
                 return result.data[0]
             return None
@@ -48,26 +174,22 @@ class SupabaseClient:
             raise
 
     async def get_records(self, table: str, filters: Optional[Dict[str, Any]] = None, 
-                         order_by: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Get multiple records with optional filters"""
+                         order_by: Optional[str] = None, limit: Optional[int] = None,
+                         columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get multiple records with optional filters, optionally only the given columns"""
+        key = self._read_key("get_records", table, filters, order_by, limit, columns)
+        records = await self._read(
+            table, key, lambda: self._fetch_records(table, filters, order_by, limit, columns)
+        )
+        return self._copy_rows(records)
+
+    async def _fetch_records(self, table: str, filters: Optional[Dict[str, Any]],
+                             order_by: Optional[str], limit: Optional[int],
+                             columns: Optional[List[str]]) -> List[Dict[str, Any]]:
         try:
-            query = self.client.table(table).select("*")
+            query = self.client.table(table).select(self._select_columns(columns))
             
-            if filters:
-                for field, value in filters.items():
-                    if isinstance(value, dict):
-                        # Handle complex filters like {"$in": [1, 2, 3]}
-                        for operator, op_value in value.items():
-                            if operator == "$in":
-                                query = query.in_(field, op_value)
-                            elif operator == "$gte":
-                                query = query.gte(field, op_value)
-                            elif operator == "$lte":
-                                query = query.lte(field, op_value)
-                            elif operator == "$regex":
-                                query = query.ilike(field, f"%{op_value}%")
-                    else:
-                        query = query.eq(field, value)
+            query = self._apply_filters(query, filters)
             
             if order_by:
                 if order_by.startswith("-"):
@@ -80,74 +202,274 @@ class SupabaseClient:
             if limit:
                 query = query.limit(limit)
                 
-            result = query.execute()
+            result = await self._execute(query)
             return result.data if result.data else []
         except Exception as e:
             logger.error(f"Error getting records from {table}: {str(e)}")
             raise
 
+    async def iter_records(self, table: str, filters: Optional[Dict[str, Any]] = None,
+                           order_by: Optional[str] = None, page_size: int = 1000,
+                           columns: Optional[List[str]] = None,
+                           key_field: str = "id") -> AsyncIterator[Dict[str, Any]]:
+        """Stream every matching record using keyset (cursor) pagination.
+
+        Rows are ordered by ``order_by`` (default ``key_field``, prefix "-" for
+        descending) with ``key_field`` as a unique tie-breaker. Each page
+        resumes after the last row seen instead of using OFFSET, so memory is
+        constant and deep pages stay cheap. NULLs in the ordering column sort
+        after every value, as Postgres does by default (last ascending, first
+        descending); ``key_field`` must be NOT NULL.
+        """
+        order_field = (order_by or key_field).lstrip("-")
+        descending = bool(order_by and order_by.startswith("-"))
+        if columns:
+            columns = list(dict.fromkeys([*columns, order_field, key_field]))
+
+        cursor: Optional[Dict[str, Any]] = None
+        while True:
+            try:
+                query = self.client.table(table).select(self._select_columns(columns))
+                query = self._apply_filters(query, filters)
+                if cursor is not None:
+                    query = self._after_cursor(query, cursor, order_field, key_field, descending)
+                query = query.order(order_field, desc=descending, nullsfirst=descending)
+                if order_field != key_field:
+                    query = query.order(key_field, desc=descending)
+                result = await self._execute(query.limit(page_size))
+            except Exception as e:
+                logger.error(f"Error iterating records from {table}: {str(e)}")
+                raise
+
+            rows = result.data or []
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            cursor = rows[-1]
+
+    @staticmethod
+    def _after_cursor(query, cursor: Dict[str, Any], order_field: str, key_field: str, descending: bool):
+        """Restrict a query to rows strictly after ``cursor`` in (order_field, key_field) order.
+
+        NULL ordering values rank above every other value, matching the
+        ``nullsfirst=descending`` ordering iter_records requests.
+        """
+        op = "lt" if descending else "gt"
+        if order_field == key_field:
+            return query.filter(key_field, op, cursor[key_field])
+
+        def quote(value: Any) -> str:
+            # PostgREST logic-tree values must be double-quoted if they contain reserved characters
+            escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            return f'"{escaped}"'
+
+        key_value = quote(cursor[key_field])
+        if cursor[order_field] is None:
+            if descending:
+                # NULLs came first: finish the NULL group, then every non-NULL row
+                return query.or_(
+                    f"and({order_field}.is.null,{key_field}.lt.{key_value}),{order_field}.not.is.null"
+                )
+            # NULLs come last: only the rest of the NULL group is left
+            return query.is_(order_field, "null").filter(key_field, "gt", cursor[key_field])
+
+        order_value = quote(cursor[order_field])
+        after = (
+            f"{order_field}.{op}.{order_value},"
+            f"and({order_field}.eq.{order_value},{key_field}.{op}.{key_value})"
+        )
+        if not descending:
+            after += f",{order_field}.is.null"
+        return query.or_(after)
+
     async def update_record(self, table: str, id_field: str, id_value: str, 
                           data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a record by ID"""
         try:
             processed_data = self._process_data_for_update(data)
-            result = self.client.table(table).update(processed_data).eq(id_field, id_value).execute()
+            result = await self._execute(self.client.table(table).update(processed_data).eq(id_field, id_value))
             if result.data:
                 return result.data[0]
             return None
         except Exception as e:
             logger.error(f"Error updating record in {table}: {str(e)}")
             raise
+        finally:
+            self.cache.invalidate(table)
 
     async def delete_record(self, table: str, id_field: str, id_value: str) -> bool:
         """Delete a record by ID"""
         try:
-            result = self.client.table(table).delete().eq(id_field, id_value).execute()
+            result = await self._execute(self.client.table(table).delete().eq(id_field, id_value))
             return True
         except Exception as e:
             logger.error(f"Error deleting record from {table}: {str(e)}")
             raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def increment(self, table: str, id_value: Any, field: str, delta: int = 1,
+                        id_field: str = "id", invalidate: bool = True,
+                        touch: Optional[str] = None) -> Optional[int]:
+        """Atomically add ``delta`` to a numeric column in one statement.
 
-    async def count_records(self, table: str, filters: Optional[Dict[str, Any]] = None) -> int:
-        """Count records in a table with optional filters"""
+        Returns the new value, or None if no row matched. ``touch`` names a
+        timestamp column (e.g. "updated_at") set to now() by the same UPDATE.
+        Pass invalidate=False for high-frequency counters (e.g. view counts)
+        where a slightly stale cached value is acceptable. Requires
+        sql/002_increment_counter.sql.
+        """
         try:
-            query = self.client.table(table).select("*", count="exact")
+            result = await self._execute(self.client.rpc("increment_counter", {
+                "table_name": table,
+                "id_field": id_field,
+                "id_value": str(id_value),
+                "field_name": field,
+                "delta": delta,
+                "touch_field": touch
+            }))
+            return result.data
+        except Exception as e:
+            logger.error(f"Error incrementing {field} in {table}: {str(e)}")
+            raise
+        finally:
+            if invalidate:
+                self.cache.invalidate(table)
+
+    async def increment_many(self, table: str, field: str, deltas: Dict[Any, int],
+                             id_field: str = "id", invalidate: bool = True) -> int:
+        """Apply many counter increments ({id: delta}) in one atomic statement.
+
+        Returns the number of rows updated. Requires sql/005_increment_counters.sql.
+        """
+        if not deltas:
+            return 0
+        try:
+            result = await self._execute(self.client.rpc("increment_counters", {
+                "table_name": table,
+                "id_field": id_field,
+                "field_name": field,
+                "deltas": {str(id_value): delta for id_value, delta in deltas.items()}
+            }))
+            return result.data or 0
+        except Exception as e:
+            logger.error(f"Error incrementing {field} for {len(deltas)} rows in {table}: {str(e)}")
+            raise
+        finally:
+            if invalidate:
+                self.cache.invalidate(table)
+
+    async def upsert(self, table: str, row: Dict[str, Any], on_conflict: str,
+                     additive: Optional[List[str]] = None,
+                     insert_only: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Insert ``row`` or update the row it conflicts with, in one statement.
+
+        ``on_conflict`` is the comma separated unique column(s). On conflict,
+        columns in ``additive`` are added to the stored value instead of
+        replacing it, and ``insert_only`` columns (default: id, created_at) keep
+        their stored value. Plain upserts use PostgREST directly; the merge
+        variants need sql/003_upsert_record.sql.
+        """
+        insert_only = ["id", "created_at"] if insert_only is None else insert_only
+        conflict_columns = [column.strip() for column in on_conflict.split(",")]
+        try:
+            processed_data = self._process_data_for_insert(row)
+            if not additive and not any(column in processed_data for column in insert_only):
+                result = await self._execute(
+                    self.client.table(table).upsert(processed_data, on_conflict=on_conflict)
+                )
+                return result.data[0] if result.data else None
+
+            update_columns = [
+                column for column in processed_data
+                if column not in conflict_columns and column not in insert_only
+            ]
+            result = await self._execute(self.client.rpc("upsert_record", {
+                "table_name": table,
+                "row_data": processed_data,
+                "conflict_columns": conflict_columns,
+                "update_columns": update_columns,
+                "additive_columns": additive or []
+            }))
+            if result.data is not None:
+                return result.data
+            # Nothing to update (do nothing): keep the stored row and return it
+            return await self._fetch_one(
+                table, {column: processed_data.get(column) for column in conflict_columns}, None
+            )
+        except Exception as e:
+            logger.error(f"Error upserting record in {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def update_where(self, table: str, filters: Dict[str, Any], data: Dict[str, Any]) -> int:
+        """Update every record matching ``filters`` in one statement; returns the number of rows updated"""
+        if not filters:
+            raise ValueError("update_where requires at least one filter")
+        try:
+            processed_data = self._process_data_for_update(data)
+            query = self.client.table(table).update(processed_data, count="exact", returning="minimal")
+            result = await self._execute(self._apply_filters(query, filters))
+            return result.count if result.count is not None else 0
+        except Exception as e:
+            logger.error(f"Error updating records in {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def delete_where(self, table: str, filters: Dict[str, Any]) -> int:
+        """Delete every record matching ``filters`` in one statement; returns the number of rows deleted"""
+        if not filters:
+            raise ValueError("delete_where requires at least one filter")
+        try:
+            query = self.client.table(table).delete(count="exact", returning="minimal")
+            result = await self._execute(self._apply_filters(query, filters))
+            return result.count if result.count is not None else 0
+        except Exception as e:
+            logger.error(f"Error deleting records from {table}: {str(e)}")
+            raise
+        finally:
+            self.cache.invalidate(table)
+
+    async def count_records(self, table: str, filters: Optional[Dict[str, Any]] = None,
+                            count: str = "exact") -> int:
+        """Count records in a table with optional filters.
+
+        Sent as a HEAD request, so no rows are transferred. ``count`` selects
+        how Postgres counts: "exact" runs COUNT(*), "planned" uses the query
+        planner's row estimate (fast on large tables, approximate), and
+        "estimated" is exact for small results and planned above PostgREST's
+        max-rows limit.
+        """
+        if count not in COUNT_MODES:
+            raise ValueError(f"Unsupported count mode {count!r}, expected one of {COUNT_MODES}")
+        try:
+            query = self.client.table(table).select("*", count=count, head=True)
             
-            if filters:
-                for field, value in filters.items():
-                    if isinstance(value, dict):
-                        for operator, op_value in value.items():
-                            if operator == "$in":
-                                query = query.in_(field, op_value)
-                            elif operator == "$gte":
-                                query = query.gte(field, op_value)
-                            elif operator == "$lte":
-                                query = query.lte(field, op_value)
-                    else:
-                        query = query.eq(field, value)
+            query = self._apply_filters(query, filters)
             
-            result = query.execute()
+            result = await self._execute(query)
             return result.count if result.count is not None else 0
         except Exception as e:
             logger.error(f"Error counting records in {table}: {str(e)}")
             raise
 
-    async def find_one(self, table: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def find_one(self, table: str, filters: Dict[str, Any],
+                       columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """Find a single record with filters (equivalent to MongoDB find_one)"""
+        key = self._read_key("find_one", table, filters, columns)
+        record = await self._read(table, key, lambda: self._fetch_one(table, filters, columns))
+        return self._copy_rows(record)
+
+    async def _fetch_one(self, table: str, filters: Dict[str, Any],
+                         columns: Optional[List[str]]) -> Optional[Dict[str, Any]]:
         try:
-            query = self.client.table(table).select("*")
+            query = self.client.table(table).select(self._select_columns(columns))
+            query = self._apply_filters(query, filters)
             
-            for field, value in filters.items():
-                if isinstance(value, dict):
-                    for operator, op_value in value.items():
-                        if operator == "$regex":
-                            query = query.ilike(field, f"%{op_value}%")
-                        elif operator == "$in":
-                            query = query.in_(field, op_value)
-                else:
-                    query = query.eq(field, value)
-            
-            result = query.limit(1).execute()
+            result = await self._execute(query.limit(1))
             if result.data:
                 return result.data[0]
             return None
@@ -156,29 +478,89 @@ class SupabaseClient:
             raise
 
     async def aggregate(self, table: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Simplified aggregation for basic grouping operations"""
+        """Run a MongoDB-style aggregation as a single GROUP BY in Postgres.
+
+        Supported stages:
+            {"$match": filters}  - same dialect as get_records, except $regex
+            {"$group": {"_id": "$field" | None | {"alias": "$field", ...},
+                        "name": {"$sum": 1} | {"$count": {}}
+                              | {"$sum" | "$avg" | "$min" | "$max": "$field"}}}
+
+        Returns rows shaped like MongoDB's: {"_id": <group key>, "name": value, ...}.
+        Requires the aggregate_records function from sql/001_aggregate_records.sql.
+        """
         try:
-            # This is a simplified version - Supabase doesn't have full MongoDB aggregation
-            # We'll handle basic cases like counting by category
-            for stage in pipeline:
-                if "$group" in stage:
-                    group_fields = stage["$group"]
-                    if "_id" in group_fields and "count" in group_fields:
-                        group_by = group_fields["_id"]
-                        if group_by.startswith("$"):
-                            field_name = group_by[1:]  # Remove $ prefix
-                            # Use PostgreSQL aggregation
-                            result = self.client.rpc('aggregate_by_field', {
-                                'table_name': table,
-                                'field_name': field_name
-                            }).execute()
-                            return result.data if result.data else []
-            
-            # Fallback for unsupported aggregations
-            return []
+            filters, group_id, group_fields, metrics = self._compile_pipeline(pipeline)
+            result = await self._execute(self.client.rpc("aggregate_records", {
+                "table_name": table,
+                "group_by": list(dict.fromkeys(group_fields.values())),
+                "metrics": metrics,
+                "filters": filters
+            }))
+            return self._group_rows(result.data or [], group_id, group_fields, metrics)
         except Exception as e:
             logger.error(f"Error in aggregation for {table}: {str(e)}")
-            return []
+            raise
+
+    @classmethod
+    def _compile_pipeline(cls, pipeline: List[Dict[str, Any]]):
+        """Split a pipeline into (filters, group_id, group_fields, metrics) for aggregate_records"""
+        filters: Dict[str, Any] = {}
+        group_spec = None
+        for stage in pipeline:
+            if "$match" in stage:
+                filters.update(stage["$match"])
+            elif "$group" in stage:
+                group_spec = stage["$group"]
+            else:
+                raise ValueError(f"Unsupported aggregation stage: {list(stage)}")
+        if group_spec is None:
+            raise ValueError("Aggregation pipeline needs a $group stage")
+
+        group_id = group_spec.get("_id")
+        if group_id is None:
+            group_fields: Dict[str, str] = {}
+        elif isinstance(group_id, dict):
+            group_fields = {alias: cls._field_ref(ref) for alias, ref in group_id.items()}
+        else:
+            group_fields = {"_id": cls._field_ref(group_id)}
+
+        metrics = []
+        for name, accumulator in group_spec.items():
+            if name == "_id":
+                continue
+            (operator, operand), = accumulator.items()
+            if operator == "$count" or (operator == "$sum" and operand == 1):
+                metrics.append({"name": name, "op": "count"})
+            elif operator in ("$sum", "$avg", "$min", "$max"):
+                metrics.append({"name": name, "op": operator[1:], "field": cls._field_ref(operand)})
+            else:
+                raise ValueError(f"Unsupported accumulator {operator} for {name}")
+        return filters, group_id, group_fields, metrics
+
+    @staticmethod
+    def _group_rows(data: List[Dict[str, Any]], group_id: Any, group_fields: Dict[str, str],
+                    metrics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Reshape flat GROUP BY rows into MongoDB-style {"_id": key, ...} documents"""
+        rows = []
+        for row in data:
+            if group_id is None:
+                key = None
+            elif isinstance(group_id, dict):
+                key = {alias: row.get(field) for alias, field in group_fields.items()}
+            else:
+                key = row.get(group_fields["_id"])
+            aggregated = {"_id": key}
+            aggregated.update({metric["name"]: row.get(metric["name"]) for metric in metrics})
+            rows.append(aggregated)
+        return rows
+
+    @staticmethod
+    def _field_ref(ref: Any) -> str:
+        """Strip the $ prefix from a MongoDB field reference"""
+        if not isinstance(ref, str) or not ref.startswith("$"):
+            raise ValueError(f"Expected a field reference like '$name', got {ref!r}")
+        return ref[1:]
 
     def _process_data_for_insert(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Process data before inserting to Supabase"""
@@ -212,11 +594,14 @@ class SupabaseClient:
     async def execute_raw_sql(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Execute raw SQL query (for complex operations)"""
         try:
-            result = self.client.rpc('execute_sql', {'query': query, 'params': params or {}}).execute()
+            result = await self._execute(self.client.rpc('execute_sql', {'query': query, 'params': params or {}}))
             return result.data if result.data else []
         except Exception as e:
             logger.error(f"Error executing raw SQL: {str(e)}")
             raise
+        finally:
+            # Raw SQL may touch any table
+            self.cache.clear()
 
 # Global instance
 supabase_client = SupabaseClient()
\ No newline at end of file
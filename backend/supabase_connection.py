@@ -0,0 +1,63 @@
+"""
+The one Supabase client shared by the whole process.
+
+SupabaseClient and AdminSupabaseClient both use ``get_supabase()`` instead
+of creating their own client, so there is a single PostgREST connection pool
+per worker. The client (and the supabase package itself, which is slow to
+import) is created on first use, not at import time, so a missing environment
+variable surfaces as an error on the first query rather than crashing the
+import. The FastAPI lifespan opens it on startup and calls
+``close_supabase()`` on shutdown.
+"""
+
+import os
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
+from dotenv import load_dotenv
+from db_executor import db_executor
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_client: Optional["Client"] = None
+# Queries run on executor threads, so first use can race
+_client_lock = threading.Lock()
+
+
+def get_supabase() -> "Client":
+    """Return the shared client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                url = os.environ.get('SUPABASE_URL')
+                key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+                if not url or not key:
+                    raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment variables")
+
+                from supabase import create_client, ClientOptions
+                # HTTP timeout matches the executor timeout so a hung request frees its worker thread
+                options = ClientOptions(postgrest_client_timeout=db_executor.timeout or None)
+                _client = create_client(url, key, options=options)
+                logger.info("Supabase client initialized")
+    return _client
+
+
+def close_supabase() -> None:
+    """Close the shared client's HTTP connections; the next get_supabase() creates a new one"""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is None:
+        return
+    # Sub-clients are created lazily, only close the ones that were used
+    if client._postgrest is not None:
+        client._postgrest.aclose()
+    client.auth.close()
+    logger.info("Supabase client closed")
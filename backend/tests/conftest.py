@@ -0,0 +1,154 @@
+"""
+Shared fixtures for the backend tests.
+
+Tests that need a database run against the Postgres in ``DATABASE_URL`` and are
+skipped when it is unset. Each test gets its own scratch tables, dropped
+afterwards, and the functions in ``backend/sql`` are (re)applied once per run.
+
+``backends`` yields one ``(client, table)`` pair per data layer backend, each
+with its own copy of the seed rows, so reads and writes can be compared call
+by call. The asyncpg backend is always included; the PostgREST
+``SupabaseClient`` joins when ``SUPABASE_PARITY=on`` and ``SUPABASE_URL`` /
+``SUPABASE_SERVICE_ROLE_KEY`` serve the same database as ``DATABASE_URL``.
+"""
+
+import os
+import sys
+import uuid
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+SQL_DIR = BACKEND_DIR / "sql"
+
+# Roles the Supabase migrations grant to, missing on a plain Postgres
+SUPABASE_ROLES = ("anon", "authenticated", "service_role")
+
+SCRATCH_TABLE_SQL = """
+create table {table} (
+    id uuid primary key,
+    name text not null unique,
+    category text,
+    score integer,
+    views_count integer not null default 0,
+    tags jsonb,
+    created_at timestamptz not null,
+    updated_at timestamptz
+)
+"""
+
+
+# Deterministic ids so every backend's copy of the seed rows is identical
+def row_id(n: int) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"backend-tests/{n}"))
+
+
+SEED_ROWS: List[Dict[str, Any]] = [
+    {"id": row_id(n), "name": f"row-{n}", "category": category, "score": score,
+     "views_count": n, "tags": tags, "created_at": f"2024-01-{n + 1:02d}T10:00:00+00:00"}
+    for n, (category, score, tags) in enumerate([
+        ("a", 30, ["x"]), ("b", None, None), ("a", 10, {"nested": [1, 2]}), ("b", 30, []),
+        (None, None, ["y"]), ("a", 20, None), ("b", 10, None), ("a", None, None),
+    ])
+]
+
+_sql_applied = False
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def database_url() -> str:
+    url = os.environ.get("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not set")
+    return url
+
+
+async def execute(client, sql: str) -> None:
+    """Run DDL (possibly several statements) outside the data layer"""
+    pool = await client.connect()
+    await pool.execute(sql)
+
+
+async def _apply_sql(client) -> None:
+    global _sql_applied
+    if _sql_applied:
+        return
+    for role in SUPABASE_ROLES:
+        await execute(
+            client,
+            f"do $$ begin if not exists (select 1 from pg_roles where rolname = '{role}') "
+            f"then create role {role} nologin; end if; end $$"
+        )
+    for path in sorted(SQL_DIR.glob("*.sql")):
+        await execute(client, path.read_text())
+    _sql_applied = True
+
+
+@pytest.fixture
+async def pg(database_url):
+    from asyncpg_client import AsyncpgClient
+
+    client = AsyncpgClient(database_url)
+    await _apply_sql(client)
+    yield client
+    await client.close()
+
+
+@pytest.fixture
+def rest():
+    """The PostgREST backend, when parity checks are enabled"""
+    if os.environ.get("SUPABASE_PARITY", "off").lower() != "on":
+        return None
+    from supabase_client import SupabaseClient
+    return SupabaseClient()
+
+
+async def create_scratch_table(pg, rows: List[Dict[str, Any]] = SEED_ROWS) -> str:
+    table = f"test_{uuid.uuid4().hex[:12]}"
+    await execute(pg, SCRATCH_TABLE_SQL.format(table=table))
+    await execute(pg, f"grant all on {table} to service_role")
+    if rows:
+        await pg.create_records(table, rows)
+    return table
+
+
+@pytest.fixture
+async def backends(pg, rest):
+    pairs = [(pg, await create_scratch_table(pg))]
+    if rest is not None:
+        pairs.append((rest, await create_scratch_table(pg)))
+        # Let PostgREST pick up the new tables
+        await execute(pg, "notify pgrst, 'reload schema'")
+        await asyncio.sleep(1)
+    yield pairs
+    for _, table in pairs:
+        await execute(pg, f"drop table if exists {table}")
+
+
+async def same(backends, method: str, *args: Any, **kwargs: Any) -> Any:
+    """Run ``method`` on every backend's table and assert they all return the same result"""
+    results = []
+    for client, table in backends:
+        results.append(await getattr(client, method)(table, *args, **kwargs))
+    for result in results[1:]:
+        assert result == results[0]
+    return results[0]
+
+
+async def same_rows(backends, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+    """Collect ``iter_records`` from every backend and assert they stream the same rows"""
+    results = []
+    for client, table in backends:
+        results.append([row async for row in client.iter_records(table, *args, **kwargs)])
+    for result in results[1:]:
+        assert result == results[0]
+    return results[0]
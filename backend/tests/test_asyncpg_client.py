@@ -0,0 +1,178 @@
+"""
+AsyncpgClient against a real Postgres, call by call against SupabaseClient.
+
+Every check runs through ``conftest.same``: the call is made on each backend's
+copy of the seed table and the results must match (with SUPABASE_PARITY=on the
+PostgREST backend is one of them), then the result is checked on its own.
+"""
+
+import orjson
+import pytest
+from db_metrics import query_metrics
+from conftest import SEED_ROWS, execute, row_id, same, same_rows
+
+pytestmark = pytest.mark.anyio
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+async def test_get_record(backends):
+    row = await same(backends, "get_record", "id", row_id(2))
+    assert row == {**SEED_ROWS[2], "created_at": "2024-01-03T10:00:00+00:00", "updated_at": None}
+    assert await same(backends, "get_record", "id", row_id(99)) is None
+    assert await same(backends, "get_record", "name", "row-3", columns=["id", "score"]) == {
+        "id": row_id(3), "score": 30
+    }
+
+
+async def test_get_records_filters(backends):
+    rows = await same(backends, "get_records", {"category": "a", "score": {"$gte": 20}}, order_by="-score")
+    assert ids(rows) == [row_id(0), row_id(5)]
+
+    rows = await same(backends, "get_records", {"score": {"$lte": 10}}, order_by="created_at")
+    assert ids(rows) == [row_id(2), row_id(6)]
+
+    rows = await same(backends, "get_records", {"id": {"$in": [row_id(1), row_id(4), row_id(99)]}},
+                      order_by="name")
+    assert ids(rows) == [row_id(1), row_id(4)]
+
+    rows = await same(backends, "get_records", {"name": {"$regex": "ROW-7"}})
+    assert ids(rows) == [row_id(7)]
+
+    rows = await same(backends, "get_records", {"category": None})
+    assert ids(rows) == [row_id(4)]
+
+    rows = await same(backends, "get_records", order_by="-views_count", limit=2, columns=["id"])
+    assert rows == [{"id": row_id(7)}, {"id": row_id(6)}]
+
+
+async def test_find_one(backends):
+    row = await same(backends, "find_one", {"category": "b", "score": 30})
+    assert row["id"] == row_id(3)
+    assert await same(backends, "find_one", {"category": "c"}) is None
+
+
+async def test_create_records(backends):
+    row = {"id": row_id(100), "name": "created", "score": 5, "tags": {"a": [1]},
+           "created_at": "2024-02-01T00:00:00+00:00"}
+    created = await same(backends, "create_record", row)
+    assert created == {**row, "category": None, "views_count": 0, "updated_at": None}
+
+    rows = [
+        {"id": row_id(101 + n), "name": f"bulk-{n}", "created_at": "2024-02-02T00:00:00+00:00"}
+        for n in range(5)
+    ]
+    created = await same(backends, "create_records", rows, chunk_size=2)
+    assert ids(created) == ids(rows)
+    assert await same(backends, "count_records", {"name": {"$regex": "bulk-"}}) == 5
+
+
+async def test_update_and_delete(backends):
+    updated = await same(backends, "update_record", "id", row_id(1),
+                         {"score": 42, "updated_at": "2024-03-01T00:00:00+00:00", "category": None})
+    # None values are skipped, like the PostgREST backend
+    assert updated["score"] == 42 and updated["category"] == "b"
+    assert updated["updated_at"] == "2024-03-01T00:00:00+00:00"
+    assert await same(backends, "update_record", "id", row_id(99), {"score": 1}) is None
+
+    assert await same(backends, "update_where", {"category": "a", "score": {"$gte": 20}}, {"score": 0}) == 2
+    rows = await same(backends, "get_records", {"score": 0}, order_by="name")
+    assert ids(rows) == [row_id(0), row_id(5)]
+
+    assert await same(backends, "delete_record", "id", row_id(4)) is True
+    assert await same(backends, "get_record", "id", row_id(4)) is None
+
+    assert await same(backends, "delete_where", {"category": "b"}) == 3
+    assert await same(backends, "count_records") == 4
+
+    with pytest.raises(ValueError):
+        await same(backends, "delete_where", {})
+
+
+async def test_iter_records_keyset_paging(backends):
+    rows = await same_rows(backends, page_size=3)
+    assert ids(rows) == sorted(ids(SEED_ROWS))
+
+    rows = await same_rows(backends, order_by="-views_count", page_size=3)
+    assert ids(rows) == [row_id(n) for n in reversed(range(len(SEED_ROWS)))]
+
+    rows = await same_rows(backends, filters={"category": "b"}, order_by="created_at", page_size=1,
+                           columns=["name"])
+    assert rows == [
+        {"name": f"row-{n}", "created_at": f"2024-01-{n + 1:02d}T10:00:00+00:00", "id": row_id(n)}
+        for n in (1, 3, 6)
+    ]
+
+    # Ties in the ordering column are broken by id
+    rows = await same_rows(backends, order_by="category", page_size=2)
+    expected = sorted(SEED_ROWS, key=lambda row: (row["category"] is None, row["category"] or "", row["id"]))
+    assert ids(rows) == ids(expected)
+
+
+async def test_upsert(backends):
+    # Conflict: views_count is added, score replaced, id and created_at kept
+    row = {"id": row_id(200), "name": "row-1", "views_count": 5, "score": 7,
+           "created_at": "2030-01-01T00:00:00+00:00"}
+    merged = await same(backends, "upsert", row, on_conflict="name", additive=["views_count"])
+    assert merged == {**SEED_ROWS[1], "views_count": 6, "score": 7,
+                      "created_at": "2024-01-02T10:00:00+00:00", "updated_at": None}
+
+    # No conflict: inserted as given
+    row = {"id": row_id(201), "name": "fresh", "views_count": 5, "created_at": "2030-01-01T00:00:00+00:00"}
+    inserted = await same(backends, "upsert", row, on_conflict="name", additive=["views_count"])
+    assert inserted["id"] == row_id(201) and inserted["views_count"] == 5
+
+    # Nothing left to update: the stored row comes back untouched
+    row = {"id": row_id(202), "name": "row-2", "created_at": "2030-01-01T00:00:00+00:00"}
+    kept = await same(backends, "upsert", row, on_conflict="name", insert_only=["id", "created_at"])
+    assert kept["id"] == row_id(2) and kept["score"] == 10
+
+
+async def test_increment(backends):
+    assert await same(backends, "increment", row_id(3), "views_count") == 4
+    assert await same(backends, "increment", row_id(3), "views_count", delta=-2) == 2
+    # NULL counters start from zero
+    assert await same(backends, "increment", row_id(1), "score", delta=3) == 3
+    assert await same(backends, "increment", row_id(99), "views_count") is None
+
+    await same(backends, "increment", row_id(3), "views_count", touch="updated_at")
+    for client, table in backends:
+        row = await client.get_record(table, "id", row_id(3))
+        assert row["views_count"] == 3
+        assert row["updated_at"] is not None
+
+
+async def test_increment_many(backends):
+    deltas = {row_id(0): 2, row_id(1): 3, row_id(99): 1}
+    assert await same(backends, "increment_many", "views_count", deltas) == 2
+    rows = await same(backends, "get_records", {"id": {"$in": list(deltas)}}, order_by="name")
+    assert [row["views_count"] for row in rows] == [2, 4]
+    assert await same(backends, "increment_many", "views_count", {}) == 0
+
+
+async def test_count_records_modes(backends):
+    for _, table in backends:
+        await execute(backends[0][0], f"analyze {table}")
+
+    assert await same(backends, "count_records") == len(SEED_ROWS)
+    assert await same(backends, "count_records", {"category": "a"}) == 4
+    assert await same(backends, "count_records", {"score": {"$in": [10, 30]}}, count="exact") == 4
+    # Planner estimates from fresh statistics
+    assert await same(backends, "count_records", count="planned") == len(SEED_ROWS)
+    # Small tables fall back to an exact count
+    assert await same(backends, "count_records", {"category": "b"}, count="estimated") == 3
+
+    with pytest.raises(ValueError):
+        await same(backends, "count_records", count="fuzzy")
+
+
+async def test_reads_record_their_payload_size(backends):
+    pg, table = backends[0]
+    query_metrics.reset()
+    rows = await pg.get_records(table, {"category": "a"})
+
+    (series,) = [entry for entry in query_metrics.top_queries() if entry["table"] == table]
+    # Estimated from a sample of the rows, so only close to the real encoding
+    assert series["total_bytes"] == pytest.approx(len(orjson.dumps(rows)), rel=0.1)
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from query_cache import QueryCache
+from cache_invalidation import CacheInvalidator, LocalChangeFeed
+
+pytestmark = pytest.mark.anyio
+
+QUESTION = {"id": "q1", "question": "Why?", "answer": "Because", "views_count": 10,
+            "updated_at": "2024-01-01T00:00:00+00:00"}
+
+
+@pytest.fixture
+async def subscribed():
+    feed = LocalChangeFeed()
+    cache = QueryCache({"courses": 60, "qa_questions": 60, "promocodes": 60})
+    invalidator = CacheInvalidator(feed, cache=cache)
+    changes = []
+    invalidator.add_listener(changes.append)
+    invalidator.start()
+    await asyncio.sleep(0)
+    yield feed, cache, invalidator, changes
+    await invalidator.stop()
+
+
+def generations(cache):
+    return {table: cache.generation(table) for table in ("courses", "qa_questions", "promocodes")}
+
+
+async def test_subscribing_resyncs_every_table(subscribed):
+    feed, cache, invalidator, _ = subscribed
+    assert invalidator.resyncs == 1
+    assert generations(cache) == {"courses": 1, "qa_questions": 1, "promocodes": 1}
+
+
+async def test_content_changes_invalidate_their_table(subscribed):
+    feed, cache, invalidator, changes = subscribed
+    before = generations(cache)
+
+    feed.publish("courses", "UPDATE", record={"id": "c1", "title": "New"}, old_record={"id": "c1"})
+    feed.publish("qa_questions", "UPDATE", record={**QUESTION, "answer": "Edited"}, old_record=QUESTION)
+    feed.publish("promocodes", "INSERT", record={"id": "p1", "used_count": 0})
+
+    assert generations(cache) == {table: generation + 1 for table, generation in before.items()}
+    assert [change["data"]["table"] for change in changes] == ["courses", "qa_questions", "promocodes"]
+    assert invalidator.events == 3 and invalidator.counter_updates == 0
+
+
+async def test_counter_only_updates_keep_the_cache(subscribed):
+    feed, cache, invalidator, changes = subscribed
+    before = generations(cache)
+    cache.set("qa_questions", "featured", [QUESTION], cache.generation("qa_questions"))
+
+    # view_counter flush
+    feed.publish("qa_questions", "UPDATE", record={**QUESTION, "views_count": 15}, old_record=QUESTION)
+    # promocode activation: increment(touch="updated_at")
+    promocode = {"id": "p1", "code": "SPRING", "used_count": 3, "updated_at": "2024-01-01T00:00:00+00:00"}
+    feed.publish("promocodes", "UPDATE",
+                 record={**promocode, "used_count": 4, "updated_at": "2024-01-02T00:00:00+00:00"},
+                 old_record=promocode)
+
+    assert generations(cache) == before
+    assert cache.get("qa_questions", "featured") == (True, [QUESTION])
+    assert changes == []
+    assert invalidator.events == 2 and invalidator.counter_updates == 2
+
+
+async def test_updates_without_the_old_row_invalidate(subscribed):
+    feed, cache, invalidator, _ = subscribed
+    before = generations(cache)
+
+    # Without REPLICA IDENTITY FULL Realtime only sends the primary key
+    feed.publish("qa_questions", "UPDATE", record={**QUESTION, "views_count": 15}, old_record={"id": "q1"})
+    # Deletes never count as counter updates
+    feed.publish("qa_questions", "DELETE", old_record=QUESTION)
+
+    assert generations(cache)["qa_questions"] == before["qa_questions"] + 2
+    assert invalidator.counter_updates == 0
+
+
+async def test_unwatched_tables_are_ignored(subscribed):
+    feed, cache, invalidator, _ = subscribed
+    before = generations(cache)
+    assert feed.publish("test_results", "INSERT", record={"id": "r1"}) == 0
+    assert generations(cache) == before
+    assert invalidator.events == 0
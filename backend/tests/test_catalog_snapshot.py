@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from catalog_snapshot import CatalogRefreshError, CatalogStore
+
+pytestmark = pytest.mark.anyio
+
+
+class CatalogClient:
+    def __init__(self):
+        self.tables = {
+            "courses": [{"id": "c1", "title": "Course", "status": "published", "order": 1}],
+            "lessons": [{"id": "l1", "course_id": "c1", "is_published": True, "order": 1}],
+            "tests": [{"id": "t1", "lesson_id": "l1"}],
+        }
+        self.fail = False
+        self.loads = 0
+
+    async def iter_records(self, table):
+        self.loads += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        for row in self.tables[table]:
+            yield row
+
+
+@pytest.fixture
+def store():
+    return CatalogStore(CatalogClient(), refresh_interval=0, enabled=True)
+
+
+async def test_refresh_makes_the_write_visible(store):
+    await store.refresh("courses")
+    store.client.tables["lessons"].append({"id": "l2", "course_id": "c1", "is_published": True, "order": 2})
+    await store.refresh("lessons")
+    assert [lesson["id"] for lesson in await store.course_lessons("c1")] == ["l1", "l2"]
+    assert store.stats()["up_to_date"] is True
+
+
+async def test_failed_rebuild_is_reported_to_the_writer(store):
+    await store.refresh()
+    before = store.current
+
+    store.client.fail = True
+    with pytest.raises(CatalogRefreshError):
+        await store.refresh("tests")
+    # The previous snapshot stays live
+    assert store.current is before
+    assert store.stats()["up_to_date"] is False and store.errors == 1
+
+    store.client.fail = False
+    await store.refresh("tests")
+    assert store.current is not before
+    assert store.stats()["up_to_date"] is True
+
+
+async def test_concurrent_writers_share_the_rebuild_that_covers_them(store):
+    gate = asyncio.Event()
+    outcomes = [RuntimeError("database unavailable"), None]
+
+    async def rebuild():
+        await gate.wait()
+        outcome = outcomes.pop(0)
+        if outcome is not None:
+            raise outcome
+        store.builds += 1
+
+    store.rebuild = rebuild
+    first = asyncio.ensure_future(store.refresh("courses"))
+    await asyncio.sleep(0)
+    # Requested while the (failing) rebuild runs: covered only by the follow-up, which succeeds
+    second = asyncio.ensure_future(store.refresh("courses"))
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(first, second, return_exceptions=True)
+    # Both waited for the whole drain, which ended with a snapshot including both writes
+    assert results == [None, None]
+    assert store.builds == 1 and store.errors == 1
+
+
+async def test_writes_outside_the_snapshot_do_not_rebuild(store):
+    await store.refresh("simple_tests")
+    assert store.client.loads == 0 and store.current is None
+
+
+async def test_start_tolerates_an_unavailable_database(store):
+    store.client.fail = True
+    await store.start()
+    assert store.current is None
+    # Reads fall back to the client until a rebuild succeeds
+    assert store.stats()["up_to_date"] is False
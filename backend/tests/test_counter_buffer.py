@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from counter_buffer import CounterBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingClient:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def increment_many(self, table, field, deltas, id_field="id", invalidate=True):
+        self.calls.append(dict(deltas))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        return len(deltas)
+
+
+async def test_burst_schedules_a_single_early_flush():
+    client = RecordingClient()
+    buffer = CounterBuffer(client, flush_interval=60, max_pending=10)
+    tasks_before = len(asyncio.all_tasks())
+    for n in range(500):
+        buffer.add("qa_questions", f"q{n}", "views_count")
+    assert len(asyncio.all_tasks()) == tasks_before + 1
+    await asyncio.sleep(0.05)
+
+    # One early flush took everything queued before it ran
+    assert len(client.calls) == 1
+    assert sum(client.calls[0].values()) == 500
+    assert buffer.stats()["pending_rows"] == 0
+
+
+async def test_failed_flush_leaves_retries_to_the_timer():
+    client = RecordingClient(fail=True)
+    buffer = CounterBuffer(client, flush_interval=60, max_pending=10)
+    for n in range(20):
+        buffer.add("qa_questions", f"q{n}", "views_count")
+    await asyncio.sleep(0.05)
+    for n in range(20):
+        buffer.add("qa_questions", f"q{n}", "views_count")
+    await asyncio.sleep(0.05)
+
+    assert len(client.calls) == 1
+    assert buffer.errors == 1
+    # Nothing was lost: the failed deltas were merged back
+    client.fail = False
+    assert await buffer.flush() == 20
+    assert sum(client.calls[-1].values()) == 40
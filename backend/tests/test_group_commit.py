@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from group_commit import GroupCommitWriter
+
+pytestmark = pytest.mark.anyio
+
+
+class MemoryClient:
+    """A table keyed by id; a batch can commit and still report a failure, like a timeout"""
+
+    def __init__(self, commit_then_fail: bool = False, bad_name: str = None):
+        self.rows = {}
+        self.commit_then_fail = commit_then_fail
+        self.bad_name = bad_name
+        self.single_inserts = 0
+        self.missed_lookups = 0  # lookups that don't see committed rows yet
+
+    def _insert(self, row):
+        if row["id"] in self.rows:
+            raise Exception(f"duplicate key value violates unique constraint: {row['id']}")
+        if row.get("name") == self.bad_name:
+            raise Exception("violates check constraint")
+        self.rows[row["id"]] = dict(row)
+        return dict(row)
+
+    async def create_records(self, table, rows, chunk_size=500):
+        if any(row.get("name") == self.bad_name for row in rows):
+            raise Exception("violates check constraint")
+        inserted = [self._insert(row) for row in rows]
+        if self.commit_then_fail:
+            raise asyncio.TimeoutError()
+        return inserted
+
+    async def create_record(self, table, row):
+        self.single_inserts += 1
+        return self._insert(row)
+
+    async def get_records(self, table, filters):
+        if self.missed_lookups:
+            self.missed_lookups -= 1
+            return []
+        return [dict(self.rows[key]) for key in filters["id"]["$in"] if key in self.rows]
+
+
+async def _insert_all(writer, rows):
+    return await asyncio.gather(*(writer.insert(row) for row in rows), return_exceptions=True)
+
+
+async def test_batch_that_committed_before_failing_is_not_written_twice():
+    client = MemoryClient(commit_then_fail=True)
+    writer = GroupCommitWriter(client, "test_results", delay=0.001)
+
+    results = await _insert_all(writer, [{"id": "r1", "name": "a"}, {"name": "b"}])
+
+    assert [result["name"] for result in results] == ["a", "b"]
+    assert len(client.rows) == 2 and client.single_inserts == 0
+    # Rows without an id were given one, so they could be found again
+    assert results[1]["id"] in client.rows
+    assert writer.stats()["recovered_rows"] == 2
+    assert writer.stats()["failed_rows"] == 0
+
+
+async def test_bad_row_only_fails_its_own_caller():
+    client = MemoryClient(bad_name="bad")
+    writer = GroupCommitWriter(client, "test_results", delay=0.001)
+
+    good, bad = await _insert_all(writer, [{"id": "r1", "name": "good"}, {"id": "r2", "name": "bad"}])
+
+    assert good == {"id": "r1", "name": "good"}
+    assert isinstance(bad, Exception)
+    assert list(client.rows) == ["r1"]
+    assert writer.stats()["fallbacks"] == 1 and writer.stats()["failed_rows"] == 1
+
+
+async def test_retry_conflicting_on_its_own_key_returns_the_stored_row():
+    client = MemoryClient(commit_then_fail=True)
+    # The check after the failed batch misses its rows, so they are retried and conflict
+    client.missed_lookups = 1
+    writer = GroupCommitWriter(client, "test_results", delay=0.001)
+
+    results = await _insert_all(writer, [{"id": "r1", "name": "a"}, {"id": "r2", "name": "b"}])
+
+    assert results == [{"id": "r1", "name": "a"}, {"id": "r2", "name": "b"}]
+    assert client.single_inserts == 2 and len(client.rows) == 2
+    assert writer.stats()["recovered_rows"] == 2 and writer.stats()["failed_rows"] == 0
@@ -0,0 +1,50 @@
+import pytest
+from http_caching import row_validators
+from conftest import execute, row_id
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def touched(backends):
+    """The scratch tables with sql/006's updated_at trigger attached"""
+    pg = backends[0][0]
+    for _, table in backends:
+        await execute(
+            pg,
+            f"create trigger touch_updated_at before update on {table} "
+            f"for each row execute function public.touch_updated_at()"
+        )
+    return backends
+
+
+async def _validators(client, table):
+    return row_validators(await client.get_records(table, order_by="name"))
+
+
+async def test_writes_without_updated_at_change_the_validators(touched):
+    for client, table in touched:
+        etag, last_modified = await _validators(client, table)
+
+        # Table editor style update, counter flush and single increment: none set updated_at
+        await client.update_record(table, "id", row_id(1), {"score": 5})
+        after_edit = await _validators(client, table)
+        await client.increment_many(table, "views_count", {row_id(2): 3})
+        after_flush = await _validators(client, table)
+        await client.increment(table, row_id(3), "views_count")
+        after_increment = await _validators(client, table)
+
+        etags = [etag, after_edit[0], after_flush[0], after_increment[0]]
+        assert len(set(etags)) == 4
+        assert after_edit[1] > last_modified
+
+
+async def test_explicit_updated_at_and_no_op_updates_are_kept(touched):
+    for client, table in touched:
+        await client.update_record(table, "id", row_id(1), {"updated_at": "2024-05-01T00:00:00+00:00"})
+        assert (await client.get_record(table, "id", row_id(1)))["updated_at"] == "2024-05-01T00:00:00+00:00"
+
+        before = await _validators(client, table)
+        # Writing the values a row already has changes nothing
+        await client.update_record(table, "id", row_id(1), {"name": "row-1"})
+        assert await _validators(client, table) == before
@@ -0,0 +1,61 @@
+import pytest
+import postgrest
+from supabase_client import SupabaseClient
+from asyncpg_client import AsyncpgClient
+from conftest import SEED_ROWS, row_id, same_rows
+
+
+def _cursor_params(cursor, order_field="score", descending=False):
+    query = postgrest.SyncPostgrestClient("http://localhost").table("t").select("*")
+    query = SupabaseClient._after_cursor(query, cursor, order_field, "id", descending)
+    return dict(query.request.params)
+
+
+def test_postgrest_cursor_keeps_null_group_ascending():
+    params = _cursor_params({"score": 10, "id": "k"})
+    assert params["or"] == '(score.gt."10",and(score.eq."10",id.gt."k"),score.is.null)'
+
+
+def test_postgrest_cursor_inside_null_group():
+    # NULLs sort last ascending: only the rest of the NULL group remains
+    params = _cursor_params({"score": None, "id": "k"})
+    assert params["score"] == "is.null"
+    assert params["id"] == "gt.k"
+    # ... and first descending: the rest of the NULL group, then every value
+    params = _cursor_params({"score": None, "id": "k"}, descending=True)
+    assert params["or"] == '(and(score.is.null,id.lt."k"),score.not.is.null)'
+
+
+def test_asyncpg_cursor_never_compares_against_null():
+    args = []
+    sql = AsyncpgClient._after_cursor_sql({"score": None, "id": "k"}, "score", "id", False, args)
+    assert sql == '("score" is null and "id" > $1)'
+    assert args == ["k"]
+
+    args = []
+    sql = AsyncpgClient._after_cursor_sql({"score": 10, "id": "k"}, "score", "id", False, args)
+    assert sql == '(("score", "id") > ($2, $1) or "score" is null)'
+    assert args == ["k", 10]
+
+
+def _expected(order_by):
+    descending = order_by.startswith("-")
+    field = order_by.lstrip("-")
+    rows = sorted(
+        SEED_ROWS, key=lambda row: (row[field] is None, row[field] or 0, row["id"]), reverse=descending
+    )
+    return [row["id"] for row in rows]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("order_by", ["score", "-score"])
+@pytest.mark.parametrize("page_size", [1, 2, 3, 100])
+async def test_iter_records_pages_through_null_sort_values(backends, order_by, page_size):
+    rows = await same_rows(backends, order_by=order_by, page_size=page_size)
+    assert [row["id"] for row in rows] == _expected(order_by)
+
+
+@pytest.mark.anyio
+async def test_iter_records_null_sort_values_with_filters(backends):
+    rows = await same_rows(backends, filters={"category": "a"}, order_by="-score", page_size=1)
+    assert [row["id"] for row in rows] == [row_id(7), row_id(0), row_id(5), row_id(2)]
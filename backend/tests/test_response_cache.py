@@ -0,0 +1,98 @@
+import asyncio
+import copy
+import pytest
+from starlette.requests import Request
+from query_cache import QueryCache
+from response_cache import ResponseCache
+from counter_buffer import CounterBuffer
+from cache_invalidation import CacheInvalidator, LocalChangeFeed
+
+pytestmark = pytest.mark.anyio
+
+QUESTIONS = [
+    {"id": f"q{n}", "question": f"Question {n}", "answer": f"Answer {n}", "views_count": n,
+     "updated_at": "2024-01-01T00:00:00+00:00"}
+    for n in range(3)
+]
+
+
+class FeedClient:
+    """In-memory qa_questions that report every write to the change feed, like Realtime does"""
+
+    def __init__(self, feed: LocalChangeFeed, cache: QueryCache):
+        self.feed = feed
+        self.cache = cache
+        self.rows = {row["id"]: dict(row) for row in copy.deepcopy(QUESTIONS)}
+        self.writes = 0
+
+    def _write(self, id_value, changes):
+        old = self.rows[id_value]
+        # sql/006's trigger bumps updated_at on every UPDATE
+        new = {**old, **changes, "updated_at": f"2024-01-01T00:00:{self.writes:02d}+00:00"}
+        self.writes += 1
+        self.rows[id_value] = new
+        self.feed.publish("qa_questions", "UPDATE", record=new, old_record=old)
+
+    async def increment_many(self, table, field, deltas, id_field="id", invalidate=True):
+        for id_value, delta in deltas.items():
+            self._write(id_value, {field: self.rows[id_value][field] + delta})
+        if invalidate:
+            self.cache.invalidate(table)
+        return len(deltas)
+
+    def edit_in_dashboard(self, id_value, data):
+        # Not written through the app, so only the change feed can evict it
+        self._write(id_value, data)
+
+
+def _request(path="/api/qa/popular"):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+@pytest.fixture
+async def wired():
+    feed = LocalChangeFeed()
+    cache = QueryCache({"qa_questions": 60})
+    responses = ResponseCache(ttl=60, stale_ttl=60, enabled=True)
+    # As in server.py: query cache invalidations drop the cached responses too
+    cache.add_listener(responses.invalidate)
+    invalidator = CacheInvalidator(feed, cache=cache)
+    invalidator.start()
+    await asyncio.sleep(0)
+    client = FeedClient(feed, cache)
+    yield client, responses, invalidator
+    await invalidator.stop()
+
+
+async def _serve(client, responses):
+    async def build():
+        rows = sorted(client.rows.values(), key=lambda row: row["id"])
+        return [{"id": row["id"], "answer": row["answer"]} for row in rows], rows
+    return await responses.serve(_request(), build, ("qa_questions",))
+
+
+async def test_view_counter_flush_keeps_the_cached_response(wired):
+    client, responses, invalidator = wired
+    first = await _serve(client, responses)
+
+    view_counter = CounterBuffer(client, flush_interval=60)
+    for row in QUESTIONS:
+        view_counter.add("qa_questions", row["id"], "views_count", delta=5)
+    assert await view_counter.flush() == len(QUESTIONS)
+
+    assert invalidator.counter_updates == len(QUESTIONS)
+    again = await _serve(client, responses)
+    assert again.body == first.body
+    assert responses.builds == 1 and responses.hits == 1
+
+
+async def test_content_edit_evicts_the_cached_response(wired):
+    client, responses, invalidator = wired
+    await _serve(client, responses)
+
+    client.edit_in_dashboard("q1", {"answer": "Edited"})
+
+    assert responses.stats()["entries"] == 0
+    edited = await _serve(client, responses)
+    assert b'"Edited"' in edited.body
+    assert responses.builds == 2
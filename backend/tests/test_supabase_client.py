@@ -0,0 +1,54 @@
+"""
+SupabaseClient request shapes, checked without a PostgREST server.
+
+The parity tests in test_asyncpg_client.py only cover the PostgREST backend
+when SUPABASE_PARITY=on; these pin the two cases where it used to differ from
+AsyncpgClient (None filters and do-nothing upserts) in every run.
+"""
+
+from types import SimpleNamespace
+import postgrest
+import pytest
+from query_cache import QueryCache
+from supabase_client import SupabaseClient
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingClient(SupabaseClient):
+    """Builds real postgrest requests and answers them from ``responses`` in order"""
+
+    def __init__(self, *responses):
+        super().__init__()
+        self.cache = QueryCache({})
+        self.responses = list(responses)
+        self.requests = []
+        self._postgrest = postgrest.SyncPostgrestClient("http://localhost")
+
+    @property
+    def client(self):
+        return self._postgrest
+
+    async def _execute(self, query, timeout=None):
+        self.requests.append(query.request)
+        return SimpleNamespace(data=self.responses.pop(0), count=None)
+
+
+async def test_none_filters_are_sent_as_is_null():
+    client = RecordingClient([{"id": "r4"}])
+    assert await client.get_records("t", {"category": None, "score": 3}) == [{"id": "r4"}]
+    params = dict(client.requests[0].params)
+    assert params["category"] == "is.null"
+    assert params["score"] == "eq.3"
+
+
+async def test_upsert_that_does_nothing_returns_the_stored_row():
+    stored = {"id": "r2", "name": "row-2", "score": 10}
+    client = RecordingClient(None, [stored])
+
+    kept = await client.upsert("t", {"id": "r9", "name": "row-2"}, on_conflict="name")
+
+    assert kept == stored
+    rpc, lookup = client.requests
+    assert rpc.json["update_columns"] == []
+    assert dict(lookup.params) == {"select": "*", "name": "eq.row-2", "limit": "1"}
@@ -430,6 +430,7 @@ const CourseLessonsRouter = () => {
   const { courseSlug } = useParams();
   const navigate = useNavigate();
   const [course, setCourse] = useState(null);
+  const [lessons, setLessons] = useState([]);
   const [selectedLesson, setSelectedLesson] = useState(null);
   const [loading, setLoading] = useState(true);
 
@@ -439,9 +440,10 @@ const CourseLessonsRouter = () => {
 
   const fetchCourse = async () => {
     try {
-      const response = await axios.get(`${process.env.REACT_APP_BACKEND_URL}/api/courses`);
-      const foundCourse = response.data.find(c => c.slug === courseSlug || c.id === courseSlug);
-      setCourse(foundCourse);
+      // Course and its lessons in one request (accepts the slug or the id)
+      const response = await axios.get(`${process.env.REACT_APP_BACKEND_URL}/api/courses/${courseSlug}/bundle`);
+      setCourse(response.data.course);
+      setLessons(response.data.lessons);
     } catch (error) {
       console.error('Failed to fetch course:', error);
     }
@@ -488,6 +490,7 @@ const CourseLessonsRouter = () => {
       <Header />
       <CourseLessonsPage 
         course={course}
+        lessons={lessons}
         setSelectedLesson={handleLessonSelect}
       />
     </div>
@@ -499,6 +502,7 @@ const LessonDetailRouter = () => {
   const navigate = useNavigate();
   const [course, setCourse] = useState(null);
   const [lesson, setLesson] = useState(null);
+  const [tests, setTests] = useState([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -507,16 +511,17 @@ const LessonDetailRouter = () => {
 
   const fetchCourseAndLesson = async () => {
     try {
-      // Fetch course
-      const coursesResponse = await axios.get(`${process.env.REACT_APP_BACKEND_URL}/api/courses`);
-      const foundCourse = coursesResponse.data.find(c => c.slug === courseSlug || c.id === courseSlug);
+      // Course, lesson summaries and tests in one request
+      const bundleResponse = await axios.get(`${process.env.REACT_APP_BACKEND_URL}/api/courses/${courseSlug}/bundle`);
+      const { course: foundCourse, lessons, tests: courseTests } = bundleResponse.data;
       setCourse(foundCourse);
 
-      if (foundCourse) {
-        // Fetch lessons
-        const lessonsResponse = await axios.get(`${process.env.REACT_APP_BACKEND_URL}/api/courses/${foundCourse.id}/lessons`);
-        const foundLesson = lessonsResponse.data.find(l => l.slug === lessonSlug || l.id === lessonSlug);
-        setLesson(foundLesson);
+      const foundLesson = lessons.find(l => l.slug === lessonSlug || l.id === lessonSlug);
+      if (foundLesson) {
+        // Only the opened lesson's content is loaded
+        const lessonResponse = await axios.get(`${process.env.REACT_APP_BACKEND_URL}/api/lessons/${foundLesson.id}`);
+        setTests(courseTests.filter(t => t.lesson_id === foundLesson.id));
+        setLesson(lessonResponse.data);
       }
     } catch (error) {
       console.error('Failed to fetch course and lesson:', error);
@@ -560,6 +565,7 @@ const LessonDetailRouter = () => {
       <LessonDetailPage 
         lesson={lesson}
         course={course}
+        tests={tests}
       />
     </div>
   );
@@ -220,21 +220,25 @@ export const CourseDetail = ({ course, setCurrentPage, setSelectedLesson }) => {
 
   const fetchCourseContent = async () => {
     try {
-      const [lessonsResponse, testsResponse] = await Promise.all([
-        axios.get(`${API}/courses/${course.id}/lessons`),
-        axios.get(`${API}/courses/${course.id}/tests`)
-      ]);
-      
-      setLessons(lessonsResponse.data);
-      setTests(testsResponse.data);
+      // Lessons and tests of the course in one request
+      const response = await axios.get(`${API}/courses/${course.id}/bundle`);
+      setLessons(response.data.lessons);
+      setTests(response.data.tests);
     } catch (error) {
       console.error('Failed to fetch course content:', error);
     }
     setLoading(false);
   };
 
-  const handleLessonClick = (lesson) => {
-    setSelectedLesson(lesson);
+  const handleLessonClick = async (lesson) => {
+    // The bundle only has lesson summaries, load the content for the lesson view
+    try {
+      const response = await axios.get(`${API}/lessons/${lesson.id}`);
+      setSelectedLesson(response.data);
+    } catch (error) {
+      console.error('Failed to fetch lesson:', error);
+      setSelectedLesson(lesson);
+    }
     setCurrentPage('lesson-view');
   };
 
@@ -459,7 +463,7 @@ const TestCard = ({ test, onClick, currentUser }) => {
     >
       <h4 className="font-medium text-gray-900 mb-1">{test.title}</h4>
       <div className="flex items-center justify-between text-xs text-gray-500">
-        <span>{test.questions.length} вопросов</span>
+        {test.questions && <span>{test.questions.length} вопросов</span>}
         <span>{test.time_limit_minutes} мин</span>
       </div>
     </div>
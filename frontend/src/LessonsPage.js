@@ -434,22 +434,22 @@ export const LessonsPage = () => {
 };
 
 // Course Lessons List Component - similar to course detail page
-export const CourseLessonsPage = ({ course }) => {
-  const [lessons, setLessons] = useState([]);
-  const [loading, setLoading] = useState(true);
+export const CourseLessonsPage = ({ course, lessons: bundledLessons }) => {
+  const [lessons, setLessons] = useState(bundledLessons || []);
+  const [loading, setLoading] = useState(!bundledLessons);
   const { currentUser } = useAuth();
   const navigate = useNavigate();
 
   useEffect(() => {
-    if (course) {
+    if (course && !bundledLessons) {
       fetchLessons();
     }
   }, [course]);
 
   const fetchLessons = async () => {
     try {
-      const response = await axios.get(`${API}/courses/${course.id}/lessons`);
-      setLessons(response.data);
+      const response = await axios.get(`${API}/courses/${course.id}/bundle`);
+      setLessons(response.data.lessons);
     } catch (error) {
       console.error('Failed to fetch lessons:', error);
     }
@@ -572,11 +572,14 @@ export const CourseLessonsPage = ({ course }) => {
 };
 
 // Individual Lesson Detail Component - similar to islam.school lesson page
-export const LessonDetailPage = ({ lesson, course }) => {
-  const [tests, setTests] = useState([]);
-  const [loading, setLoading] = useState(true);
+export const LessonDetailPage = ({ lesson, course, tests: bundledTests }) => {
+  const [fetchedTests, setFetchedTests] = useState({ lessonId: null, tests: [] });
   const { currentUser } = useAuth();
   const navigate = useNavigate();
+  const lessonId = lesson?.id;
+  // Bundled tests are read on every render; fetched ones only count for the lesson they belong to
+  const tests = bundledTests || (fetchedTests.lessonId === lessonId ? fetchedTests.tests : []);
+  const loading = !lessonId || (!bundledTests && fetchedTests.lessonId !== lessonId);
 
   // Function to convert YouTube URL to embed format
   const convertToEmbedUrl = (url) => {
@@ -599,19 +602,28 @@ export const LessonDetailPage = ({ lesson, course }) => {
   };
 
   useEffect(() => {
-    if (lesson) {
-      fetchLessonTests();
+    if (!lessonId || bundledTests) {
+      return;
     }
-  }, [lesson]);
+    let cancelled = false;
+    fetchLessonTests(lessonId, () => cancelled);
+    return () => {
+      cancelled = true;
+    };
+  }, [lessonId, bundledTests]);
 
-  const fetchLessonTests = async () => {
+  const fetchLessonTests = async (id, isCancelled) => {
+    let lessonTests = [];
     try {
-      const response = await axios.get(`${API}/lessons/${lesson.id}/tests`);
-      setTests(response.data);
+      const response = await axios.get(`${API}/lessons/${id}/tests`);
+      lessonTests = response.data;
     } catch (error) {
       console.error('Failed to fetch lesson tests:', error);
     }
-    setLoading(false);
+    // A response for a lesson that is no longer open is dropped
+    if (!isCancelled()) {
+      setFetchedTests({ lessonId: id, tests: lessonTests });
+    }
   };
 
   const handleBackToCourse = () => {
@@ -42,7 +42,7 @@ const NewTestManagement = () => {
 
   const loadLessons = async () => {
     try {
-      const response = await axios.get(`${API}/admin/lessons`, {
+      const response = await axios.get(`${API}/admin/lessons/summary`, {
         headers: { Authorization: `Bearer ${token}` }
       });
       setLessons(response.data);
@@ -33,59 +33,47 @@ async def remove_demo_courses():
             
             # 1. Удаляем результаты тестов
             try:
-                test_results = await supabase_client.get_records("test_results", {"course_id": course_id})
-                for result in test_results:
-                    await supabase_client.delete_record("test_results", "id", result["id"])
-                print(f"   ✅ Удалено результатов тестов: {len(test_results)}")
+                deleted = await supabase_client.delete_where("test_results", {"course_id": course_id})
+                print(f"   ✅ Удалено результатов тестов: {deleted}")
             except Exception as e:
                 print(f"   ⚠️ Ошибка при удалении результатов тестов: {e}")
             
             # 2. Удаляем прогресс уроков
             try:
-                lesson_progress = await supabase_client.get_records("lesson_progress", {"course_id": course_id})
-                for progress in lesson_progress:
-                    await supabase_client.delete_record("lesson_progress", "id", progress["id"])
-                print(f"   ✅ Удалено записей прогресса уроков: {len(lesson_progress)}")
+                deleted = await supabase_client.delete_where("lesson_progress", {"course_id": course_id})
+                print(f"   ✅ Удалено записей прогресса уроков: {deleted}")
             except Exception as e:
                 print(f"   ⚠️ Ошибка при удалении прогресса: {e}")
             
             # 3. Удаляем вопросы тестов
             try:
-                tests = await supabase_client.get_records("tests", {"course_id": course_id})
-                total_questions = 0
-                for test in tests:
-                    questions = await supabase_client.get_records("test_questions", {"test_id": test["id"]})
-                    for question in questions:
-                        await supabase_client.delete_record("test_questions", "id", question["id"])
-                        total_questions += 1
-                print(f"   ✅ Удалено вопросов тестов: {total_questions}")
+                tests = await supabase_client.get_records("tests", {"course_id": course_id}, columns=["id"])
+                test_ids = [test["id"] for test in tests]
+                deleted = 0
+                if test_ids:
+                    deleted = await supabase_client.delete_where("test_questions", {"test_id": {"$in": test_ids}})
+                print(f"   ✅ Удалено вопросов тестов: {deleted}")
             except Exception as e:
                 print(f"   ⚠️ Ошибка при удалении вопросов: {e}")
             
             # 4. Удаляем тесты
             try:
-                tests = await supabase_client.get_records("tests", {"course_id": course_id})
-                for test in tests:
-                    await supabase_client.delete_record("tests", "id", test["id"])
-                print(f"   ✅ Удалено тестов: {len(tests)}")
+                deleted = await supabase_client.delete_where("tests", {"course_id": course_id})
+                print(f"   ✅ Удалено тестов: {deleted}")
             except Exception as e:
                 print(f"   ⚠️ Ошибка при удалении тестов: {e}")
             
             # 5. Удаляем уроки
             try:
-                lessons = await supabase_client.get_records("lessons", {"course_id": course_id})
-                for lesson in lessons:
-                    await supabase_client.delete_record("lessons", "id", lesson["id"])
-                print(f"   ✅ Удалено уроков: {len(lessons)}")
+                deleted = await supabase_client.delete_where("lessons", {"course_id": course_id})
+                print(f"   ✅ Удалено уроков: {deleted}")
             except Exception as e:
                 print(f"   ⚠️ Ошибка при удалении уроков: {e}")
             
             # 6. Удаляем доступы к курсу (если есть таблица)
             try:
-                user_accesses = await supabase_client.get_records("user_course_access", {"course_id": course_id})
-                for access in user_accesses:
-                    await supabase_client.delete_record("user_course_access", "id", access["id"])
-                print(f"   ✅ Удалено записей доступа: {len(user_accesses)}")
+                deleted = await supabase_client.delete_where("user_course_access", {"course_id": course_id})
+                print(f"   ✅ Удалено записей доступа: {deleted}")
             except Exception as e:
                 print(f"   ⚠️ Таблица user_course_access не найдена или ошибка: {e}")
             